@@ -1,15 +1,21 @@
 """客户端清单（Manifest）生成。
 
 为终端设备提供获取其动态配置集（课表等）的接口。
+各资源源的 Version 为只增不减的版本水位：取资源最近一次版本推进的时间与
+配置档案更新时间中较晚者（Unix 秒，七张表单次 UNION ALL 查询），
+内容更新与档案切换到其他资源时均单调增大；清单整体附带 ETag，客户端携带 If-None-Match 且内容未变时返回 304。
 """
 
-import time
+import hashlib
+import json
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy import select
+from fastapi.responses import Response
+from sqlalchemy import String, cast, literal, select, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from app.models.database import get_db, ClientProfile
+from app.api.command.model_map import MODEL_MAP
 from app.api.schemas.client import ClientManifest
 from app.core.client_ip import get_client_ip_from_request
 
@@ -43,12 +49,70 @@ async def get_client_manifest(
     pol = getattr(p, "policy", None) or "default"
     comp = getattr(p, "components", None) or "default"
     cred = getattr(p, "credentials", None) or "default"
-    cur = int(time.time())
+    names = {
+        "ClassPlan": cp,
+        "TimeLayout": tl,
+        "Subjects": sub,
+        "DefaultSettings": ds,
+        "Policy": pol,
+        "Components": comp,
+        "Credentials": cred,
+    }
+    versions = await _resource_versions(db, names, p.updated_at)
 
-    return _build_manifest(request, cp, tl, sub, ds, pol, comp, cred, cur)
+    manifest = _build_manifest(request, cp, tl, sub, ds, pol, comp, cred, versions)
+    body = json.dumps(
+        manifest.model_dump(), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
-def _build_manifest(request: Request, cp, tl, sub, ds, pol, comp, cred, ver):
+def _source_version(updated_at, profile_updated_at) -> int:
+    """清单 Version：资源与档案更新时间中较晚者的 Unix 秒。
+
+    资源每次版本推进都使更新时间按秒严格递增（见 bump_version），
+    档案切换资源时其更新时间同样推进，因此同一资源源的 Version 只增不减
+    （档案切换与资源写入落在同一秒时两者得到相同的 Version）。
+    旧版清单以请求时刻的 time.time() 作为 Version，与此同为 Unix 秒：
+    客户端保存的旧值之后发生的变更必然大于旧值；小于旧值的 Version
+    只出现在旧值之后未发生变更的资源上，客户端跳过下载即为正确行为。
+    """
+    stamps = [t for t in (updated_at, profile_updated_at) if t is not None]
+    return int(max(stamps).timestamp()) if stamps else 0
+
+
+async def _resource_versions(
+    db: AsyncSession, names: dict[str, str], profile_updated_at=None
+) -> dict:
+    """单次 UNION ALL 查询各资源的清单 Version，不存在的资源记为 0。"""
+    stmt = union_all(
+        *(
+            select(
+                cast(literal(rt), String).label("rt"), MODEL_MAP[rt].updated_at
+            ).where(MODEL_MAP[rt].name == name)
+            for rt, name in names.items()
+        )
+    )
+    rows = (await db.execute(stmt)).all()
+    return {
+        rt: _source_version(updated_at, profile_updated_at) or 1
+        for rt, updated_at in rows
+    }
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 是否命中当前 ETag（弱比较，支持列表与 *）。"""
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _build_manifest(request: Request, cp, tl, sub, ds, pol, comp, cred, versions):
     """组装各资源源的 Manifest 结构体。"""
 
     def _src(rt, n):
@@ -56,7 +120,7 @@ def _build_manifest(request: Request, cp, tl, sub, ds, pol, comp, cred, ver):
         # 目标端点为 resource.py 中的 get_client_resource
         url = request.url_for("get_client_resource", resource_type=rt)
         full_url = str(url.include_query_params(name=n))
-        return {"Value": full_url, "Version": ver}
+        return {"Value": full_url, "Version": versions.get(rt, 0)}
 
     return ClientManifest(
         ClassPlanSource=_src("ClassPlan", cp),
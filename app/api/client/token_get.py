@@ -1,17 +1,16 @@
 """令牌下发的资源获取端点。
 
-根据资源令牌加载对应的配置数据并返回 JSON 内容。
+根据资源令牌加载对应的配置数据并返回 JSON 内容；
+内容取自预序列化缓存，客户端接受 gzip 时直接返回压缩后的字节。
 """
 
-import json
 from fastapi import APIRouter, HTTPException, Request
-from sqlalchemy import select
-from app.core.tenant.context import set_search_path
+from fastapi.responses import Response
 from app.core.client_ip import get_client_ip_from_request
-from app.models.database import AsyncSessionLocal
+from app.services.resource_body import CorruptedResource, get_resource_body
 from app.services.resource_token import resolve_token
 from app.api.command.model_map import MODEL_MAP
-from app.grpc.session.online_status import get_tenant_online_ips
+from app.grpc.session.online_ips import is_tenant_ip_online
 
 router = APIRouter()
 
@@ -31,21 +30,32 @@ async def get_resource_by_token(token: str, request: Request):
     # IP 鉴权
     client_ip = get_client_ip_from_request(request)
     if token_ip:
-        if client_ip not in await get_tenant_online_ips(tenant_id):
+        if not await is_tenant_ip_online(tenant_id, client_ip):
             return {}
 
-    # 令牌携带 tenant_id → 需取对应 Schema 设置 search_path
-    async with AsyncSessionLocal() as db:
-        # resolve_token 返回的 tenant_id 包含 slug 信息
-        await set_search_path(db)
-        row = (
-            await db.execute(select(model).where(model.name == name))
-        ).scalar_one_or_none()
+    try:
+        body = await get_resource_body(model, name)
+    except CorruptedResource:
+        raise HTTPException(status_code=500, detail="Corrupted resource")
 
-    if row is None:  # pragma: no cover
+    if body is None:  # pragma: no cover
         raise HTTPException(status_code=404, detail="Resource not found")
 
-    try:
-        return json.loads(row.content)
-    except (json.JSONDecodeError, TypeError):
-        raise HTTPException(status_code=500, detail="Corrupted resource")
+    headers = {"Vary": "Accept-Encoding"}
+    if body.gzipped and _accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(body.gzipped, media_type="application/json", headers=headers)
+    return Response(body.raw, media_type="application/json", headers=headers)
+
+
+def _accepts_gzip(header: str) -> bool:
+    """Accept-Encoding 是否接受 gzip（q=0 视为拒绝）。"""
+    for item in header.lower().split(","):
+        coding, _, params = item.partition(";")
+        if coding.strip() not in ("gzip", "*"):
+            continue
+        try:
+            return float(params.strip().removeprefix("q=") or 1) > 0
+        except ValueError:
+            return False
+    return False
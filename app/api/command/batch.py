@@ -6,13 +6,14 @@
 import json
 import logging
 
-from datetime import datetime, timezone
 from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.api.schemas.batch import BatchRequest, BatchOperationAction
+from app.services.resource_body import invalidate_resource
 from .model_map import MODEL_MAP
+from .version_check import bump_version
 import app.api.command as _cmd_pkg
 
 logger = logging.getLogger(__name__)
@@ -23,7 +24,7 @@ router = APIRouter()
 @router.post("/batch")
 async def process_batch(req: BatchRequest, db: AsyncSession = Depends(get_db)):
     """顺序执行一组资源操作并返回结果。"""
-    res = []
+    res, touched = [], []
     try:
         for op in req.operations:
             model = MODEL_MAP.get(op.resource_type)
@@ -38,20 +39,22 @@ async def process_batch(req: BatchRequest, db: AsyncSession = Depends(get_db)):
             elif op.action in [BatchOperationAction.write, BatchOperationAction.create]:
                 rc = record or model(name=op.name)
                 rc.content = json.dumps(op.payload or {})
-                rc.version = (getattr(rc, "version", None) or 0) + 1
-                rc.updated_at = datetime.now(timezone.utc)
+                bump_version(rc)
                 db.add(rc)
             elif op.action == BatchOperationAction.update and record:
                 cur = json.loads(record.content) if record.content else {}
                 record.content = json.dumps(
                     _cmd_pkg.dict_deep_merge(cur, op.payload or {})
                 )
-                record.version = (record.version or 0) + 1
-                record.updated_at = datetime.now(timezone.utc)
+                bump_version(record)
             res.append({"action": op.action, "name": op.name, "status": "success"})
+            touched.append((model, op.name))
         await db.commit()
-        return {"status": "success", "results": res}
     except Exception as exc:
         await db.rollback()
         logger.exception("批量操作异常: %s", exc)
         return {"status": "error", "message": "内部错误，请联系管理员"}
+    # 提交成功后再失效缓存，失效失败不回报为写入错误
+    for model, name in touched:
+        await invalidate_resource(model, name)
+    return {"status": "success", "results": res}
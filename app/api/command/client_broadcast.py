@@ -0,0 +1,57 @@
+"""租户级指令广播。
+
+按 NewAPI.md: POST /broadcast
+指令只构建一次并扇出至全部在线客户端或指定 UID 列表。
+"""
+
+from collections import Counter
+from fastapi import APIRouter, HTTPException, Request
+from app.core.tenant.context import get_tenant_id
+from app.api.schemas.broadcast import (
+    BroadcastCommand,
+    BroadcastRequest,
+    BroadcastResponse,
+)
+from app.grpc.api.Protobuf.Server import ClientCommandDeliverScRsp_pb2
+from app.grpc.api.Protobuf.Command import SendNotification_pb2
+from app.grpc.api.Protobuf.Enum import Retcode_pb2, CommandTypes_pb2
+
+router = APIRouter()
+
+_SIMPLE = {
+    BroadcastCommand.restart: CommandTypes_pb2.RestartApp,
+    BroadcastCommand.update_data: CommandTypes_pb2.DataUpdated,
+}
+
+
+def _build_command(req: BroadcastRequest):
+    """根据请求构建（仅一次）待广播的指令消息。"""
+    if req.command in _SIMPLE:
+        return ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            RetCode=Retcode_pb2.Success, Type=_SIMPLE[req.command]
+        )
+    if req.notification is None:
+        raise HTTPException(status_code=400, detail="缺少通知内容")
+    notify = SendNotification_pb2.SendNotification(**req.notification.model_dump())
+    return ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        RetCode=Retcode_pb2.Success,
+        Type=CommandTypes_pb2.SendNotification,
+        Payload=notify.SerializeToString(),
+    )
+
+
+@router.post("/broadcast", response_model=BroadcastResponse)
+async def broadcast_command(req: BroadcastRequest, request: Request):
+    """向租户内在线客户端广播指令，返回逐客户端投递结果。"""
+    servicer = getattr(request.app.state, "command_servicer", None)
+    if not servicer:
+        raise HTTPException(status_code=503, detail="gRPC 服务不可用")
+    results = await servicer.send_command_many(
+        get_tenant_id(), _build_command(req), req.uids
+    )
+    return BroadcastResponse(
+        status="success",
+        total=len(results),
+        summary=dict(Counter(results.values())),
+        results=results,
+    )
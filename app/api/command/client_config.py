@@ -9,6 +9,7 @@ from app.core.tenant.context import get_tenant_id
 from app.grpc.api.Protobuf.Server import ClientCommandDeliverScRsp_pb2
 from app.grpc.api.Protobuf.Command import GetClientConfig_pb2
 from app.grpc.api.Protobuf.Enum import Retcode_pb2, CommandTypes_pb2
+from app.grpc.server.delivery import QUEUE_FULL
 
 router = APIRouter()
 
@@ -31,7 +32,8 @@ async def fetch_runtime_config(client_id: str, config_type: int, request: Reques
         Payload=config_req.SerializeToString(),
     )
 
-    await servicer.send_command(get_tenant_id(), client_id, cmd)
+    if await servicer.send_command(get_tenant_id(), client_id, cmd) == QUEUE_FULL:
+        return {"status": "error", "message": "客户端指令队列已满"}
     return {
         "status": "success",
         "message": f"请求已下发，ID: {req_id}",
@@ -9,6 +9,7 @@ from app.core.tenant.context import get_tenant_id
 from app.api.schemas.base import StatusResponse
 from app.grpc.api.Protobuf.Server import ClientCommandDeliverScRsp_pb2
 from app.grpc.api.Protobuf.Enum import Retcode_pb2, CommandTypes_pb2
+from app.grpc.server.delivery import NOT_FOUND, QUEUE_FULL
 
 router = APIRouter()
 
@@ -22,7 +23,11 @@ async def _push_cmd(request: Request, uid: str, cmd_type: int) -> StatusResponse
     cmd = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
         RetCode=Retcode_pb2.Success, Type=cmd_type
     )
-    await servicer.send_command(get_tenant_id(), uid, cmd)
+    status = await servicer.send_command(get_tenant_id(), uid, cmd)
+    if status == QUEUE_FULL:
+        return StatusResponse(status="error", message="客户端指令队列已满")
+    if status == NOT_FOUND:
+        return StatusResponse(status="error", message="客户端不存在")
     return StatusResponse(status="success", message="指令已下发")
 
 
@@ -10,6 +10,7 @@ from app.api.schemas.notification import NotificationPayload
 from app.grpc.api.Protobuf.Server import ClientCommandDeliverScRsp_pb2
 from app.grpc.api.Protobuf.Command import SendNotification_pb2
 from app.grpc.api.Protobuf.Enum import Retcode_pb2, CommandTypes_pb2
+from app.grpc.server.delivery import NOT_FOUND, QUEUE_FULL
 
 router = APIRouter()
 
@@ -31,5 +32,9 @@ async def push_notify(
         Payload=notify.SerializeToString(),
     )
 
-    await servicer.send_command(get_tenant_id(), client_id, cmd)
+    status = await servicer.send_command(get_tenant_id(), client_id, cmd)
+    if status == QUEUE_FULL:
+        return StatusResponse(status="error", message="客户端指令队列已满")
+    if status == NOT_FOUND:
+        return StatusResponse(status="error", message="客户端不存在")
     return StatusResponse(status="success", message="通知已递送")
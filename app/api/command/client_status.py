@@ -1,16 +1,19 @@
 """客户端在线状态监控。
 
 提供终端的在线/离线状态查询和详细记录查看。
-按 NewAPI.md: GET /list, GET /search, GET /{client_id}, GET /{client_id}/status,
+按 NewAPI.md: GET /list, GET /list/paged, GET /search, GET /{client_id},
+GET /{client_id}/status,
 DELETE /{client_id}, POST /{client_id}/rename, POST /{client_id}/disconnect,
 POST /{client_id}/disable, POST /{client_id}/enable, POST /{client_id}/config
 """
 
-from fastapi import APIRouter, Depends, Request, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db, ClientRecord
 from app.core.tenant.context import get_tenant_id
+from app.api.schemas.client_list import ClientPage, ClientSummary
 
 router = APIRouter()
 
@@ -21,6 +24,40 @@ async def list_clients(db: AsyncSession = Depends(get_db)):
     return (await db.execute(select(ClientRecord.uid))).scalars().all()
 
 
+@router.get("/list/paged", response_model=ClientPage)
+async def list_clients_paged(
+    request: Request,
+    after: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+):
+    """按 UID 键集分页列出客户端，整页在线状态一次批量查询。"""
+    stmt = select(ClientRecord).order_by(ClientRecord.uid).limit(limit + 1)
+    if after:
+        stmt = stmt.where(ClientRecord.uid > after)
+    rows = (await db.execute(stmt)).scalars().all()
+    page = rows[:limit]
+    sm = getattr(request.app.state, "session_manager", None)
+    presence = (
+        await sm.get_clients_presence(get_tenant_id(), [r.uid for r in page])
+        if sm
+        else {}
+    )
+    items = [
+        ClientSummary(
+            uid=r.uid,
+            name=r.client_id,
+            mac=r.mac,
+            status="offline" if presence.get(r.uid) is None else "online",
+            ip=presence.get(r.uid) or "",
+            registered_at=r.registered_at.isoformat() if r.registered_at else None,
+        )
+        for r in page
+    ]
+    next_cursor = page[-1].uid if len(rows) > limit else None
+    return ClientPage(items=items, next_cursor=next_cursor)
+
+
 @router.get("/search")
 async def search_clients(q: str = "", db: AsyncSession = Depends(get_db)):
     """搜索客户端。"""
@@ -75,11 +112,19 @@ async def rename_client(client_id: str, db: AsyncSession = Depends(get_db)):
 
 @router.get("/{client_id}/status")
 async def get_client_status(client_id: str, request: Request):
-    """获取客户端在线状态。"""
+    """获取客户端在线状态，附带本节点指令队列与心跳批量写入统计。"""
     tid = get_tenant_id()
     sm = getattr(request.app.state, "session_manager", None)
     online = await sm.is_client_online(tid, client_id) if sm else False
-    return {"client_id": client_id, "online": online}
+    servicer = getattr(request.app.state, "command_servicer", None)
+    queue = servicer.queue_stats(tid, client_id) if servicer else None
+    heartbeats = sm.heartbeats.stats() if sm else None
+    return {
+        "client_id": client_id,
+        "online": online,
+        "queue": queue,
+        "heartbeats": heartbeats,
+    }
 
 
 @router.post("/{client_id}/disconnect")
@@ -0,0 +1,24 @@
+"""客户端在线率统计。
+
+按 NewAPI.md: POST /uptime
+基于心跳写入的每分钟在线位图，批量统计多个客户端的在线率与在线区间。
+"""
+
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter
+from app.core.tenant.context import get_tenant_id
+from app.api.schemas.uptime import UptimeRequest, UptimeResponse
+from app.grpc.session.uptime import get_uptime
+
+router = APIRouter()
+
+
+@router.post("/uptime", response_model=UptimeResponse)
+async def client_uptime(req: UptimeRequest):
+    """统计指定客户端在日期区间内的在线率，可选返回逐日在线区间。"""
+    today = datetime.now(timezone.utc).date()
+    start = req.start or today - timedelta(days=req.days - 1)
+    clients = await get_uptime(
+        get_tenant_id(), list(dict.fromkeys(req.uids)), start, req.days, req.timeline
+    )
+    return UptimeResponse(start=start, days=req.days, clients=clients)
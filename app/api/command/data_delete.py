@@ -8,6 +8,7 @@ from sqlalchemy import select, delete as sql_delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.api.schemas.base import StatusResponse
+from app.services.resource_body import invalidate_resource
 from .model_map import MODEL_MAP
 
 router = APIRouter()
@@ -27,4 +28,5 @@ async def delete_data(
         return StatusResponse(status="error", message=f"未找到 {name}")
     await db.execute(sql_delete(model).where(model.name == name))
     await db.commit()
+    await invalidate_resource(model, name)
     return StatusResponse(status="success", message=f"已删除 {name}")
@@ -4,16 +4,16 @@ PATCH 增量更新接口，含版本校验和负载校验。
 """
 
 import json
-from datetime import datetime, timezone
 from typing import Optional
 from fastapi import APIRouter, Body, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.api.schemas.base import StatusResponse
+from app.services.resource_body import invalidate_resource
 from .model_map import MODEL_MAP
 from .payload_validator import validate_payload
-from .version_check import check_version
+from .version_check import bump_version, check_version
 
 router = APIRouter()
 
@@ -52,7 +52,7 @@ async def patch_data(
     except (json.JSONDecodeError, TypeError):
         current = {}
     record.content = json.dumps(dict_deep_merge(current, payload))
-    record.version = (record.version or 0) + 1
-    record.updated_at = datetime.now(timezone.utc)
+    bump_version(record)
     await db.commit()
+    await invalidate_resource(model, name)
     return StatusResponse(status="success", message="合并成功")
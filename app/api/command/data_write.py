@@ -4,16 +4,16 @@
 """
 
 import json
-from datetime import datetime, timezone
 from typing import Optional
 from fastapi import APIRouter, Body, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.database import get_db
 from app.api.schemas.base import StatusResponse
+from app.services.resource_body import invalidate_resource
 from .model_map import MODEL_MAP
 from .payload_validator import validate_payload
-from .version_check import check_version
+from .version_check import bump_version, check_version
 
 router = APIRouter()
 
@@ -40,8 +40,8 @@ async def write_data_endpoint(
     else:
         record = model(name=name)
     record.content = json.dumps(payload)
-    record.version = (record.version or 0) + 1
-    record.updated_at = datetime.now(timezone.utc)
+    bump_version(record)
     db.add(record)
     await db.commit()
+    await invalidate_resource(model, name)
     return StatusResponse(status="success", message=f"{name} 已写入")
@@ -15,6 +15,8 @@ from .client_status import router as status_r
 from .client_control import router as control_r
 from .client_notification import router as notify_r
 from .client_config import router as config_r
+from .client_broadcast import router as broadcast_r
+from .client_uptime import router as uptime_r
 from .batch import router as batch_r
 
 router = APIRouter()
@@ -32,3 +34,5 @@ router.include_router(status_r)
 router.include_router(control_r)
 router.include_router(notify_r)
 router.include_router(config_r)
+router.include_router(broadcast_r)
+router.include_router(uptime_r)
@@ -1,8 +1,9 @@
 """版本冲突检测工具。
 
-在并发写入场景下对资源版本号进行乐观锁校验。
+在并发写入场景下对资源版本号进行乐观锁校验，并统一推进资源版本。
 """
 
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 from typing import Optional
 
@@ -24,3 +25,17 @@ def check_version(record, client_version: Optional[int]) -> None:
             status_code=409,
             detail=f"版本冲突：服务端={record.version}, 客户端={client_version}",
         )
+
+
+def bump_version(record) -> None:
+    """递增资源版本号并刷新更新时间。
+
+    更新时间按秒严格递增（同一秒内的多次写入顺延一秒），
+    客户端清单以其作为只增不减的版本水位（见 manifest）。
+    """
+    now = datetime.now(timezone.utc)
+    prev = getattr(record, "updated_at", None)
+    if prev is not None and int(now.timestamp()) <= int(prev.timestamp()):
+        now = prev.replace(microsecond=0) + timedelta(seconds=1)
+    record.version = (getattr(record, "version", None) or 0) + 1
+    record.updated_at = now
@@ -4,9 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth.account_access_cache import invalidate_membership
 from app.core.auth.dependencies import get_current_user_id
 from app.models.account_member import AccountMember
 from app.models.session import get_db
+from app.services.permission.cache import bump_permission_version
 
 router = APIRouter()
 
@@ -31,3 +33,5 @@ async def delete_access(
         raise HTTPException(404, "成员记录不存在")
     await db.delete(m)
     await db.commit()
+    await invalidate_membership(m.user_id, account_id)
+    await bump_permission_version(account_id)
@@ -0,0 +1,35 @@
+"""访问控制 — 批量权限说明。
+
+控制台一次性获取多个成员对多项权限的判定结果及来源，复用有效权限缓存。
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.schemas.access import PermissionExplainOut, PermissionExplainRequest
+from app.core.auth.dependencies import get_current_user_id
+from app.services.permission.cache import get_many_effective_permissions
+
+router = APIRouter()
+
+
+@router.post("/explain", response_model=list[PermissionExplainOut])
+async def explain_access(
+    account_id: str,
+    body: PermissionExplainRequest,
+    uid: str = Depends(get_current_user_id),
+):
+    """说明指定用户（默认当前用户）在账户内的权限判定。"""
+    user_ids = body.user_ids or [uid]
+    effective = await get_many_effective_permissions([uid, *user_ids], account_id)
+    if effective[uid].role is None:
+        raise HTTPException(403, "非账户成员")
+    if any(u != uid for u in user_ids) and not effective[uid].has("member.manage"):
+        raise HTTPException(403, "缺少权限: member.manage")
+    return [
+        PermissionExplainOut(
+            user_id=u,
+            role_in_account=effective[u].role,
+            permissions=[effective[u].explain(c) for c in body.codes],
+        )
+        for u in dict.fromkeys(user_ids)
+    ]
@@ -5,9 +5,11 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas.access import AccessMemberOut, AccessRoleUpdate
+from app.core.auth.account_access_cache import invalidate_membership
 from app.core.auth.dependencies import get_current_user_id
 from app.models.account_member import AccountMember
 from app.models.session import get_db
+from app.services.permission.cache import bump_permission_version
 from .account_access import _member_out
 
 router = APIRouter()
@@ -34,5 +36,7 @@ async def update_access(
         raise HTTPException(404, "成员记录不存在")
     m.role_in_account = body.role_in_account
     await db.commit()
+    await invalidate_membership(m.user_id, account_id)
+    await bump_permission_version(account_id)
     await db.refresh(m)
     return _member_out(m)
@@ -10,6 +10,8 @@ from app.api.command.client_status import router as status_r
 from app.api.command.client_control import router as control_r
 from app.api.command.client_notification import router as notify_r
 from app.api.command.client_config import router as config_r
+from app.api.command.client_broadcast import router as broadcast_r
+from app.api.command.client_uptime import router as uptime_r
 
 router = APIRouter()
 
@@ -18,3 +20,5 @@ router.include_router(status_r)
 router.include_router(control_r)
 router.include_router(notify_r)
 router.include_router(config_r)
+router.include_router(broadcast_r)
+router.include_router(uptime_r)
@@ -8,6 +8,9 @@ from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth.dependencies import get_current_user_id
+from app.core.auth.account_access_cache import invalidate_account_status
+from app.core.tenant.local_cache import invalidate_account
+from app.services.permission.cache import bump_permission_version
 from app.models.account import Account
 from app.models.account_member import AccountMember
 from app.models.pre_registered_client import PreRegisteredClient
@@ -48,4 +51,7 @@ async def delete_account(
         delete(PreRegisteredClient).where(PreRegisteredClient.account_id == account_id)
     )
     await db.commit()
+    await invalidate_account(acct.slug)
+    await invalidate_account_status(account_id)
+    await bump_permission_version(account_id)
     return {"message": "账户已停用，关联数据已清理"}
@@ -20,6 +20,7 @@ from .account_pre_reg_preset import router as prereg_p_r
 from .account_pre_reg_create import router as prereg_c_r
 from .account_access import router as access_r
 from .account_access_search import router as access_s_r
+from .account_access_explain import router as access_e_r
 from .account_access_update import router as access_u_r
 from .account_access_delete import router as access_d_r
 from .account_invitation import router as inv_r
@@ -64,6 +65,7 @@ router.include_router(prereg_c_r, prefix=_pre, tags=["PreReg"])
 _acc = f"{_acct}/access"
 router.include_router(access_r, prefix=_acc, tags=["Access"])
 router.include_router(access_s_r, prefix=_acc, tags=["Access"])
+router.include_router(access_e_r, prefix=_acc, tags=["Access"])
 router.include_router(access_u_r, prefix=_acc, tags=["Access"])
 router.include_router(access_d_r, prefix=_acc, tags=["Access"])
 
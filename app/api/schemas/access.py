@@ -19,3 +19,31 @@ class AccessRoleUpdate(BaseModel):
     role_in_account: str = Field(
         ..., max_length=32, description="owner / admin / member / viewer"
     )
+
+
+class PermissionExplainRequest(BaseModel):
+    """批量权限说明请求。"""
+
+    codes: list[str] = Field(..., min_length=1, max_length=200)
+    user_ids: list[str] = Field(
+        default_factory=list, max_length=200, description="留空时说明当前用户"
+    )
+
+
+class PermissionExplainItem(BaseModel):
+    """单项权限判定结果。"""
+
+    code: str
+    granted: bool
+    source: str = Field(
+        ...,
+        description="owner / role / override_grant / override_deny / none / not_member",
+    )
+
+
+class PermissionExplainOut(BaseModel):
+    """单个用户的权限说明。"""
+
+    user_id: str
+    role_in_account: str | None
+    permissions: list[PermissionExplainItem]
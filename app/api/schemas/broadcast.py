@@ -0,0 +1,35 @@
+"""广播指令请求与响应定义。
+
+一次请求向租户内全部在线客户端（或指定 UID 列表）下发同一指令。
+"""
+
+from enum import Enum
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from .notification import NotificationPayload
+
+
+class BroadcastCommand(str, Enum):
+    """可广播的指令类型（与单播指令路径名保持一致）。"""
+
+    restart = "restart"
+    update_data = "update-data"
+    send_notification = "send-notification"
+
+
+class BroadcastRequest(BaseModel):
+    """广播请求体；uids 省略时广播至租户全部在线客户端。"""
+
+    command: BroadcastCommand
+    uids: Optional[List[str]] = Field(default=None, max_length=10000)
+    notification: Optional[NotificationPayload] = None
+
+
+class BroadcastResponse(BaseModel):
+    """广播结果：汇总计数与逐客户端投递状态。"""
+
+    status: str
+    total: int
+    summary: Dict[str, int]
+    results: Dict[str, str]
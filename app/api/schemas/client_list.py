@@ -0,0 +1,25 @@
+"""客户端分页列表响应定义。
+
+注册信息与在线状态合并返回，控制台一次请求即可渲染整页。
+"""
+
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class ClientSummary(BaseModel):
+    """列表中的单个客户端：注册详情与在线状态。"""
+
+    uid: str
+    name: str
+    mac: str
+    status: str
+    ip: str = ""
+    registered_at: Optional[str] = None
+
+
+class ClientPage(BaseModel):
+    """按 UID 键集分页的一页客户端，next_cursor 为空表示已到末页。"""
+
+    items: List[ClientSummary]
+    next_cursor: Optional[str] = None
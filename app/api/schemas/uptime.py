@@ -0,0 +1,42 @@
+"""在线率统计请求与响应定义。
+
+一次请求统计多个客户端在连续若干天（UTC）内的在线率与在线区间。
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class UptimeRequest(BaseModel):
+    """在线率查询；start 省略时统计截至今天的最近 days 天。"""
+
+    uids: List[str] = Field(min_length=1, max_length=1000)
+    start: Optional[date] = None
+    days: int = Field(default=7, ge=1, le=31)
+    timeline: bool = False
+
+
+class UptimeDay(BaseModel):
+    """单日在线统计；timeline 为 [起始分钟, 结束分钟) 区间列表。"""
+
+    date: str
+    online_minutes: int
+    uptime: float
+    timeline: Optional[List[List[int]]] = None
+
+
+class ClientUptime(BaseModel):
+    """单个客户端在统计区间内的在线汇总。"""
+
+    online_minutes: int
+    uptime: float
+    daily: List[UptimeDay]
+
+
+class UptimeResponse(BaseModel):
+    """在线率统计结果。"""
+
+    start: date
+    days: int
+    clients: Dict[str, ClientUptime]
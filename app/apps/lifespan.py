@@ -16,7 +16,9 @@ from app.core.config import (
     GRPC_PORT,
 )
 from app.core.redis.pool import init_redis
+from app.core.redis.invalidation import invalidation_bus
 from app.models.database import init_db
+from app.core.tenant.local_cache import warm_account_cache
 from app.grpc.server.bootstrap import serve_grpc
 from app.core.logging import get_port_logger, PORT_TAG_GRPC
 from app.apps.lifespan_shutdown import _shutdown
@@ -40,6 +42,8 @@ async def _startup(app: FastAPI):
     await init_db()
     logger.info("正在初始化 Redis 连接池...")
     await init_redis()
+    await invalidation_bus.start()
+    logger.info("已预热账户缓存: %d 个", await warm_account_cache())
     grpc_logger.info("正在启动 gRPC (%d)...", GRPC_PORT)
     grpc_s, cmd_s, sess_m = await serve_grpc()
     app.state.grpc_server = grpc_s
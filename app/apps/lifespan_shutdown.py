@@ -3,6 +3,7 @@
 import logging
 
 from app.core.redis.pool import close_redis
+from app.core.redis.invalidation import invalidation_bus
 from app.core.logging import get_port_logger, PORT_TAG_GRPC
 
 logger = logging.getLogger(__name__)
@@ -10,13 +11,20 @@ grpc_logger = get_port_logger(PORT_TAG_GRPC)
 
 
 async def _shutdown(app):
-    """优雅停机：停止 gRPC 和 Redis。"""
+    """优雅停机：停止 gRPC、指令总线、心跳写入器、解密进程池、缓存失效订阅和 Redis。"""
     logger.info("正在执行优雅停机...")
     grpc_s = getattr(app.state, "grpc_server", None)
     if grpc_s:
         grpc_logger.info("正在停止 gRPC 服务器...")
         await grpc_s.stop(grace=5)
         grpc_logger.info("gRPC 服务器已停止")
+    cmd_s = getattr(app.state, "command_servicer", None)
+    if cmd_s and cmd_s.bus:
+        await cmd_s.bus.stop()
+    sm = getattr(app.state, "session_manager", None)
+    if sm:
+        await sm.close()
+    await invalidation_bus.stop()
     logger.info("正在关闭 Redis 连接池...")
     await close_redis()
     logger.info("系统停机完成")
@@ -0,0 +1,22 @@
+"""纯 ASGI 中间件公共工具。
+
+中间件直接实现 ASGI 接口，不经 BaseHTTPMiddleware 的任务与内存流转发，
+流式响应与 ContextVar 均原样传递给下游。
+"""
+
+from starlette.types import Message, Send
+
+
+class StatusRecorder:
+    """包装 send，记录响应状态码。"""
+
+    __slots__ = ("_send", "status")
+
+    def __init__(self, send: Send):
+        self._send = send
+        self.status = 500
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        await self._send(message)
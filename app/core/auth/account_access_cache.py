@@ -0,0 +1,85 @@
+"""账户上下文与成员资格的短时缓存。
+
+AccountContextMiddleware 每个请求都需确认账户状态与用户成员资格，
+控制台一次页面加载会并发十余个请求。结果按账户 ID 与
+(user_id, account_id) 在进程内短时缓存，未命中时在同一数据库会话内补齐；
+成员增删、角色变更与账户停用时经 Pub/Sub 广播失效。
+"""
+
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.core.lru_cache import LRUCache
+from app.core.redis.invalidation import invalidation_bus
+from app.models.engine import AsyncSessionLocal
+
+# 缓存有效期（秒），变更依赖广播失效，有效期仅作兜底
+ACCESS_CACHE_TTL = 30
+ACCESS_CACHE_SIZE = 50000
+# 失效广播主题：账户（键为 account_id）与成员资格（键为 user_id:account_id）
+ACCOUNT_STATUS_TOPIC = "account_status"
+MEMBERSHIP_TOPIC = "membership"
+
+# account_id → (slug, is_active)，账户不存在记为空元组
+_accounts = LRUCache(ACCESS_CACHE_SIZE, ACCESS_CACHE_TTL)
+# (user_id, account_id) → 账户内角色，非成员记为空字符串
+_members = LRUCache(ACCESS_CACHE_SIZE, ACCESS_CACHE_TTL)
+
+
+def _discard_member(key: str) -> None:
+    """丢弃成员资格条目（失效广播处理函数）。"""
+    user_id, _, account_id = key.partition(":")
+    _members.discard((user_id, account_id))
+
+
+invalidation_bus.subscribe(ACCOUNT_STATUS_TOPIC, _accounts.discard, _accounts.clear)
+invalidation_bus.subscribe(MEMBERSHIP_TOPIC, _discard_member, _members.clear)
+
+
+async def resolve_account_access(
+    account_id: str, user_id: Optional[str] = None
+) -> tuple[Optional[tuple[str, bool]], Optional[str]]:
+    """查询账户状态与用户在该账户内的角色（至多打开一个数据库会话）。
+
+    Returns:
+        ((slug, is_active) 或 None, 角色或 None)；未传入 user_id 时角色为 None。
+    """
+    account = _accounts.get(account_id)
+    role = _members.get((user_id, account_id)) if user_id else None
+    if account is None or (user_id and role is None):
+        from app.models.account import Account
+        from app.models.account_member import AccountMember
+
+        async with AsyncSessionLocal() as db:
+            if account is None:
+                row = (
+                    await db.execute(
+                        select(Account.slug, Account.is_active).where(
+                            Account.id == account_id
+                        )
+                    )
+                ).one_or_none()
+                account = tuple(row) if row else ()
+                _accounts.put(account_id, account)
+            if user_id and role is None:
+                role = (
+                    await db.execute(
+                        select(AccountMember.role_in_account).where(
+                            AccountMember.user_id == user_id,
+                            AccountMember.account_id == account_id,
+                        )
+                    )
+                ).scalar_one_or_none() or ""
+                _members.put((user_id, account_id), role)
+    return account or None, role or None
+
+
+async def invalidate_account_status(account_id: str) -> None:
+    """账户停用等状态变更后通知所有节点。"""
+    await invalidation_bus.publish(ACCOUNT_STATUS_TOPIC, account_id)
+
+
+async def invalidate_membership(user_id: str, account_id: str) -> None:
+    """成员增删或角色变更后通知所有节点。"""
+    await invalidation_bus.publish(MEMBERSHIP_TOPIC, f"{user_id}:{account_id}")
@@ -7,12 +7,9 @@
 
 import logging
 
-from fastapi import Request, Response
-from starlette.middleware.base import (
-    BaseHTTPMiddleware,
-    RequestResponseEndpoint,
-)
+from starlette.requests import Request
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.core.config import REDIS_DB_AUTH
 from app.core.redis.accessor import get_redis
@@ -37,23 +34,27 @@ _BAD_AUTH = JSONResponse(
 )
 
 
-class AdminAuthMiddleware(BaseHTTPMiddleware):
-    """管理端会话令牌认证拦截器。"""
+class AdminAuthMiddleware:
+    """管理端会话令牌认证拦截器（纯 ASGI）。"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """验证 Bearer Token 并注入用户身份。"""
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
         # 放行 CORS 预检请求
-        if request.method == "OPTIONS":
-            return await call_next(request)
-        path = request.url.path
+        if scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        path = scope["path"]
         if path in _EXEMPT or path.startswith(_EXEMPT_PREFIXES):
-            return await call_next(request)
+            return await self.app(scope, receive, send)
+        request = Request(scope)
         # 提取 Bearer Token
         auth = request.headers.get("authorization", "")
         if not auth.startswith("Bearer "):
-            return _NO_AUTH
+            return await _NO_AUTH(scope, receive, send)
         token = auth[7:]
         # 尝试新式会话令牌
         from app.core.auth.dependencies import (
@@ -63,15 +64,15 @@ class AdminAuthMiddleware(BaseHTTPMiddleware):
         user_id = await resolve_user_from_token(token)
         if user_id:
             request.state.current_user_id = user_id
-            return await call_next(request)
+            return await self.app(scope, receive, send)
         # 回退：旧式 command 域令牌（/account/{id}/... 路径）
         if path.startswith("/account/"):
             ok = await _check_legacy_token(token, path)
             if ok:
-                return await call_next(request)
+                return await self.app(scope, receive, send)
         client_ip = get_client_ip_from_request(request)
         logger.warning("认证失败：ip=%s path=%s", client_ip, path)
-        return _BAD_AUTH
+        await _BAD_AUTH(scope, receive, send)
 
 
 async def _check_legacy_token(token: str, path: str = "") -> bool:
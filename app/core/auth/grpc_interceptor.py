@@ -1,16 +1,25 @@
 """gRPC 租户识别与会话鉴权拦截器。
 
 从 metadata 中解析租户和 session 令牌，并设置 Schema 上下文。
+解析出的会话写入 session_ctx，Servicer 在同一 RPC 内无需再次查询。
+来源 IP 仅在 RPC 上下文中可得，封禁、CC 与准入限流判定在包装后的
+处理方法入口进行；封禁与 CC 状态与 HTTP 端口共享，调用频率由准入令牌桶
+限制，不计入 HTTP 的全局 CC 速率。
 """
 
 import grpc
 import functools
+import inspect
 import logging
+import math
+from app.core.client_ip import get_client_ip_from_grpc
 from app.core.tenant.context import tenant_ctx, schema_ctx
 from app.core.tenant.resolver import resolve_account
 from app.core.tenant.host_parser import extract_slug_from_host
-from app.models.database import AsyncSessionLocal
+from app.core.security.grpc_admission import GrpcAdmission
+from app.core.security.limiter import is_banned, record_failure
 from app.core.security.state import get_cc_state
+from app.grpc.session.context import session_ctx
 
 logger = logging.getLogger(__name__)
 
@@ -21,21 +30,16 @@ _AUTH_EXEMPT = {"Register", "BeginHandshake", "CompleteHandshake"}
 class TenantInterceptor(grpc.aio.ServerInterceptor):
     """Server-side gRPC 租户解析与令牌校验。"""
 
-    def __init__(self, session_manager=None):
-        """初始化拦截器，注入会话管理器。"""
+    def __init__(self, session_manager=None, admission=None):
+        """初始化拦截器，注入会话管理器与准入控制。"""
         self._sm = session_manager
+        self._admission = admission or GrpcAdmission()
 
     async def intercept_service(self, continuation, handler_call_details):
         """提取 tenant-id 并对非白名单方法校验 session。"""
         method = handler_call_details.method or ""
         short_name = method.rsplit("/", 1)[-1]
 
-        # 遭遇 CC 时阻止全新链路建立
-        if get_cc_state() and short_name in _AUTH_EXEMPT:
-            raise grpc.aio.AbortError(
-                grpc.StatusCode.UNAVAILABLE, "网络拥堵防御已开启，拒绝新人"
-            )
-
         metadata = dict(handler_call_details.invocation_metadata)
         authority = (
             metadata.get("x-forwarded-host")
@@ -53,8 +57,7 @@ class TenantInterceptor(grpc.aio.ServerInterceptor):
 
         tenant_id = None
         if slug:
-            async with AsyncSessionLocal() as db:
-                account = await resolve_account(slug, db)
+            account = await resolve_account(slug)
             if account:
                 tenant_id = account.id
 
@@ -65,37 +68,93 @@ class TenantInterceptor(grpc.aio.ServerInterceptor):
         if sid.startswith("Bearer "):
             sid = sid[7:]
 
+        session, unauthenticated = None, False
         if short_name not in _AUTH_EXEMPT and self._sm:
-            if not sid or not await self._sm.validate_session(sid):
-                raise grpc.aio.AbortError(
-                    grpc.StatusCode.UNAUTHENTICATED, "session 无效或缺失"
-                )
+            session = await self._sm.get_session(sid)
+            unauthenticated = not session.get("cuid")
 
             # 如果元数据没带租户，尝试从 session 中恢复
-            if not tenant_id and sid:
-                tenant_id = await self._sm.get_session_tenant(sid)
+            if not tenant_id and not unauthenticated:
+                tenant_id = session.get("tenant_id")
 
         handler = await continuation(handler_call_details)
         if handler is None:
             return None
 
+        async def admit(context):
+            """准入检查：封禁 IP、CC 期间的新链路、无效会话与超出限额的调用均中止 RPC。"""
+            ip = get_client_ip_from_grpc(context) or "unknown"
+            if await is_banned(ip):
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "异常封禁")
+            # 遭遇 CC 时阻止全新链路建立
+            if get_cc_state() and short_name in _AUTH_EXEMPT:
+                await context.abort(
+                    grpc.StatusCode.UNAVAILABLE, "网络拥堵防御已开启，拒绝新人"
+                )
+            if unauthenticated:
+                await record_failure(ip)
+                await context.abort(
+                    grpc.StatusCode.UNAUTHENTICATED, "session 无效或缺失"
+                )
+            wait = self._admission.check(
+                short_name, ip, str(tenant_id) if tenant_id else None
+            )
+            if wait:
+                retry_ms = math.ceil(wait * 1000)
+                await context.abort(
+                    grpc.StatusCode.RESOURCE_EXHAUSTED,
+                    f"请求过于频繁，请 {retry_ms}ms 后重试",
+                    trailing_metadata=(
+                        ("grpc-retry-pushback-ms", str(retry_ms)),
+                        ("retry-after", str(math.ceil(wait))),
+                    ),
+                )
+
+        def bind():
+            """设置 ContextVar，返回用于还原的令牌。"""
+            t1, t2 = None, None
+            t3 = session_ctx.set((sid, session)) if session else None
+            if tenant_id:
+                t1 = tenant_ctx.set(tenant_id)
+                # 如果有 slug 则设置 schema，否则可能只能依赖 tenant_id
+                if slug:
+                    t2 = schema_ctx.set(f"tenant_{slug}")
+            return t1, t2, t3
+
+        def unbind(tokens):
+            """还原 ContextVar。"""
+            t1, t2, t3 = tokens
+            if t1:
+                tenant_ctx.reset(t1)
+            if t2:
+                schema_ctx.reset(t2)
+            if t3:
+                session_ctx.reset(t3)
+
         # 包装 Behavior 以确保 ContextVar 在处理方法任务中生效
         def wrapper(behavior):
+            if inspect.isasyncgenfunction(behavior):
+                # 流式响应的处理方法为异步生成器，需逐条转发
+                @functools.wraps(behavior)
+                async def wrapped_stream(request_or_iterator, context):
+                    await admit(context)
+                    tokens = bind()
+                    try:
+                        async for response in behavior(request_or_iterator, context):
+                            yield response
+                    finally:
+                        unbind(tokens)
+
+                return wrapped_stream
+
             @functools.wraps(behavior)
             async def wrapped_behavior(request_or_iterator, context):
-                t1, t2 = None, None
-                if tenant_id:
-                    t1 = tenant_ctx.set(tenant_id)
-                    # 如果有 slug 则设置 schema，否则可能只能依赖 tenant_id
-                    if slug:
-                        t2 = schema_ctx.set(f"tenant_{slug}")
+                await admit(context)
+                tokens = bind()
                 try:
                     return await behavior(request_or_iterator, context)
                 finally:
-                    if t1:
-                        tenant_ctx.reset(t1)
-                    if t2:
-                        schema_ctx.reset(t2)
+                    unbind(tokens)
 
             return wrapped_behavior
 
@@ -4,15 +4,12 @@
 仅用于 Client API（通过 Host 头中的子域名 slug 解析租户）。
 """
 
-from fastapi import Request, Response
-from starlette.middleware.base import (
-    BaseHTTPMiddleware,
-    RequestResponseEndpoint,
-)
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
 from app.core.tenant.host_parser import extract_slug_from_host
 from app.core.tenant.resolver import resolve_account
 from app.core.tenant.context import tenant_ctx, schema_ctx
-from app.models.engine import AsyncSessionLocal
 from starlette.responses import JSONResponse
 from app.core.security.codes import ERR_TENANT_NO_ACCESS, ERR_RESOURCE_LOCKED
 
@@ -20,38 +17,40 @@ from app.core.security.codes import ERR_TENANT_NO_ACCESS, ERR_RESOURCE_LOCKED
 _NO_TENANT = {"/", "/get"}
 
 
-class TenantMiddleware(BaseHTTPMiddleware):
-    """路由器级别的二级域名拦截处理。"""
+class TenantMiddleware:
+    """路由器级别的二级域名拦截处理（纯 ASGI）。"""
 
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """带域名解析和 Schema 路由的拦截逻辑。"""
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
         # 放行 CORS 预检请求，避免 OPTIONS 被拦截导致跨域失败
-        if request.method == "OPTIONS":
-            return await call_next(request)
-        path = request.url.path
-        if path in _NO_TENANT:
-            return await call_next(request)
-        slug = extract_slug_from_host(request.headers.get("host", ""))
+        if scope["method"] == "OPTIONS" or scope["path"] in _NO_TENANT:
+            return await self.app(scope, receive, send)
+        slug = extract_slug_from_host(Headers(scope=scope).get("host", ""))
         if not slug:
-            return JSONResponse(
+            resp = JSONResponse(
                 status_code=403,
                 content={"code": ERR_TENANT_NO_ACCESS, "msg": "未识别出租户"},
             )
-        async with AsyncSessionLocal() as db:
-            account = await resolve_account(slug, db)
+            return await resp(scope, receive, send)
+        account = await resolve_account(slug)
         if not account:
-            return JSONResponse(
+            resp = JSONResponse(
                 status_code=403,
                 content={"code": ERR_RESOURCE_LOCKED, "msg": "服务不可用"},
             )
+            return await resp(scope, receive, send)
         t_tok = tenant_ctx.set(account.id)
         s_tok = schema_ctx.set(f"tenant_{slug}")
         try:
+            request = Request(scope)
             request.state.tenant_id = account.id
             request.state.tenant_slug = slug
-            return await call_next(request)
+            await self.app(scope, receive, send)
         finally:
             schema_ctx.reset(s_tok)
             tenant_ctx.reset(t_tok)
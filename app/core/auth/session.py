@@ -10,13 +10,11 @@ from starlette.responses import JSONResponse
 
 from app.core.tenant.context import tenant_ctx
 from app.core.tenant.resolver import resolve_account
-from app.models.engine import AsyncSessionLocal
 
 
 async def run_in_tenant_context(slug: str, call_next: Callable, request: Any) -> Any:
     """解析账户并在隔离的上下文中执行下一个处理器。"""
-    async with AsyncSessionLocal() as db:
-        account = await resolve_account(slug, db)
+    account = await resolve_account(slug)
     if not account:
         return JSONResponse(
             status_code=404,
@@ -49,6 +49,12 @@ class CIMSSettings(BaseSettings):
     # 超级管理员密钥
     cims_admin_secret: str = "change-me"
 
+    # CC 判定阈值：全集群每分钟 HTTP 请求总数（所有端口与工作进程合计）
+    cims_cc_global_max: int = 2000
+
+    # gRPC 准入限流覆盖（JSON：方法名 → {"ip"/"tenant"/"method": [速率, 突发] 或 null}）
+    cims_grpc_rate_limits: dict = {}
+
 
 _settings = CIMSSettings()
 
@@ -91,6 +97,12 @@ GRPC_PORT: int = _settings.cims_grpc_port
 # GPG 密钥文件路径
 KEY_FILE: str = _settings.cims_key_file
 
+# CC 判定阈值（全集群每分钟请求数）
+CC_GLOBAL_MAX: int = _settings.cims_cc_global_max
+
+# gRPC 准入限流覆盖
+GRPC_RATE_LIMITS: dict = _settings.cims_grpc_rate_limits
+
 
 def validate_config() -> None:
     """在服务启动前校验关键配置，缺失时快速失败。
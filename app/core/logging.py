@@ -17,11 +17,10 @@ import time
 from datetime import datetime, timezone
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
-from typing import Callable
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.asgi import StatusRecorder
 from app.core.client_ip import get_client_ip_from_request
 
 # ---- 常量 ----
@@ -184,8 +183,8 @@ def get_port_logger(tag: str) -> logging.Logger:
     return logger
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """HTTP 请求详细日志中间件。
+class RequestLoggingMiddleware:
+    """HTTP 请求详细日志中间件（纯 ASGI）。
 
     记录每个请求的：
       - 客户端 IP
@@ -197,24 +196,26 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
     为各 FastAPI app 实例分别实例化，传入端口标签以区分日志来源。
     """
 
-    def __init__(self, app, port_tag: str = PORT_TAG_SYSTEM):
+    def __init__(self, app: ASGIApp, port_tag: str = PORT_TAG_SYSTEM):
         """初始化请求日志中间件。
 
         Args:
             app: ASGI 应用实例。
             port_tag: 端口标签字符串。
         """
-        super().__init__(app)
+        self.app = app
         self.port_tag = port_tag
         self.logger = get_port_logger(port_tag)
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """拦截请求，记录详细日志。"""
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
         start = time.perf_counter()
-        client_ip = get_client_ip_from_request(request)
-        method = request.method
-        path = request.url.path
-        query = str(request.url.query) if request.url.query else ""
+        client_ip = get_client_ip_from_request(Request(scope))
+        method = scope["method"]
+        path = scope["path"]
+        query = scope.get("query_string", b"").decode("latin-1")
 
         # 记录请求开始
         self.logger.debug(
@@ -225,8 +226,9 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             f"?{query}" if query else "",
         )
 
+        recorder = StatusRecorder(send)
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, recorder)
         except Exception as exc:
             elapsed = (time.perf_counter() - start) * 1000
             self.logger.error(
@@ -240,7 +242,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             raise
 
         elapsed = (time.perf_counter() - start) * 1000
-        status = response.status_code
+        status = recorder.status
 
         # 根据状态码选择日志级别
         if status >= 500:
@@ -258,5 +260,3 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             path,
             elapsed,
         )
-
-        return response
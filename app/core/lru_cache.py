@@ -0,0 +1,53 @@
+"""进程内 LRU + TTL 缓存。
+
+为会话、租户等热点只读映射提供有界的本地缓存，
+条目超过容量时淘汰最久未使用项，超过有效期时视为未命中。
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """有界 LRU 缓存，条目带固定有效期。"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        """初始化缓存。
+
+        Args:
+            maxsize: 最大条目数。
+            ttl: 条目有效期（秒）。
+        """
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取未过期条目，命中时刷新其 LRU 位置。"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return item[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """写入条目，超出容量时淘汰最久未使用项。"""
+        self._data[key] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        """移除条目（不存在时忽略）。"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存。"""
+        self._data.clear()
@@ -0,0 +1,113 @@
+"""跨进程缓存失效广播。
+
+进程内缓存在源数据变更时经 Redis Pub/Sub 通知所有节点丢弃对应条目。
+频道为 `invalidate:{topic}`，消息体为缓存键；各节点以模式订阅统一接收。
+订阅断线后自动重连，并清空登记了重置函数的缓存（断线期间的失效消息已丢失）。
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Callable, Optional
+
+from app.core.config import REDIS_DB_CACHE
+from .accessor import get_redis
+from .pubsub import listen_forever
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "invalidate:"
+
+
+class InvalidationBus:
+    """按主题分发缓存失效消息。"""
+
+    def __init__(self):
+        self._handlers: dict[str, list[Callable[[str], None]]] = {}
+        self._resets: list[Callable[[], None]] = []
+        self._task = None
+
+    def subscribe(
+        self,
+        topic: str,
+        handler: Callable[[str], None],
+        reset: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """登记主题的失效处理函数（同步，接收缓存键）。
+
+        Args:
+            reset: 订阅断线重连后调用，清空可能错过失效消息的缓存。
+        """
+        self._handlers.setdefault(topic, []).append(handler)
+        if reset is not None:
+            self._resets.append(reset)
+
+    def unsubscribe(
+        self,
+        topic: str,
+        handler: Callable[[str], None],
+        reset: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """注销主题的失效处理函数及其重置函数。"""
+        with suppress(ValueError):
+            self._handlers.get(topic, []).remove(handler)
+        if reset is not None:
+            with suppress(ValueError):
+                self._resets.remove(reset)
+
+    def _dispatch(self, topic: str, key: str) -> None:
+        """在本进程内执行主题的全部处理函数。"""
+        for handler in list(self._handlers.get(topic, ())):
+            try:
+                handler(key)
+            except Exception as e:
+                logger.error("缓存失效处理失败: topic=%s, 错误=%s", topic, e)
+
+    async def publish(self, topic: str, key: str) -> None:
+        """立即失效本进程缓存，并广播至其他节点。"""
+        self._dispatch(topic, key)
+        await get_redis(REDIS_DB_CACHE).publish(f"{_PREFIX}{topic}", key)
+
+    def _reset(self) -> None:
+        """重新订阅后清空全部登记了重置函数的缓存。"""
+        for reset in list(self._resets):
+            try:
+                reset()
+            except Exception as e:
+                logger.error("缓存重置失败: %s", e)
+
+    async def _subscribe(self):
+        """模式订阅全部失效频道，返回 PubSub。"""
+        pubsub = get_redis(REDIS_DB_CACHE).pubsub(ignore_subscribe_messages=True)
+        await pubsub.psubscribe(f"{_PREFIX}*")
+        return pubsub
+
+    async def start(self) -> None:
+        """订阅失效频道并启动后台消费任务（断线后自动重新订阅）。"""
+        if self._task and not self._task.done():
+            return
+        pubsub = await self._subscribe()
+        self._task = asyncio.create_task(
+            listen_forever(
+                self._subscribe,
+                self._handle,
+                "缓存失效订阅",
+                pubsub=pubsub,
+                on_reconnect=self._reset,
+            )
+        )
+
+    async def stop(self) -> None:
+        """停止消费并退订。"""
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def _handle(self, msg: dict) -> None:
+        """分发其他节点广播的失效消息。"""
+        self._dispatch(msg["channel"][len(_PREFIX) :], msg["data"])
+
+
+invalidation_bus = InvalidationBus()
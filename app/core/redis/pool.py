@@ -10,6 +10,7 @@ import logging
 from typing import Optional
 import redis.asyncio as aioredis
 from app.core.config import REDIS_URL
+from .scripts import load_scripts
 
 logger = logging.getLogger(__name__)
 _pools: dict[int, aioredis.Redis] = {}
@@ -40,6 +41,8 @@ async def init_redis(*, dbs: tuple[int, ...] = (0, 1, 2)) -> None:
             )
             await pool.ping()
             _pools[db] = pool
+        if _pools:
+            await load_scripts(next(iter(_pools.values())))
         pkg = sys.modules.get("app.core.redis")
         if pkg and "_pool" in pkg.__dict__:
             pkg.__dict__["_pool"] = _pools.get(0)
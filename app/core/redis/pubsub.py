@@ -0,0 +1,64 @@
+"""Pub/Sub 订阅的断线重连。
+
+redis-py 的 PubSub 在连接中断时由 listen() 抛出异常，订阅随之失效。
+后台消费任务统一经 listen_forever 运行：异常时记录日志、关闭旧连接，
+按指数退避重新订阅，直至任务被取消。
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 重连退避区间（秒）
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = 30.0
+
+
+async def _close(pubsub) -> None:
+    """关闭订阅连接，忽略连接已失效时的错误。"""
+    if pubsub is not None:
+        with suppress(Exception):
+            await pubsub.aclose()
+
+
+async def listen_forever(
+    subscribe: Callable[[], Awaitable],
+    handle: Callable[[dict], None],
+    name: str,
+    pubsub=None,
+    on_reconnect: Optional[Callable[[], None]] = None,
+) -> None:
+    """持续消费订阅消息，连接中断时按指数退避重建订阅。
+
+    Args:
+        subscribe: 创建并完成订阅的异步工厂，返回 PubSub。
+        handle: 消息处理函数（同步，需自行捕获业务异常）。
+        name: 日志中的订阅名称。
+        pubsub: 已完成订阅的首个 PubSub，缺省时由 subscribe 创建。
+        on_reconnect: 重新订阅成功后调用，用于补偿断线期间丢失的消息。
+    """
+    delay, connected_before = RECONNECT_MIN, pubsub is not None
+    try:
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await subscribe()
+                    if connected_before:
+                        logger.info("%s 已重新订阅", name)
+                        if on_reconnect:
+                            on_reconnect()
+                    connected_before, delay = True, RECONNECT_MIN
+                async for msg in pubsub.listen():
+                    handle(msg)
+                raise ConnectionError("订阅连接已关闭")
+            except Exception as e:
+                logger.error("%s 订阅中断，%.1f 秒后重连: %s", name, delay, e)
+            await _close(pubsub)
+            pubsub = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+    finally:
+        await _close(pubsub)
@@ -0,0 +1,290 @@
+"""Redis 原子脚本库。
+
+将多步状态变更（写入后设置过期、读取后递减或删除）封装为 Lua 脚本，
+单次往返完成且不被并发请求穿插。脚本在 init_redis 时预加载（SCRIPT LOAD），
+调用走 EVALSHA；服务端脚本缓存丢失时自动重新加载。
+"""
+
+from typing import Optional
+
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+
+# 写入哈希字段并设置过期：ARGV = [ttl, field1, value1, ...]
+_HSET_EXPIRE = """
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+return redis.call('EXPIRE', KEYS[1], ARGV[1])
+"""
+
+# 读取令牌并扣减一次使用次数，用尽时删除：返回扣减前的全部字段
+_CONSUME_TOKEN = """
+local data = redis.call('HGETALL', KEYS[1])
+if #data == 0 then
+    return data
+end
+if redis.call('HINCRBY', KEYS[1], 'remaining_uses', -1) <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return data
+"""
+
+# 离线信箱追加：KEYS[1] 为信箱，ARGV = [条目, 是否去重, 容量, ttl, 有效期下限]
+# 条目格式为 `{入队时间}:{负载}`；去重时若信箱内已有未过期的相同负载，
+# 仅续期不追加，返回 0（已合并），否则追加并裁剪至容量，返回 1
+_OUTBOX_PUSH = """
+local entry = ARGV[1]
+if ARGV[2] == '1' then
+    local payload = string.sub(entry, string.find(entry, ':', 1, true) + 1)
+    for _, item in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+        local pos = string.find(item, ':', 1, true)
+        if pos and string.sub(item, pos + 1) == payload
+            and tonumber(string.sub(item, 1, pos - 1)) >= tonumber(ARGV[5]) then
+            redis.call('EXPIRE', KEYS[1], ARGV[4])
+            return 0
+        end
+    end
+end
+redis.call('RPUSH', KEYS[1], entry)
+redis.call('LTRIM', KEYS[1], -tonumber(ARGV[3]), -1)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# 比较后删除：KEYS[1] 的值等于 ARGV[1] 时删除，返回删除数
+_COMPARE_DELETE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 在线状态公共部分：KEYS[1] 为流令牌索引（uid → `{令牌}:{清洗后 IP}`），
+# KEYS[2] 为在线 IP 引用计数，KEYS[3] 为在线 IP 集合；
+# release 递减 IP 引用，最后一个使用者离开时移出集合并返回该 IP
+_PRESENCE = """
+local function release(ip)
+    if ip == '' or redis.call('HINCRBY', KEYS[2], ip, -1) > 0 then
+        return ''
+    end
+    redis.call('ZREM', KEYS[3], ip)
+    redis.call('HDEL', KEYS[2], ip)
+    return ip
+end
+"""
+
+# 上线：ARGV = [uid, `{令牌}:{IP}`, IP]，登记新流并接管同一客户端的旧流，
+# 返回旧流释放的 IP（未释放为空串）
+_PRESENCE_CLAIM = _PRESENCE + """
+local old = redis.call('HGET', KEYS[1], ARGV[1])
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+if ARGV[3] ~= '' then
+    redis.call('HINCRBY', KEYS[2], ARGV[3], 1)
+end
+if not old then
+    return ''
+end
+return release(string.sub(old, string.find(old, ':', 1, true) + 1))
+"""
+
+# 离线：KEYS[4..6] = [在线记录, 在线索引, IP 索引]，ARGV = [uid, 令牌]
+# 令牌为空时强制移除；令牌与当前流不符（已被重连接管）时不做任何修改。
+# 返回释放的 IP（未释放为空串）
+_PRESENCE_RELEASE = _PRESENCE + """
+local cur = redis.call('HGET', KEYS[1], ARGV[1])
+local pos = cur and string.find(cur, ':', 1, true)
+if ARGV[2] ~= '' and (not pos or string.sub(cur, 1, pos - 1) ~= ARGV[2]) then
+    return ''
+end
+redis.call('DEL', KEYS[4])
+redis.call('ZREM', KEYS[5], ARGV[1])
+redis.call('HDEL', KEYS[6], ARGV[1])
+if not pos then
+    return ''
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+return release(string.sub(cur, pos + 1))
+"""
+
+# 过期清理：KEYS[4..5] = [在线索引, IP 索引]，ARGV = [心跳截止时间]
+# 移除心跳早于截止时间的客户端（如节点崩溃未下线），一并清理其 IP 索引、
+# 流令牌与 IP 引用；返回释放的 IP 列表
+_PRESENCE_SWEEP = _PRESENCE + """
+local released = {}
+for _, uid in ipairs(redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', ARGV[1])) do
+    redis.call('ZREM', KEYS[4], uid)
+    redis.call('HDEL', KEYS[5], uid)
+    local cur = redis.call('HGET', KEYS[1], uid)
+    local pos = cur and string.find(cur, ':', 1, true)
+    if pos then
+        redis.call('HDEL', KEYS[1], uid)
+        local ip = release(string.sub(cur, pos + 1))
+        if ip ~= '' then
+            released[#released + 1] = ip
+        end
+    end
+end
+return released
+"""
+
+# GCRA 限流公共部分：以服务端时钟（毫秒）计算理论到达时间 tat，
+# 超出容差时视为超限且不推进 tat
+_GCRA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local function gcra(key, interval, tolerance)
+    local tat = math.max(tonumber(redis.call('GET', key) or 0), now) + interval
+    if tat - now > tolerance then
+        return true
+    end
+    redis.call('SET', key, tat, 'PX', math.ceil(tat - now))
+    return false
+end
+"""
+
+# 请求准入：KEYS = [封禁键, 全局速率键]，ARGV = [interval_ms, tolerance_ms]
+# 返回 {封禁剩余毫秒, 全局是否超限}；已封禁的请求不计入全局速率
+_CC_CHECK = _GCRA + """
+local ban = redis.call('PTTL', KEYS[1])
+if ban > 0 then
+    return {ban, 0}
+end
+return {0, gcra(KEYS[2], tonumber(ARGV[1]), tonumber(ARGV[2])) and 1 or 0}
+"""
+
+# 失败登记：KEYS = [失败速率键, 封禁键]，ARGV = [interval_ms, tolerance_ms, ban_ms]
+# 失败速率超限时写入封禁键并返回封禁毫秒数，否则返回 0
+_CC_FAIL = _GCRA + """
+if gcra(KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2])) then
+    redis.call('DEL', KEYS[1])
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+    return tonumber(ARGV[3])
+end
+return 0
+"""
+
+_SOURCES = {
+    "hset_expire": _HSET_EXPIRE,
+    "consume_token": _CONSUME_TOKEN,
+    "compare_delete": _COMPARE_DELETE,
+    "outbox_push": _OUTBOX_PUSH,
+    "presence_claim": _PRESENCE_CLAIM,
+    "presence_release": _PRESENCE_RELEASE,
+    "presence_sweep": _PRESENCE_SWEEP,
+    "cc_check": _CC_CHECK,
+    "cc_fail": _CC_FAIL,
+}
+_scripts: dict[str, AsyncScript] = {}
+
+
+async def load_scripts(rd: aioredis.Redis) -> None:
+    """向服务端预加载全部脚本（脚本缓存为实例级，各逻辑 DB 共用）。"""
+    for name, source in _SOURCES.items():
+        _scripts[name] = rd.register_script(source)
+        await rd.script_load(source)
+
+
+def _script(rd: aioredis.Redis, name: str) -> AsyncScript:
+    """获取已注册脚本，未预加载时即时注册。"""
+    if name not in _scripts:
+        _scripts[name] = rd.register_script(_SOURCES[name])
+    return _scripts[name]
+
+
+async def hset_expire(rd: aioredis.Redis, key: str, mapping: dict, ttl: int) -> None:
+    """原子地写入哈希并设置过期时间（单次往返）。"""
+    args = [ttl]
+    for field, value in mapping.items():
+        args += [field, value]
+    await _script(rd, "hset_expire")(keys=[key], args=args, client=rd)
+
+
+async def consume_token(rd: aioredis.Redis, key: str) -> Optional[dict]:
+    """原子地读取令牌并扣减一次使用次数，令牌不存在时返回 None。"""
+    data = await _script(rd, "consume_token")(keys=[key], client=rd)
+    if not data:
+        return None
+    return dict(zip(data[::2], data[1::2]))
+
+
+async def compare_delete(rd: aioredis.Redis, key: str, expected: str) -> bool:
+    """仅当键的当前值等于 expected 时删除（单次往返），返回是否删除。"""
+    return bool(
+        await _script(rd, "compare_delete")(keys=[key], args=[expected], client=rd)
+    )
+
+
+async def queue_outbox_push(
+    pipe, key: str, entry: str, dedupe: bool, maxlen: int, ttl: int, deadline: int
+) -> None:
+    """向管道追加一次离线信箱写入（脚本执行结果：1 已追加，0 已合并）。"""
+    await _script(pipe, "outbox_push")(
+        keys=[key], args=[entry, int(dedupe), maxlen, ttl, deadline], client=pipe
+    )
+
+
+async def queue_presence_claim(
+    pipe, keys: list[str], cuid: str, token: str, ip: str
+) -> None:
+    """向管道追加一次流登记（脚本执行结果：被接管旧流释放的 IP 或空串）。
+
+    Args:
+        keys: [流令牌索引, IP 引用计数, 在线 IP 集合]。
+    """
+    await _script(pipe, "presence_claim")(
+        keys=keys, args=[cuid, f"{token}:{ip}", ip], client=pipe
+    )
+
+
+async def presence_release(
+    rd: aioredis.Redis, keys: list[str], cuid: str, token: str
+) -> str:
+    """移除客户端在线记录（单次往返），返回释放的 IP 或空串。
+
+    Args:
+        keys: [流令牌索引, IP 引用计数, 在线 IP 集合, 在线记录, 在线索引, IP 索引]。
+        token: 所属流令牌，为空时强制移除。
+    """
+    return await _script(rd, "presence_release")(
+        keys=keys, args=[cuid, token], client=rd
+    )
+
+
+async def queue_presence_sweep(pipe, keys: list[str], cutoff: float) -> None:
+    """向管道追加一次过期清理（脚本执行结果：释放的 IP 列表）。
+
+    Args:
+        keys: [流令牌索引, IP 引用计数, 在线 IP 集合, 在线索引, IP 索引]。
+    """
+    await _script(pipe, "presence_sweep")(keys=keys, args=[cutoff], client=pipe)
+
+
+async def cc_check(
+    rd: aioredis.Redis,
+    ban_key: str,
+    rate_key: str,
+    interval_ms: float,
+    tolerance_ms: float,
+) -> tuple[int, bool]:
+    """查询封禁并登记一次全局请求（单次往返）。
+
+    Returns:
+        (封禁剩余毫秒数，未封禁为 0, 全局速率是否超限)。
+    """
+    ban_ms, over = await _script(rd, "cc_check")(
+        keys=[ban_key, rate_key], args=[interval_ms, tolerance_ms], client=rd
+    )
+    return ban_ms, bool(over)
+
+
+async def cc_fail(
+    rd: aioredis.Redis,
+    fail_key: str,
+    ban_key: str,
+    interval_ms: float,
+    tolerance_ms: float,
+    ban_ms: int,
+) -> int:
+    """登记一次失败响应，超限时写入封禁（单次往返），返回封禁毫秒数或 0。"""
+    return await _script(rd, "cc_fail")(
+        keys=[fail_key, ban_key], args=[interval_ms, tolerance_ms, ban_ms], client=rd
+    )
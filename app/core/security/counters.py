@@ -0,0 +1,126 @@
+"""CC 防护使用的定长计数结构。
+
+全局请求速率使用分桶环形计数器：窗口被切分为固定数量的时间桶，
+每次计数只触及当前桶，滑出窗口的桶在推进时清零，内存与请求量无关。
+单 IP 失败记录使用 LRU 限容表：每个 IP 只保留最近 limit 次失败时间，
+超过容量时淘汰最久未活跃的 IP，登记与判定均为 O(1)。
+准入控制使用按键分配的令牌桶集合，同样以 LRU 限容。
+"""
+
+from collections import OrderedDict
+
+
+class RingCounter:
+    """固定窗口内的分桶滑动计数器。"""
+
+    def __init__(self, window: float, buckets: int):
+        self._size = buckets
+        self._width = window / buckets
+        self._counts = [0] * buckets
+        self._head = 0
+        self._total = 0
+
+    def _advance(self, now: float) -> int:
+        """推进到 now 所在的桶，清零期间滑出窗口的桶，返回当前桶序号。"""
+        idx = int(now // self._width)
+        if idx > self._head:
+            for step in range(min(idx - self._head, self._size)):
+                slot = (idx - step) % self._size
+                self._total -= self._counts[slot]
+                self._counts[slot] = 0
+            self._head = idx
+        # 时钟回拨时计入最新的桶，避免覆盖仍在窗口内的计数
+        return self._head
+
+    def add(self, now: float, n: int = 1) -> int:
+        """计入 n 次事件，返回窗口内事件总数。"""
+        slot = self._advance(now) % self._size
+        self._counts[slot] += n
+        self._total += n
+        return self._total
+
+    def total(self, now: float) -> int:
+        """窗口内事件总数。"""
+        self._advance(now)
+        return self._total
+
+    def clear(self) -> None:
+        """清空所有桶。"""
+        self._counts = [0] * self._size
+        self._total = 0
+
+
+class FailureTable:
+    """按 IP 记录最近失败时间的 LRU 限容表。"""
+
+    def __init__(self, maxsize: int, limit: int, window: float):
+        self._maxsize = maxsize
+        self._limit = limit
+        self._window = window
+        self._data: OrderedDict[str, tuple[float, ...]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def record(self, key: str, now: float) -> None:
+        """登记一次失败，仅保留最近 limit 次时间戳。"""
+        fails = self._data.pop(key, ())
+        self._data[key] = (*fails, now)[-self._limit :]
+        if len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def blocked(self, key: str, now: float) -> bool:
+        """窗口内失败次数是否已达上限；查询不会为未知 IP 建立记录。"""
+        fails = self._data.get(key)
+        if fails is None:
+            return False
+        if fails[-1] < now - self._window:
+            del self._data[key]
+            return False
+        return len(fails) >= self._limit and fails[0] >= now - self._window
+
+    def clear(self) -> None:
+        """清空所有记录。"""
+        self._data.clear()
+
+
+class TokenBuckets:
+    """按键分配的令牌桶集合，超过容量时淘汰最久未使用的桶。"""
+
+    def __init__(self, rate: float, burst: float, maxsize: int):
+        self._rate = rate
+        self._burst = burst
+        self._maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _level(self, key: str, now: float) -> float:
+        """按流逝时间补充后的令牌数。"""
+        tokens, stamp = self._data.get(key, (self._burst, now))
+        return min(self._burst, tokens + (now - stamp) * self._rate)
+
+    def _wait(self, tokens: float) -> float:
+        """攒够一枚令牌还需等待的秒数。"""
+        return 0.0 if tokens >= 1 else (1 - tokens) / self._rate
+
+    def peek(self, key: str, now: float) -> float:
+        """查询取一枚令牌需等待的秒数，不消耗令牌，0 表示可立即取得。"""
+        return self._wait(self._level(key, now))
+
+    def take(self, key: str, now: float) -> float:
+        """取一枚令牌。
+
+        Returns:
+            0 表示放行，否则为桶内攒够一枚令牌还需等待的秒数。
+        """
+        tokens = self._level(key, now)
+        wait = self._wait(tokens)
+        if not wait:
+            tokens -= 1
+        self._data.pop(key, None)
+        self._data[key] = (tokens, now)
+        if len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+        return wait
@@ -0,0 +1,99 @@
+"""gRPC 准入控制。
+
+按来源 IP、租户与方法三个维度为指定 RPC 分配令牌桶，先检查全部维度，
+任一维度耗尽即拒绝并给出需等待的时长，全部放行时才从各维度取令牌，
+被拒绝的调用不消耗任何额度；单个 IP 的突发请求不会耗尽所在租户的额度，
+单个租户也不会独占本节点的握手解密能力。令牌桶为进程内状态，与解密进程池一样按节点计量。
+"""
+
+import time
+
+from app.core.config import GRPC_RATE_LIMITS
+from .counters import TokenBuckets
+from .state import IP_TABLE_MAX
+
+# 默认限额：方法名 → 维度 → (每秒速率, 突发容量)
+DEFAULT_LIMITS: dict[str, dict[str, tuple[float, float]]] = {
+    "Register": {"ip": (2, 50), "tenant": (20, 500)},
+    "BeginHandshake": {"ip": (2, 50), "tenant": (20, 500), "method": (500, 2000)},
+    "CompleteHandshake": {"ip": (2, 50), "tenant": (20, 500)},
+    "ListenCommand": {"ip": (2, 50), "tenant": (20, 500)},
+    "LogEvent": {"ip": (20, 200), "tenant": (200, 2000)},
+    "UploadConfig": {"ip": (5, 50), "tenant": (50, 500)},
+}
+
+_SCOPES = ("ip", "tenant", "method")
+
+
+def _limit(name: str, scope: str, value) -> tuple[float, float]:
+    """校验单个维度的限额：速率须为正数，突发容量至少为 1。"""
+    try:
+        rate, burst = (float(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError(f"限额格式应为 [速率, 突发容量]: {name}.{scope}")
+    if not rate > 0 or not burst >= 1:
+        raise ValueError(f"限额须满足速率 > 0 且突发容量 >= 1: {name}.{scope}")
+    return rate, burst
+
+
+def _merge(overrides: dict) -> dict:
+    """以配置覆盖默认限额，值为 null 的维度被关闭。
+
+    Raises:
+        ValueError: 维度未知或限额不合法。
+    """
+    limits = {name: dict(scopes) for name, scopes in DEFAULT_LIMITS.items()}
+    for name, scopes in overrides.items():
+        merged = limits.setdefault(name, {})
+        for scope, value in scopes.items():
+            if scope not in _SCOPES:
+                raise ValueError(f"未知限流维度: {name}.{scope}")
+            if value is None:
+                merged.pop(scope, None)
+            else:
+                merged[scope] = _limit(name, scope, value)
+    return limits
+
+
+class GrpcAdmission:
+    """按 IP / 租户 / 方法计量的 gRPC 令牌桶准入。"""
+
+    def __init__(self, overrides: dict | None = None, maxsize: int = IP_TABLE_MAX):
+        """初始化各方法各维度的令牌桶。
+
+        Args:
+            overrides: 限额覆盖，缺省读取 CIMS_GRPC_RATE_LIMITS。
+            maxsize: 每个维度最多跟踪的键数。
+        """
+        limits = _merge(GRPC_RATE_LIMITS if overrides is None else overrides)
+        self._buckets = {
+            name: [
+                (scope, TokenBuckets(*scopes[scope], maxsize))
+                for scope in _SCOPES
+                if scope in scopes
+            ]
+            for name, scopes in limits.items()
+        }
+        self.rejected = 0
+
+    def check(self, method: str, ip: str, tenant_id: str | None) -> float:
+        """为一次调用取令牌。
+
+        Returns:
+            0 表示放行，否则为建议客户端等待的秒数。
+        """
+        keys = {"ip": ip, "tenant": tenant_id, "method": method}
+        now = time.monotonic()
+        active = [
+            (buckets, keys[scope])
+            for scope, buckets in self._buckets.get(method, ())
+            if keys[scope] is not None
+        ]
+        # 先检查后扣减：被拒绝的调用不消耗任何维度的令牌
+        wait = max((buckets.peek(key, now) for buckets, key in active), default=0.0)
+        if wait:
+            self.rejected += 1
+            return wait
+        for buckets, key in active:
+            buckets.take(key, now)
+        return 0.0
@@ -0,0 +1,122 @@
+"""跨进程共享的 CC 限流与 IP 封禁。
+
+全局请求速率与单 IP 失败速率以 GCRA 算法保存在 Redis（缓存库），
+每次判定只执行一次 Lua 调用；Client、Management、Admin 三个端口与
+全部工作进程共享同一份 CC 计数，阈值 CC_GLOBAL_MAX 为全集群合计值。
+gRPC 调用由准入令牌桶限流，只查询封禁（is_banned），不计入全局速率。
+已封禁的 IP 记入本地缓存直至封禁到期，封禁期内的请求不再访问 Redis。
+Redis 不可用时退回进程内计数（见 tracker）。
+"""
+
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from app.core.config import CC_GLOBAL_MAX, REDIS_DB_CACHE
+from app.core.lru_cache import LRUCache
+from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import cc_check, cc_fail
+from .state import IP_FAIL_MAX, IP_TABLE_MAX, WINDOW_SEC, set_cc_state
+from .tracker import (
+    check_ip_blocked,
+    monitor_global_frequency,
+    record_ip_failure,
+)
+
+logger = logging.getLogger(__name__)
+
+_GLOBAL_KEY = "cc:global"
+_WINDOW_MS = WINDOW_SEC * 1000
+# 全局速率：窗口内允许 CC_GLOBAL_MAX 次请求，超出即判定为 CC
+_GLOBAL_INTERVAL_MS = _WINDOW_MS / CC_GLOBAL_MAX
+# 单 IP 失败：窗口内第 IP_FAIL_MAX 次失败即触发封禁
+_FAIL_INTERVAL_MS = _WINDOW_MS / IP_FAIL_MAX
+
+# 本地封禁缓存：IP → 封禁到期的 monotonic 时间
+_banned = LRUCache(IP_TABLE_MAX, WINDOW_SEC)
+
+
+def _ban_key(ip: str) -> str:
+    """IP 封禁键。"""
+    return f"cc:ban:{ip}"
+
+
+def _fail_key(ip: str) -> str:
+    """IP 失败速率键。"""
+    return f"cc:fail:{ip}"
+
+
+def _locally_banned(ip: str) -> bool:
+    """本地缓存中该 IP 是否仍在封禁期内。"""
+    until = _banned.get(ip)
+    return until is not None and until > time.monotonic()
+
+
+def _ban_locally(ip: str, ban_ms: int) -> None:
+    """记录封禁到期时间。"""
+    _banned.put(ip, time.monotonic() + ban_ms / 1000)
+
+
+async def is_banned(ip: str) -> bool:
+    """仅查询来源 IP 是否处于封禁期，不登记请求。"""
+    if _locally_banned(ip):
+        return True
+    try:
+        ban_ms = await get_redis(REDIS_DB_CACHE).pttl(_ban_key(ip))
+    except (RedisError, RuntimeError) as e:
+        logger.debug("共享限流不可用，退回本地计数: %s", e)
+        return check_ip_blocked(ip)
+    if ban_ms > 0:
+        _ban_locally(ip, ban_ms)
+        return True
+    return False
+
+
+async def check_request(ip: str) -> bool:
+    """登记一次请求并刷新全局 CC 状态。
+
+    Returns:
+        来源 IP 是否处于封禁期（封禁请求不计入全局速率）。
+    """
+    if _locally_banned(ip):
+        return True
+    try:
+        ban_ms, over = await cc_check(
+            get_redis(REDIS_DB_CACHE),
+            _ban_key(ip),
+            _GLOBAL_KEY,
+            _GLOBAL_INTERVAL_MS,
+            _WINDOW_MS,
+        )
+    except (RedisError, RuntimeError) as e:
+        # RuntimeError：Redis 连接池尚未初始化
+        logger.debug("共享限流不可用，退回本地计数: %s", e)
+        if check_ip_blocked(ip):
+            return True
+        monitor_global_frequency()
+        return False
+    set_cc_state(over)
+    if ban_ms > 0:
+        _ban_locally(ip, ban_ms)
+        return True
+    return False
+
+
+async def record_failure(ip: str) -> None:
+    """登记一次失败响应，失败过多时封禁该 IP。"""
+    try:
+        ban_ms = await cc_fail(
+            get_redis(REDIS_DB_CACHE),
+            _fail_key(ip),
+            _ban_key(ip),
+            _FAIL_INTERVAL_MS,
+            _WINDOW_MS - _FAIL_INTERVAL_MS,
+            _WINDOW_MS,
+        )
+    except (RedisError, RuntimeError) as e:
+        logger.debug("共享限流不可用，退回本地计数: %s", e)
+        record_ip_failure(ip)
+        return
+    if ban_ms:
+        _ban_locally(ip, ban_ms)
@@ -1,35 +1,43 @@
 """FastAPI 提供防 CC 高频拦截与异常 IP 限流中间件支撑。"""
 
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from .tracker import check_ip_blocked, record_ip_failure, monitor_global_frequency
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.asgi import StatusRecorder
+from .limiter import check_request, record_failure
 from .state import get_cc_state
 from .codes import ERR_CC_ACTIVE, ERR_IP_BLOCKED
 
 
-class CCProtectMiddleware(BaseHTTPMiddleware):
+class CCProtectMiddleware:
     """用于应用侧的整体防护：阻断非法 IP 以及遭遇全域攻击时降级服务。"""
 
-    async def dispatch(self, request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """挂载过滤清洗规则与异常频率溯源记录机制。"""
-        ip = request.client.host if request.client else "unknown"
-        if check_ip_blocked(ip):
-            return JSONResponse(
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        if await check_request(ip):
+            resp = JSONResponse(
                 status_code=429, content={"code": ERR_IP_BLOCKED, "msg": "异常封禁"}
             )
-
-        monitor_global_frequency()
+            return await resp(scope, receive, send)
 
         # 判断全局遭受狂暴并发时，拦截敏感交互点
-        path = request.url.path.lower()
+        path = scope["path"].lower()
         if get_cc_state() and any(k in path for k in ["login", "register"]):
-            if "authorization" not in request.headers:
-                return JSONResponse(
+            if "authorization" not in Headers(scope=scope):
+                resp = JSONResponse(
                     status_code=503, content={"code": ERR_CC_ACTIVE, "msg": "通道受阻"}
                 )
+                return await resp(scope, receive, send)
 
-        resp = await call_next(request)
-        if resp.status_code >= 400:
-            record_ip_failure(ip)
-
-        return resp
+        recorder = StatusRecorder(send)
+        await self.app(scope, receive, recorder)
+        if recorder.status >= 400:
+            await record_failure(ip)
@@ -1,13 +1,18 @@
 """CC 攻击防护与全局请求状态管理。"""
 
-from collections import deque
+from .counters import FailureTable, RingCounter
+
+WINDOW_SEC = 60  # 计算窗口时间（秒）
+WINDOW_BUCKETS = 60  # 全局计数窗口的分桶数
+IP_FAIL_MAX = 5  # 窗口内单一 IP 允许极度失败的最大阈值
+IP_TABLE_MAX = 65536  # 失败记录表最多跟踪的 IP 数
 
 # 全局布尔标志：当前是否处于 CC 攻击防护状态
 _is_cc_attack_active: bool = False
-# 用于高频检测的全局请求时间序列
-_global_requests = deque()
-# 记录单个 IP 连续失败响应时间的字典: { "ip": [ timestamp1, ... ] }
-_ip_failures = {}
+# 用于高频检测的全局请求分桶计数
+_global_requests = RingCounter(WINDOW_SEC, WINDOW_BUCKETS)
+# 记录单个 IP 最近失败时间的限容表
+_ip_failures = FailureTable(IP_TABLE_MAX, IP_FAIL_MAX, WINDOW_SEC)
 
 
 def get_cc_state() -> bool:
@@ -21,11 +26,11 @@ def set_cc_state(state: bool):
     _is_cc_attack_active = state
 
 
-def get_ip_failures_dict() -> dict:
-    """获取所有记录 IP 失败时间的引用。"""
+def get_ip_failures() -> FailureTable:
+    """获取 IP 失败记录表的引用。"""
     return _ip_failures
 
 
-def get_global_requests() -> deque:
-    """获取记录全局请求时间戳的引用。"""
+def get_global_requests() -> RingCounter:
+    """获取全局请求计数器的引用。"""
     return _global_requests
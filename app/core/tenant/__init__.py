@@ -14,6 +14,7 @@ from .context import (
 )
 from .host_parser import extract_slug_from_host
 from .resolver import resolve_account
+from .local_cache import invalidate_account, warm_account_cache
 
 __all__ = [
     "tenant_ctx",
@@ -24,4 +25,6 @@ __all__ = [
     "set_search_path",
     "extract_slug_from_host",
     "resolve_account",
+    "invalidate_account",
+    "warm_account_cache",
 ]
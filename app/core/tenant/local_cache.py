@@ -0,0 +1,83 @@
+"""账户解析的进程内一级缓存。
+
+slug → 账户映射极少变化，解析结果在进程内 LRU 缓存，命中时无需访问
+Redis、反序列化或打开数据库会话。未知或已停用的 slug 做短时否定缓存；
+账户变更时经 Pub/Sub 广播失效，各节点同步丢弃本地条目。
+"""
+
+from typing import Optional, TYPE_CHECKING
+
+from app.core.config import REDIS_DB_CACHE
+from app.core.lru_cache import LRUCache
+from app.core.redis.accessor import get_redis
+from app.core.redis.invalidation import invalidation_bus
+
+if TYPE_CHECKING:
+    from app.models.account import Account
+
+# 肯定结果有效期（秒），变更依赖广播失效，有效期仅作兜底
+LOCAL_ACCOUNT_TTL = 300
+# 否定结果有效期（秒），防止随机 slug 穿透到数据库
+NEGATIVE_ACCOUNT_TTL = 30
+LOCAL_ACCOUNT_SIZE = 10000
+# 账户失效广播主题
+ACCOUNT_TOPIC = "account"
+
+_accounts = LRUCache(LOCAL_ACCOUNT_SIZE, LOCAL_ACCOUNT_TTL)
+_missing = LRUCache(LOCAL_ACCOUNT_SIZE, NEGATIVE_ACCOUNT_TTL)
+
+
+def get_local_account(slug: str) -> tuple[bool, Optional["Account"]]:
+    """查询本地缓存，返回 (是否命中, 账户或 None)。"""
+    account = _accounts.get(slug)
+    if account is not None:
+        return True, account
+    return _missing.get(slug) is not None, None
+
+
+def set_local_account(slug: str, account: Optional["Account"]) -> None:
+    """写入本地缓存，account 为 None 时记为否定结果。"""
+    if account is None:
+        _accounts.discard(slug)
+        _missing.put(slug, True)
+    else:
+        _missing.discard(slug)
+        _accounts.put(slug, account)
+
+
+def _discard(slug: str) -> None:
+    """丢弃本地条目（失效广播处理函数）。"""
+    _accounts.discard(slug)
+    _missing.discard(slug)
+
+
+def _reset() -> None:
+    """清空本地缓存（失效订阅重连后调用）。"""
+    _accounts.clear()
+    _missing.clear()
+
+
+invalidation_bus.subscribe(ACCOUNT_TOPIC, _discard, _reset)
+
+
+async def invalidate_account(slug: str) -> None:
+    """账户创建、修改或停用后调用：清除 Redis 缓存并通知所有节点。"""
+    await get_redis(REDIS_DB_CACHE).delete(f"account:{slug}")
+    await invalidation_bus.publish(ACCOUNT_TOPIC, slug)
+
+
+async def warm_account_cache() -> int:
+    """启动时批量加载全部启用账户，返回加载数量。"""
+    from sqlalchemy import select
+    from app.models.account import Account
+    from app.models.engine import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        rows = (
+            (await db.execute(select(Account).where(Account.is_active.is_(True))))
+            .scalars()
+            .all()
+        )
+    for account in rows[:LOCAL_ACCOUNT_SIZE]:
+        set_local_account(account.slug, account)
+    return len(rows)
@@ -1,4 +1,4 @@
-"""账户解析逻辑，协调 Redis 缓存与 PostgreSQL。
+"""账户解析逻辑，协调进程内缓存、Redis 缓存与 PostgreSQL。
 
 根据 Slug（二级域名标识）安全查找账户的主要接口。
 """
@@ -9,23 +9,41 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from .cache import get_cached_account, set_cached_account
+from .local_cache import get_local_account, set_local_account
 
 if TYPE_CHECKING:
     from app.models.account import Account
 
 
-async def resolve_account(slug: str, db: AsyncSession) -> Optional["Account"]:
-    """根据 slug 解析账户，优先缓存，其次数据库。"""
+async def resolve_account(
+    slug: str, db: Optional[AsyncSession] = None
+) -> Optional["Account"]:
+    """根据 slug 解析账户，依次查询本地缓存、Redis 缓存与数据库。
+
+    未传入 db 时仅在需要查询数据库时才打开会话。
+    """
+    hit, account = get_local_account(slug)
+    if hit:
+        return account
     account = await get_cached_account(slug)
     if account is not None:
-        return account if account.is_active else None
+        account = account if account.is_active else None
+        set_local_account(slug, account)
+        return account
     # 数据库查找（延迟导入避免循环依赖）
     from app.models.account import Account
 
     stmt = select(Account).where(Account.slug == slug)
-    result = await db.execute(stmt)
-    account = result.scalar_one_or_none()
+    if db is None:
+        from app.models.engine import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as own_db:
+            account = (await own_db.execute(stmt)).scalar_one_or_none()
+    else:
+        account = (await db.execute(stmt)).scalar_one_or_none()
     if account and account.is_active:
         await set_cached_account(slug, account)
+        set_local_account(slug, account)
         return account
+    set_local_account(slug, None)
     return None
@@ -33,7 +33,8 @@ async def serve_grpc(interceptors=None):
     ClientRegister_pb2_grpc.add_ClientRegisterServicer_to_server(
         ClientRegisterServicer(mgr), srv
     )
-    cmd_s = ClientCommandDeliverServicer(mgr)
+    cmd_s = ClientCommandDeliverServicer(mgr, distributed=True)
+    await cmd_s.bus.start()
     ClientCommandDeliver_pb2_grpc.add_ClientCommandDeliverServicer_to_server(cmd_s, srv)
     ConfigUpload_pb2_grpc.add_ConfigUploadServicer_to_server(
         ConfigUploadServicer(mgr), srv
@@ -0,0 +1,126 @@
+"""跨节点指令总线。
+
+基于 Redis Pub/Sub：每个节点订阅自己的 `cmdbus:{node_id}` 频道，
+发送方按 `{tid}:{cuid}` 路由表定位持有指令流的节点后投递。
+消息到达时指令流已断开的，可暂存指令由接收节点写入离线信箱。
+"""
+
+import asyncio
+import logging
+import uuid
+from contextlib import suppress
+
+from app.core.config import REDIS_DB_SESSION
+from app.core.redis.accessor import get_redis
+from app.core.redis.pubsub import listen_forever
+from app.grpc.session.stream_route import claim_route, lookup_routes, release_route
+from .command_codec import encode_payload, encode_command, decode_command
+from .command_outbox import OUTBOX_TYPES, push_outbox
+from .delivery import FORWARDED, OFFLINE
+
+logger = logging.getLogger(__name__)
+
+
+class CommandBus:
+    """节点级指令总线：订阅本节点频道并转发远端指令。"""
+
+    def __init__(self, deliver_local):
+        """初始化总线。
+
+        Args:
+            deliver_local: 本地非阻塞投递函数 `(tid, cuid, cmd) -> str`。
+        """
+        self.node_id = uuid.uuid4().hex
+        self._deliver_local = deliver_local
+        self._task = None
+        self._stores: set[asyncio.Task] = set()
+
+    @staticmethod
+    def channel_of(node_id: str) -> str:
+        """节点订阅频道名。"""
+        return f"cmdbus:{node_id}"
+
+    async def _subscribe(self):
+        """订阅本节点频道，返回 PubSub。"""
+        pubsub = get_redis(REDIS_DB_SESSION).pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel_of(self.node_id))
+        return pubsub
+
+    async def start(self) -> None:
+        """订阅本节点频道并启动后台消费任务（断线后自动重新订阅）。"""
+        pubsub = await self._subscribe()
+        self._task = asyncio.create_task(
+            listen_forever(self._subscribe, self._handle, "指令总线", pubsub=pubsub)
+        )
+        logger.info("指令总线已启动: node=%s", self.node_id)
+
+    async def stop(self) -> None:
+        """停止消费并退订频道。"""
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for task in list(self._stores):
+            with suppress(asyncio.CancelledError):
+                await task
+
+    def _handle(self, msg: dict) -> None:
+        """投递远端发往本节点的指令。"""
+        try:
+            tid, cuids, cmd = decode_command(msg["data"])
+            missing = [
+                cuid for cuid in cuids if self._deliver_local(tid, cuid, cmd) == OFFLINE
+            ]
+        except Exception as e:
+            logger.error("指令总线消息处理失败: %s", e)
+            return
+        # 转发途中指令流已断开：发送方已视为 forwarded，由本节点代为暂存
+        if missing and cmd.Type in OUTBOX_TYPES:
+            task = asyncio.create_task(self._store(tid, missing, cmd))
+            self._stores.add(task)
+            task.add_done_callback(self._stores.discard)
+
+    @staticmethod
+    async def _store(tid: str, cuids: list[str], cmd) -> None:
+        """将未能本地投递的转发指令写入离线信箱。
+
+        持有路由的客户端均已通过会话校验，无需再核对注册状态。
+        """
+        try:
+            await push_outbox(tid, cuids, cmd)
+        except Exception as e:
+            logger.error("转发指令暂存失败: tid=%s, uids=%s, %s", tid, cuids, e)
+
+    async def claim(self, tid: str, cuid: str) -> None:
+        """登记本节点持有该客户端指令流。"""
+        await claim_route(tid, cuid, self.node_id)
+
+    async def release(self, tid: str, cuid: str) -> None:
+        """注销本节点对该客户端指令流的持有。"""
+        await release_route(tid, cuid, self.node_id)
+
+    async def forward_many(self, tid: str, cuids: list[str], cmd) -> dict[str, str]:
+        """按持有节点分组批量转发，每个节点只发布一条消息。"""
+        results, groups = {}, {}
+        for cuid, node in zip(cuids, await lookup_routes(tid, cuids)):
+            if not node or node == self.node_id:
+                results[cuid] = OFFLINE
+            else:
+                groups.setdefault(node, []).append(cuid)
+        if not groups:
+            return results
+        payload = encode_payload(cmd)
+        async with get_redis(REDIS_DB_SESSION).pipeline(transaction=False) as pipe:
+            for node, members in groups.items():
+                pipe.publish(
+                    self.channel_of(node), encode_command(tid, members, payload)
+                )
+            receivers = await pipe.execute()
+        for (node, members), n in zip(groups.items(), receivers):
+            results.update(dict.fromkeys(members, FORWARDED if n else OFFLINE))
+            if not n:
+                # 目标节点已下线：清理残留路由
+                for cuid in members:
+                    await release_route(tid, cuid, node)
+        return results
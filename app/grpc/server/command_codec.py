@@ -0,0 +1,34 @@
+"""指令消息编解码。
+
+将 ClientCommandDeliverScRsp 与目标客户端列表打包为紧凑文本，
+供跨节点指令总线等基于 Redis 文本连接的通道传输。
+负载与目标列表分开编码，广播时负载只需序列化一次。
+"""
+
+import base64
+import json
+
+from app.grpc.api.Protobuf.Server import ClientCommandDeliverScRsp_pb2
+
+
+def encode_payload(cmd) -> str:
+    """将指令序列化为 Base64 文本负载。"""
+    return base64.b64encode(cmd.SerializeToString()).decode("ascii")
+
+
+def decode_payload(payload: str):
+    """将 Base64 文本负载还原为指令。"""
+    cmd = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp()
+    cmd.ParseFromString(base64.b64decode(payload))
+    return cmd
+
+
+def encode_command(tid: str, cuids: list[str], payload: str) -> str:
+    """将已编码负载与目标客户端打包为总线消息文本。"""
+    return json.dumps({"t": tid, "c": cuids, "p": payload})
+
+
+def decode_command(raw: str):
+    """解析总线消息，返回 (tid, cuids, cmd)。"""
+    data = json.loads(raw)
+    return data["t"], data["c"], decode_payload(data["p"])
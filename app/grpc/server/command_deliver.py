@@ -1,14 +1,20 @@
 """命令分发双向流。
 
 维护客户端长连接并推送管理指令，强制验证 session 与 cuid 匹配。
+本地持有指令流时直接入队，否则经指令总线转发至持有该流的节点；
+客户端离线时指令存入离线信箱，指令流建立后按序回放。
 """
 
-import asyncio
 import grpc
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from app.grpc.api.Protobuf.Service import ClientCommandDeliver_pb2_grpc
 from app.core.client_ip import get_client_ip_from_grpc
+from .command_bus import CommandBus
+from .command_outbox import OUTBOX_TYPES, drain_outbox, push_outbox, registered_uids
+from .command_queue import CommandQueue
+from .delivery import NOT_FOUND, OFFLINE
+from .stream_timeout import IdleTimerWheel
 from .helpers import get_metadata_dict, get_tenant_id_safe
 
 logger = logging.getLogger(__name__)
@@ -22,9 +28,25 @@ class ClientCommandDeliverServicer(
 ):
     """处理指令监听与心跳。"""
 
-    def __init__(self, session_manager):
+    def __init__(
+        self,
+        session_manager,
+        *,
+        distributed: bool = False,
+        overflow_policies: Optional[Dict[int, str]] = None,
+    ):
+        """初始化 Servicer。
+
+        Args:
+            session_manager: 会话管理器。
+            distributed: 是否启用跨节点指令总线（需调用 bus.start()）。
+            overflow_policies: 指令类型到队列溢出策略的映射，缺省使用默认策略。
+        """
         self._sm = session_manager
-        self.client_queues: Dict[str, asyncio.Queue] = {}
+        self._policies = overflow_policies
+        self.client_queues: Dict[str, CommandQueue] = {}
+        self.idle = IdleTimerWheel()
+        self.bus = CommandBus(self._offer_local) if distributed else None
 
     async def ListenCommand(self, request_iterator, context):
         """双向流：验证 session 后建立连接、心跳、下发指令。"""
@@ -41,10 +63,14 @@ class ClientCommandDeliverServicer(
 
         # 注册在线状态与有界消息队列
         client_ip = get_client_ip_from_grpc(context)
-        await self._sm.set_client_online(tid, real_cuid, ip=client_ip)
+        stream = await self._sm.set_client_online(tid, real_cuid, ip=client_ip)
         q_key = f"{tid}:{real_cuid}"
-        queue = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
+        queue = CommandQueue(_QUEUE_MAXSIZE, self._policies)
         self.client_queues[q_key] = queue
+        if self.bus:
+            await self.bus.claim(tid, real_cuid)
+        for cmd in await drain_outbox(tid, real_cuid):
+            queue.offer(cmd)
 
         logger.info(
             "[%s] gRPC 流已建立: 状态=Online, tid=%s, cuid=%s",
@@ -61,8 +87,12 @@ class ClientCommandDeliverServicer(
             ):
                 yield resp
         finally:
-            self.client_queues.pop(q_key, None)
-            await self._sm.set_client_offline(tid, real_cuid)
+            # 客户端已在本节点重连时，队列与路由属于新流，不得移除
+            if self.client_queues.get(q_key) is queue:
+                del self.client_queues[q_key]
+                if self.bus:
+                    await self.bus.release(tid, real_cuid)
+            await self._sm.set_client_offline(tid, real_cuid, stream)
             logger.info(
                 "[%s] gRPC 流已断开: 状态=Offline, tid=%s, cuid=%s",
                 client_ip,
@@ -70,8 +100,49 @@ class ClientCommandDeliverServicer(
                 real_cuid,
             )
 
-    async def send_command(self, tid, cuid, cmd):
-        """API 向特定客户端注入指令的公共方法。"""
-        key = f"{tid}:{cuid}"
-        if key in self.client_queues:
-            await self.client_queues[key].put(cmd)
+    async def send_command(self, tid, cuid, cmd) -> str:
+        """API 向特定客户端注入指令的公共方法，立即返回投递状态。"""
+        return (await self.send_command_many(tid, cmd, [cuid]))[cuid]
+
+    def _offer_local(self, tid, cuid, cmd) -> str:
+        """本地非阻塞投递，队列满时按溢出策略处理。"""
+        queue = self.client_queues.get(f"{tid}:{cuid}")
+        return OFFLINE if queue is None else queue.offer(cmd)
+
+    def queue_stats(self, tid, cuid) -> Optional[dict]:
+        """本节点持有的指令流队列深度，流不在本节点时返回 None。"""
+        queue = self.client_queues.get(f"{tid}:{cuid}")
+        return queue.stats() if queue is not None else None
+
+    async def send_command_many(self, tid, cmd, uids=None) -> dict[str, str]:
+        """向租户内多个客户端广播同一指令，返回逐客户端投递状态。
+
+        uids 为 None 时广播至该租户全部在线客户端。指令对象仅构建一次，
+        远端客户端按持有节点合并转发，负载只序列化一次；
+        离线客户端的可暂存指令写入离线信箱；未注册的客户端返回 not_found。
+        """
+        targets = uids if uids is not None else await self._online_uids(tid)
+        results, remote = {}, []
+        for cuid in dict.fromkeys(targets):
+            status = self._offer_local(tid, cuid, cmd)
+            if status == OFFLINE and self.bus:
+                remote.append(cuid)
+            else:
+                results[cuid] = status
+        if remote:
+            results.update(await self.bus.forward_many(tid, remote, cmd))
+        offline = [c for c, s in results.items() if s == OFFLINE]
+        if offline and cmd.Type in OUTBOX_TYPES:
+            known = await registered_uids(offline)
+            results.update(dict.fromkeys(offline, NOT_FOUND))
+            results.update(
+                await push_outbox(tid, [c for c in offline if c in known], cmd)
+            )
+        return results
+
+    async def _online_uids(self, tid) -> list[str]:
+        """汇总租户在线客户端：本节点指令流 + 全局在线状态。"""
+        prefix = f"{tid}:"
+        local = [k[len(prefix) :] for k in self.client_queues if k.startswith(prefix)]
+        status = await self._sm.get_all_clients_status(tid)
+        return local + [s["uid"] for s in status]
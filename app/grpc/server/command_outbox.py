@@ -0,0 +1,91 @@
+"""离线指令信箱。
+
+客户端无活跃指令流时暂存指令，ListenCommand 建立后按序回放。
+每个客户端一个 Redis 列表，条目为 `{入队时间}:{Base64 负载}` 的紧凑文本。
+幂等指令在信箱中已有相同副本时合并，批量编辑不会挤出其他待回放指令；
+仅已注册的客户端拥有信箱。
+"""
+
+import time
+
+from sqlalchemy import select
+
+from app.core.config import REDIS_DB_SESSION
+from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import queue_outbox_push
+from app.core.tenant.context import set_search_path
+from app.grpc.api.Protobuf.Enum import CommandTypes_pb2
+from app.models.database import AsyncSessionLocal, ClientRecord
+from .command_codec import encode_payload, decode_payload
+from .command_queue import IDEMPOTENT_TYPES
+from .delivery import COALESCED, STORED
+
+# 单条指令有效期（秒）：过期指令回放时丢弃
+OUTBOX_TTL = 7 * 86400
+# 单客户端信箱容量上限：超出时丢弃最旧指令
+OUTBOX_MAXLEN = 100
+# 需离线暂存的指令类型：心跳与配置查询等交互类指令不暂存
+OUTBOX_TYPES = frozenset(
+    {
+        CommandTypes_pb2.RestartApp,
+        CommandTypes_pb2.DataUpdated,
+        CommandTypes_pb2.SendNotification,
+    }
+)
+
+
+def _key(tid: str, cuid: str) -> str:
+    """构建信箱的 Redis 键。"""
+    return f"outbox:{tid}:{cuid}"
+
+
+async def registered_uids(cuids: list[str]) -> set[str]:
+    """筛选当前租户中已注册（存在设备记录）的客户端。"""
+    if not cuids:
+        return set()
+    async with AsyncSessionLocal() as db:
+        await set_search_path(db)
+        rows = await db.execute(
+            select(ClientRecord.uid).where(ClientRecord.uid.in_(cuids))
+        )
+    return set(rows.scalars())
+
+
+async def push_outbox(tid: str, cuids: list[str], cmd) -> dict[str, str]:
+    """将同一指令存入多个客户端的信箱（单次管道提交）。
+
+    Returns:
+        uid → stored（已追加）或 coalesced（信箱中已有相同幂等指令）。
+    """
+    if not cuids:
+        return {}
+    now = int(time.time())
+    entry = f"{now}:{encode_payload(cmd)}"
+    dedupe = cmd.Type in IDEMPOTENT_TYPES
+    async with get_redis(REDIS_DB_SESSION).pipeline(transaction=False) as pipe:
+        for cuid in cuids:
+            await queue_outbox_push(
+                pipe,
+                _key(tid, cuid),
+                entry,
+                dedupe,
+                OUTBOX_MAXLEN,
+                OUTBOX_TTL,
+                now - OUTBOX_TTL,
+            )
+        appended = await pipe.execute()
+    return {c: STORED if n else COALESCED for c, n in zip(cuids, appended)}
+
+
+async def drain_outbox(tid: str, cuid: str) -> list:
+    """原子取出并清空信箱，按入队顺序返回未过期的指令。"""
+    key = _key(tid, cuid)
+    async with get_redis(REDIS_DB_SESSION).pipeline(transaction=True) as pipe:
+        entries, _ = await pipe.lrange(key, 0, -1).delete(key).execute()
+    deadline = time.time() - OUTBOX_TTL
+    cmds = []
+    for entry in entries:
+        ts, payload = entry.split(":", 1)
+        if int(ts) >= deadline:
+            cmds.append(decode_payload(payload))
+    return cmds
@@ -0,0 +1,167 @@
+"""客户端指令队列。
+
+有界队列满载时按指令类型的溢出策略非阻塞处理，立即返回投递状态，
+慢客户端或半开连接不会挂起管理接口协程。
+幂等指令在队列中已有相同待下发副本时直接合并，其余指令保持 FIFO。
+每个队列仅由一条指令流消费，读取方等待期间只占用一个 Future。
+Pong 等控制帧走独立的控制通道：不受容量限制、优先于业务指令下发。
+"""
+
+import asyncio
+from collections import Counter, deque
+from typing import Dict, Optional
+
+from app.grpc.api.Protobuf.Enum import CommandTypes_pb2
+from .delivery import COALESCED, DELIVERED, QUEUE_FULL
+
+# 溢出策略：拒绝新指令 / 丢弃最旧指令 / 与队列中相同指令合并
+REJECT = "reject"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+
+# 默认溢出策略：幂等指令合并，通知类拒绝以便调用方感知，未列出的类型拒绝
+OVERFLOW_POLICIES: Dict[int, str] = {
+    CommandTypes_pb2.RestartApp: COALESCE,
+    CommandTypes_pb2.DataUpdated: COALESCE,
+    CommandTypes_pb2.GetClientConfig: COALESCE,
+    CommandTypes_pb2.SendNotification: REJECT,
+}
+
+
+# 幂等指令：重复下发与下发一次效果相同，待下发期间的相同副本合并为一条
+IDEMPOTENT_TYPES = frozenset(
+    {CommandTypes_pb2.RestartApp, CommandTypes_pb2.DataUpdated}
+)
+
+# 控制帧：走控制通道，待下发期间的相同副本同样合并
+CONTROL_TYPES = frozenset({CommandTypes_pb2.Pong})
+
+
+def _pending_key(cmd) -> tuple:
+    """相同指令判定键：类型与负载均一致。"""
+    return cmd.Type, cmd.Payload
+
+
+class CommandQueue:
+    """带溢出策略的有界单消费者指令队列。"""
+
+    def __init__(self, maxsize: int = 0, policies: Optional[Dict[int, str]] = None):
+        """初始化队列。
+
+        Args:
+            maxsize: 队列容量上限，0 表示不限。
+            policies: 指令类型到溢出策略的映射，缺省使用 OVERFLOW_POLICIES。
+        """
+        self.maxsize = maxsize
+        self._policies = OVERFLOW_POLICIES if policies is None else policies
+        self._items = deque()
+        self._control = deque()
+        self._pending = Counter()
+        self._waiter: Optional[asyncio.Future] = None
+        self._expired = False
+        self.dropped = 0
+        self.rejected = 0
+        self.coalesced = 0
+
+    def qsize(self) -> int:
+        """当前待下发指令数（含控制帧）。"""
+        return len(self._items) + len(self._control)
+
+    def empty(self) -> bool:
+        """队列是否为空。"""
+        return not self._items and not self._control
+
+    def full(self) -> bool:
+        """业务通道是否已达容量上限。"""
+        return 0 < self.maxsize <= len(self._items)
+
+    def put_nowait(self, cmd) -> None:
+        """业务指令入队并唤醒读取方，队列满时抛出 QueueFull。"""
+        if self.full():
+            raise asyncio.QueueFull
+        self._push(self._items, cmd)
+
+    def get_nowait(self):
+        """取出下一条指令（控制帧优先），队列空时抛出 QueueEmpty。"""
+        if self._control:
+            return self._pop(self._control)
+        if self._items:
+            return self._pop(self._items)
+        raise asyncio.QueueEmpty
+
+    def _push(self, lane: deque, cmd) -> None:
+        """追加到指定通道并唤醒读取方。"""
+        lane.append(cmd)
+        self._pending[_pending_key(cmd)] += 1
+        self._wake()
+
+    def _pop(self, lane: deque):
+        """从指定通道取出队首并注销待下发计数。"""
+        cmd = lane.popleft()
+        key = _pending_key(cmd)
+        self._pending[key] -= 1
+        if not self._pending[key]:
+            del self._pending[key]
+        return cmd
+
+    async def get(self):
+        """等待并取出队首指令。
+
+        Raises:
+            asyncio.TimeoutError: 队列为空且已被空闲计时器标记超时。
+        """
+        while self.empty():
+            if self._expired:
+                raise asyncio.TimeoutError("指令流空闲超时")
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        self._expired = False
+        return self.get_nowait()
+
+    def expire(self) -> None:
+        """标记空闲超时：队列为空时等待中的读取方抛出 TimeoutError。"""
+        self._expired = True
+        self._wake()
+
+    def _wake(self) -> None:
+        """唤醒等待中的读取方。"""
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def offer(self, cmd) -> str:
+        """非阻塞入队，返回投递状态。"""
+        pending = _pending_key(cmd) in self._pending
+        if pending and (cmd.Type in IDEMPOTENT_TYPES or cmd.Type in CONTROL_TYPES):
+            self.coalesced += 1
+            return COALESCED
+        if cmd.Type in CONTROL_TYPES:
+            self._push(self._control, cmd)
+            return DELIVERED
+        if not self.full():
+            self.put_nowait(cmd)
+            return DELIVERED
+        policy = self._policies.get(cmd.Type, REJECT)
+        if policy == COALESCE and pending:
+            self.coalesced += 1
+            return COALESCED
+        if policy == DROP_OLDEST:
+            self._pop(self._items)
+            self.dropped += 1
+            self.put_nowait(cmd)
+            return DELIVERED
+        self.rejected += 1
+        return QUEUE_FULL
+
+    def stats(self) -> dict:
+        """队列深度与溢出计数快照。"""
+        return {
+            "depth": self.qsize(),
+            "control": len(self._control),
+            "maxsize": self.maxsize,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+        }
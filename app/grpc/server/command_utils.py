@@ -8,7 +8,6 @@ import time
 from app.grpc.api.Protobuf.Enum import Retcode_pb2, CommandTypes_pb2
 from app.grpc.api.Protobuf.Server import ClientCommandDeliverScRsp_pb2
 import logging
-from .stream_timeout import get_with_timeout
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +32,8 @@ async def run_command_loop(servicer, request_iterator, queue, tid, cuid):
                 pong = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
                     RetCode=Retcode_pb2.Success, Type=CommandTypes_pb2.Pong
                 )
-                await queue.put(pong)
+                # 控制通道：优先于积压指令下发，且不会阻塞上行读取
+                queue.offer(pong)
             else:
                 logger.info(
                     "指令流上行: 收到客户端指令 type=%s (tid=%s, cuid=%s)",
@@ -43,22 +43,26 @@ async def run_command_loop(servicer, request_iterator, queue, tid, cuid):
                 )
 
     task = asyncio.create_task(read_task())
+    # 登记到共享空闲时间轮，超时后 queue.get() 抛出 TimeoutError，防止 TCP 半开连接永久阻塞
+    servicer.idle.register(queue, queue.expire)
     try:
         while True:
-            # 使用带超时的读取，防止 TCP 半开连接永久阻塞
-            msg = await get_with_timeout(queue)
+            msg = await queue.get()
+            servicer.idle.touch(queue)
             if getattr(msg, "Type", None) == CommandTypes_pb2.Pong:
                 logger.debug("指令流下发: 返回心跳 Pong (tid=%s, cuid=%s)", tid, cuid)
             else:
                 cmd_type = getattr(msg, "Type", "Unknown")
                 logger.info(
-                    "指令流下发: 推送指令 type=%s (tid=%s, cuid=%s)",
+                    "指令流下发: 推送指令 type=%s (tid=%s, cuid=%s, 积压=%d)",
                     cmd_type,
                     tid,
                     cuid,
+                    queue.qsize(),
                 )
             yield msg
-            queue.task_done()
     except (asyncio.CancelledError, asyncio.TimeoutError) as e:
         logger.warning("gRPC 流异常结束: type=%s, 错误=%s", type(e).__name__, str(e))
         task.cancel()
+    finally:
+        servicer.idle.unregister(queue)
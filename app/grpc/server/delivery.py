@@ -0,0 +1,19 @@
+"""指令投递结果定义。
+
+统一单播 / 广播接口返回给调用方的逐客户端投递状态。
+"""
+
+# 已放入本节点指令流队列
+DELIVERED = "delivered"
+# 已转发至持有指令流的远端节点
+FORWARDED = "forwarded"
+# 队列中已有相同指令待下发，本次合并
+COALESCED = "coalesced"
+# 客户端离线，已存入离线信箱待上线后回放
+STORED = "stored"
+# 客户端无活跃指令流
+OFFLINE = "offline"
+# 客户端未注册，指令未暂存
+NOT_FOUND = "not_found"
+# 客户端队列已满（慢客户端或半开连接）
+QUEUE_FULL = "queue_full"
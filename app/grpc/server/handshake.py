@@ -4,6 +4,7 @@
 """
 
 import logging
+import grpc
 from sqlalchemy import select
 
 from app.models.database import AsyncSessionLocal, ClientRecord
@@ -11,6 +12,7 @@ from app.grpc.api.Protobuf.Client import HandshakeScReq_pb2
 from app.grpc.api.Protobuf.Server import HandshakeScRsp_pb2
 from app.grpc.api.Protobuf.Enum import Retcode_pb2
 from app.grpc.api.Protobuf.Service import Handshake_pb2_grpc
+from app.grpc.session.decrypt_pool import DecryptOverloaded
 from .helpers import get_tenant_id_safe
 
 logger = logging.getLogger(__name__)
@@ -43,7 +45,18 @@ class HandshakeServicer(Handshake_pb2_grpc.HandshakeServicer):
                 Retcode=Retcode_pb2.InvalidRequest
             )
 
-        decrypted = self._sm.decrypt_challenge(request.ChallengeTokenEncrypted)
+        try:
+            decrypted = await self._sm.decrypt_challenge_async(
+                request.ChallengeTokenEncrypted
+            )
+        except DecryptOverloaded:
+            logger.warning("握手解密排队已满，拒绝客户端: %s", cuid)
+            await context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED, "握手请求过多，请稍后重试"
+            )
+            return HandshakeScRsp_pb2.HandshakeScBeginHandShakeRsp(
+                Retcode=Retcode_pb2.ServerInternalError
+            )
         if decrypted is None:
             return HandshakeScRsp_pb2.HandshakeScBeginHandShakeRsp(
                 Retcode=Retcode_pb2.ServerInternalError
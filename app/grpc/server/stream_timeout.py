@@ -1,25 +1,94 @@
 """gRPC 流空闲超时工具。
 
-封装带超时的队列读取，防止 TCP 半开连接导致的资源泄漏。
+所有指令流共享一个按刻度分桶的时间轮：每条流只记录最近活动时间，
+后台任务每个刻度批量处理到期桶并通知超时流结束，
+替代每次读取队列都创建计时器的 asyncio.wait_for，防止 TCP 半开连接导致的资源泄漏。
 """
 
 import asyncio
-from typing import Any
+import logging
+import math
+import time
+from typing import Callable, Hashable
+
+logger = logging.getLogger(__name__)
 
 # 流空闲超时（秒）：客户端若在此时间内无心跳则断开
 STREAM_IDLE_TIMEOUT = 120
+# 时间轮刻度（秒）：超时判定精度
+WHEEL_TICK = 1.0
 
 
-async def get_with_timeout(
-    queue: asyncio.Queue, timeout: float = STREAM_IDLE_TIMEOUT
-) -> Any:
-    """从队列中读取一条消息，超时则抛出 TimeoutError。
-
-    Args:
-        queue: 异步消息队列。
-        timeout: 最大等待秒数。
+class IdleTimerWheel:
+    """共享空闲计时时间轮。
 
-    Raises:
-        asyncio.TimeoutError: 超过空闲时间限制。
+    活动刷新仅更新截止时间；到期桶被处理时，截止时间已延后的流
+    重新挂到新的桶中，因此每条流每个超时周期最多迁移一次。
+    超时通知后流仍保持登记，若其后仍有活动则重新计时。
     """
-    return await asyncio.wait_for(queue.get(), timeout=timeout)
+
+    def __init__(self, timeout: float = STREAM_IDLE_TIMEOUT, tick: float = WHEEL_TICK):
+        self._timeout = timeout
+        self._tick = tick
+        self._deadlines: dict[Hashable, float] = {}
+        self._callbacks: dict[Hashable, Callable[[], None]] = {}
+        self._buckets: dict[int, list] = {}
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def _schedule(self, key: Hashable, deadline: float) -> None:
+        """将流挂到截止时间所在的桶。"""
+        self._buckets.setdefault(math.ceil(deadline / self._tick), []).append(key)
+
+    def _arm(self, key: Hashable) -> None:
+        """开始计时并确保后台任务运行。"""
+        deadline = time.monotonic() + self._timeout
+        self._deadlines[key] = deadline
+        self._schedule(key, deadline)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def register(self, key: Hashable, on_expire: Callable[[], None]) -> None:
+        """登记一条流，超时时调用 on_expire。"""
+        self._callbacks[key] = on_expire
+        self._arm(key)
+
+    def touch(self, key: Hashable) -> None:
+        """记录流活动，顺延其截止时间。"""
+        if key in self._deadlines:
+            self._deadlines[key] = time.monotonic() + self._timeout
+        elif key in self._callbacks:
+            self._arm(key)
+
+    def unregister(self, key: Hashable) -> None:
+        """注销流（桶中残留条目在处理时跳过）。"""
+        self._deadlines.pop(key, None)
+        self._callbacks.pop(key, None)
+
+    async def _run(self) -> None:
+        """后台循环：每个刻度处理一次到期桶，无登记流时退出。"""
+        while self._deadlines:
+            await asyncio.sleep(self._tick)
+            self.sweep(time.monotonic())
+
+    def sweep(self, now: float) -> int:
+        """批量处理所有到期桶，返回本轮超时的流数量。"""
+        due = math.floor(now / self._tick)
+        expired = []
+        for slot in [s for s in self._buckets if s <= due]:
+            for key in self._buckets.pop(slot):
+                deadline = self._deadlines.get(key)
+                if deadline is None:
+                    continue
+                if deadline <= now:
+                    expired.append(key)
+                else:
+                    self._schedule(key, deadline)
+        for key in expired:
+            del self._deadlines[key]
+            self._callbacks[key]()
+        if expired:
+            logger.info("指令流空闲超时: 本轮断开 %d 条", len(expired))
+        return len(expired)
@@ -36,4 +36,5 @@ async def handle_unregister(sm, request, context):
             await db.delete(rec)
             await db.commit()
     await sm.set_client_offline(tid, real_cuid)
+    await sm.destroy_session(sid)
     return ClientRegisterScRsp_pb2.ClientRegisterScRsp(Retcode=Retcode_pb2.Success)
@@ -0,0 +1,12 @@
+"""当前 RPC 已解析的会话上下文。
+
+拦截器解析 session 后写入 (sid, 会话信息)，同一 RPC 内
+Servicer 再次查询同一 sid 时直接复用，不再访问 Redis。
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+
+session_ctx: ContextVar[Optional[tuple[str, dict]]] = ContextVar(
+    "grpc_session", default=None
+)
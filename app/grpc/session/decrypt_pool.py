@@ -0,0 +1,132 @@
+"""挑战令牌解密进程池。
+
+pgpy 的 RSA 解密为纯 Python 实现，单次耗时数十毫秒，若在事件循环内执行
+会阻塞所有指令流与 HTTP 请求。解密交由有界进程池完成：每个工作进程
+启动时加载一次 GPGKeyManager（含快速解密引擎）；并发数受信号量限制，
+排队数超过上限时直接拒绝，避免重启后大批客户端同时握手时积压无界增长。
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 工作进程数
+DECRYPT_WORKERS = int(
+    os.environ.get("CIMS_DECRYPT_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# 排队等待解密的请求上限（不含正在解密的请求）
+DECRYPT_MAX_PENDING = int(os.environ.get("CIMS_DECRYPT_MAX_PENDING", "1024"))
+
+_worker_km = None
+
+
+class DecryptOverloaded(Exception):
+    """解密排队已满。"""
+
+
+def _init_worker(key_file: str) -> None:
+    """工作进程初始化：加载私钥。"""
+    from .key_management import GPGKeyManager
+
+    global _worker_km
+    _worker_km = GPGKeyManager(key_file)
+
+
+def _decrypt(encrypted: str):
+    """在工作进程内解密挑战令牌，失败时返回 None。"""
+    return _worker_km.decrypt(encrypted)
+
+
+class DecryptPool:
+    """有界解密进程池，带准入排队与耗时统计。"""
+
+    def __init__(
+        self,
+        key_file: str,
+        workers: int = DECRYPT_WORKERS,
+        max_pending: int = DECRYPT_MAX_PENDING,
+    ):
+        self._key_file = os.path.abspath(key_file)
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor = None
+        self._slots = None
+        self._waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_ms_total = 0.0
+        self.decrypt_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.decrypt_ms_max = 0.0
+
+    def _ensure_started(self) -> None:
+        """首次使用时创建进程池（spawn 启动，避免复制事件循环状态）。"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._key_file,),
+            )
+            self._slots = asyncio.Semaphore(self._workers)
+
+    async def decrypt(self, encrypted: str):
+        """在进程池中解密挑战令牌。
+
+        Raises:
+            DecryptOverloaded: 排队请求已达上限。
+        """
+        self._ensure_started()
+        if self._slots.locked() and self._waiting >= self._max_pending:
+            self.rejected += 1
+            raise DecryptOverloaded()
+        queued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, _decrypt, encrypted)
+        finally:
+            self._slots.release()
+        done = time.perf_counter()
+        self._record((started - queued) * 1000, (done - started) * 1000)
+        if result is None:
+            logger.error("挑战令牌解密失败")
+        return result
+
+    def _record(self, wait_ms: float, decrypt_ms: float) -> None:
+        """累计排队与解密耗时。"""
+        self.completed += 1
+        self.wait_ms_total += wait_ms
+        self.decrypt_ms_total += decrypt_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        self.decrypt_ms_max = max(self.decrypt_ms_max, decrypt_ms)
+
+    def shutdown(self) -> None:
+        """关闭进程池，取消尚未开始的任务。"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """排队、拒绝数量与平均/最大耗时。"""
+        n = self.completed or 1
+        return {
+            "workers": self._workers,
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_ms_avg": round(self.wait_ms_total / n, 3),
+            "wait_ms_max": round(self.wait_ms_max, 3),
+            "decrypt_ms_avg": round(self.decrypt_ms_total / n, 3),
+            "decrypt_ms_max": round(self.decrypt_ms_max, 3),
+        }
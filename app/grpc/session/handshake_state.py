@@ -16,9 +16,5 @@ async def store_handshake_challenge(tenant_id: str, cuid: str, token: str):
 
 
 async def pop_handshake_challenge(tenant_id: str, cuid: str) -> str:
-    """提取并销毁待确认的令牌。"""
-    rd, key = get_redis(), f"handshake:{tenant_id}:{cuid}"
-    val = await rd.get(key)
-    if val:
-        await rd.delete(key)
-    return val
+    """提取并销毁待确认的令牌（GETDEL 原子操作，令牌只能被取出一次）。"""
+    return await get_redis().getdel(f"handshake:{tenant_id}:{cuid}")
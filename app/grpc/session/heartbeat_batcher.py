@@ -0,0 +1,131 @@
+"""心跳批量写入器。
+
+Ping 仅在内存中记录最近心跳时间，后台任务定期将累积的心跳
+按租户分组，通过单次 Redis 管道批量刷新在线记录与租户在线索引，
+替代每次心跳两次往返的写入；每个客户端每分钟至多写一次在线历史位。
+本节点的客户端状态归属于登记它的指令流（流令牌），重连后旧流的清理不会丢弃新流的状态。
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+
+from app.core.config import REDIS_DB_SESSION
+from app.core.redis.accessor import get_redis
+from .online_status import queue_heartbeats
+from .uptime import queue_uptime_marks
+
+logger = logging.getLogger(__name__)
+
+# 批量刷新间隔（秒）
+FLUSH_INTERVAL = 0.3
+
+
+class HeartbeatBatcher:
+    """聚合心跳并按固定间隔管道化刷新到 Redis。"""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self._interval = interval
+        self._pending: dict[tuple[str, str], float] = {}
+        self._ips: dict[tuple[str, str], str] = {}
+        self._streams: dict[tuple[str, str], str] = {}
+        self._marked: dict[tuple[str, str], int] = {}
+        self._lock = asyncio.Lock()
+        self._task = None
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.flushes = 0
+
+    def touch(self, tid: str, cuid: str) -> None:
+        """记录一次心跳，首次调用时启动后台刷新任务。"""
+        self._pending[(tid, cuid)] = time.time()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def track(self, tid: str, cuid: str, token: str, ip: str) -> None:
+        """记录本节点指令流的令牌与客户端 IP，心跳刷新时一并续期在线 IP。"""
+        self._streams[(tid, cuid)] = token
+        if ip:
+            self._ips[(tid, cuid)] = ip
+        else:
+            self._ips.pop((tid, cuid), None)
+
+    async def discard(self, tid: str, cuid: str, token: str = "") -> bool:
+        """丢弃客户端未刷新的心跳（等待进行中的刷新完成，避免离线后被复活）。
+
+        Args:
+            token: 指令流令牌；与当前登记的流不符时保留状态，为空时强制丢弃。
+
+        Returns:
+            是否已丢弃。
+        """
+        key = (tid, cuid)
+        async with self._lock:
+            if token and self._streams.get(key) != token:
+                return False
+            self._pending.pop(key, None)
+            self._ips.pop(key, None)
+            self._marked.pop(key, None)
+            self._streams.pop(key, None)
+        return True
+
+    async def _run(self) -> None:
+        """后台循环：按间隔刷新，无待写心跳时退出。"""
+        while self._pending:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("心跳批量刷新失败: %s", e)
+
+    async def flush(self) -> None:
+        """将累积心跳通过单次管道写入 Redis。"""
+        async with self._lock:
+            batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            start = time.perf_counter()
+            by_tenant: dict[str, dict[str, float]] = {}
+            ips_by_tenant: dict[str, dict[str, float]] = {}
+            marks_by_tenant: dict[str, dict[str, float]] = {}
+            for (tid, cuid), seen in batch.items():
+                by_tenant.setdefault(tid, {})[cuid] = seen
+                ip = self._ips.get((tid, cuid))
+                if ip:
+                    ips_by_tenant.setdefault(tid, {})[ip] = seen
+                minute = int(seen // 60)
+                if self._marked.get((tid, cuid)) != minute:
+                    self._marked[(tid, cuid)] = minute
+                    marks_by_tenant.setdefault(tid, {})[cuid] = seen
+            async with get_redis(REDIS_DB_SESSION).pipeline(transaction=False) as pipe:
+                for tid, beats in by_tenant.items():
+                    queue_heartbeats(pipe, tid, beats, ips_by_tenant.get(tid))
+                for tid, marks in marks_by_tenant.items():
+                    queue_uptime_marks(pipe, tid, marks)
+                await pipe.execute()
+            self.last_batch_size = len(batch)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+        logger.debug(
+            "心跳批量刷新: 条数=%d, 耗时=%.2fms",
+            self.last_batch_size,
+            self.last_flush_ms,
+        )
+
+    async def stop(self) -> None:
+        """停止后台任务并刷新剩余心跳。"""
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        await self.flush()
+
+    def stats(self) -> dict:
+        """最近一次刷新的批量大小与耗时。"""
+        return {
+            "pending": len(self._pending),
+            "batch_size": self.last_batch_size,
+            "flush_ms": round(self.last_flush_ms, 3),
+            "flushes": self.flushes,
+        }
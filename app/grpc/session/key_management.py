@@ -1,6 +1,7 @@
 """GPG 密钥管理。
 
 负责系统级的非对称加密密钥生成、文件存储以及挑战令牌的解密验证。
+解密优先走 pgp_fast 快速引擎（仅支持 PKESK + SEIPD 布局），其余报文回退 pgpy。
 """
 
 import os
@@ -13,17 +14,28 @@ from pgpy.constants import (
     SymmetricKeyAlgorithm,
 )
 
+from .pgp_fast import FastDecryptKey, Unsupported, fast_decrypt
+
 logger = logging.getLogger(__name__)
 
+# 是否启用快速解密引擎（设为 0 时始终使用 pgpy）
+FAST_DECRYPT = os.environ.get("CIMS_PGP_FAST", "1") != "0"
+
 
 class GPGKeyManager:
     """内部辅助：负责 RSA 密钥对的持久化与解密逻辑。"""
 
-    def __init__(self, key_file: str):
+    def __init__(self, key_file: str, *, fast: bool = FAST_DECRYPT):
         self._key_file = key_file
         self.private_key = None
         self.public_key_armor = ""
         self._load_or_generate()
+        self._fast_key = None
+        if fast:
+            try:
+                self._fast_key = FastDecryptKey(self.private_key)
+            except Exception as e:
+                logger.warning("快速解密引擎不可用，使用 pgpy: %s", e)
 
     def _load_or_generate(self):
         """从文件系统加载密钥，不存在或损坏则创建一个 2048 位 RSA 密钥。"""
@@ -49,6 +61,14 @@ class GPGKeyManager:
 
     def decrypt(self, encrypted: str) -> str:
         """解密客户端发回的加密挑战令牌。"""
+        if self._fast_key is not None:
+            try:
+                return fast_decrypt(self._fast_key, encrypted)
+            except Unsupported:
+                pass
+            except Exception as e:
+                # 快速路径的任何意外错误都回退 pgpy，由其给出最终结果
+                logger.warning("快速解密异常，回退 pgpy: %r", e)
         try:
             msg = pgpy.PGPMessage.from_blob(encrypted)
             raw = self.private_key.decrypt(msg).message
@@ -1,16 +1,29 @@
 """Cyrene_MSP 会话管理器入口。
 
 组合密钥系统、握手协议及在线状态，为 gRPC Servicer 提供统一接口。
+会话映射不可变，解析结果在进程内 LRU 缓存，销毁时经 Pub/Sub 通知各节点失效。
 """
 
 import os
+from app.core.lru_cache import LRUCache
+from app.core.redis.invalidation import invalidation_bus
 from .key_management import GPGKeyManager
+from .decrypt_pool import DecryptPool
 from .handshake_state import store_handshake_challenge, pop_handshake_challenge
-from .session_state import create_new_session, get_session_info
+from .session_state import create_new_session, destroy_session, get_session_info
+from .context import session_ctx
+from .heartbeat_batcher import HeartbeatBatcher
+from .online_ips import evict_ip
 from . import online_status
 
 KEY_FILE = os.environ.get("CIMS_KEY_FILE", "cims_server.key")
 
+# 会话缓存：有效期远短于 SESSION_TTL，Redis 中过期的会话至多再被接受 5 分钟
+SESSION_CACHE_TTL = 300
+SESSION_CACHE_SIZE = 50000
+# 会话失效广播主题
+SESSION_TOPIC = "grpc_session"
+
 
 class SessionManager:
     """核心会话逻辑封装类。"""
@@ -20,6 +33,20 @@ class SessionManager:
         self._km = GPGKeyManager(path)
         self.public_key_armor = self._km.public_key_armor
         self._private_key = self._km.private_key
+        self.decryptor = DecryptPool(path)
+        self.heartbeats = HeartbeatBatcher()
+        self._sessions = LRUCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+        invalidation_bus.subscribe(
+            SESSION_TOPIC, self._sessions.discard, self._sessions.clear
+        )
+
+    async def close(self):
+        """停止心跳写入器与解密进程池，并注销会话失效订阅。"""
+        invalidation_bus.unsubscribe(
+            SESSION_TOPIC, self._sessions.discard, self._sessions.clear
+        )
+        await self.heartbeats.stop()
+        self.decryptor.shutdown()
 
     def decrypt_challenge(self, token):
         """解密挑战令牌。"""
@@ -27,6 +54,12 @@ class SessionManager:
             return None
         return self._km.decrypt(token)
 
+    async def decrypt_challenge_async(self, token):
+        """在解密进程池中解密挑战令牌，不阻塞事件循环。"""
+        if self._private_key is None:
+            return None
+        return await self.decryptor.decrypt(token)
+
     async def store_pending_handshake(self, tid, cuid, token):
         """记录待办握手。"""
         await store_handshake_challenge(tid, cuid, token)
@@ -44,26 +77,61 @@ class SessionManager:
         pending = await pop_handshake_challenge(tid, cuid)
         return await create_new_session(tid, cuid) if pending and accepted else None
 
+    async def get_session(self, sid) -> dict:
+        """解析会话：优先复用本次 RPC 已解析结果，其次进程缓存，最后查询 Redis。"""
+        if not sid:
+            return {}
+        current = session_ctx.get()
+        if current and current[0] == sid:
+            return current[1]
+        info = self._sessions.get(sid)
+        if info is None:
+            info = await get_session_info(sid)
+            if info:
+                self._sessions.put(sid, info)
+        return info
+
+    async def destroy_session(self, sid):
+        """销毁会话并通知所有节点丢弃缓存。"""
+        await destroy_session(sid)
+        await invalidation_bus.publish(SESSION_TOPIC, sid)
+
     async def validate_session(self, sid):
         """根据 Session ID 查询关联的客户端 UID。"""
-        return (await get_session_info(sid)).get("cuid")
+        return (await self.get_session(sid)).get("cuid")
 
     async def get_session_tenant(self, sid):
         """根据 Session ID 查询关联的租户 ID。"""
-        return (await get_session_info(sid)).get("tenant_id")
+        return (await self.get_session(sid)).get("tenant_id")
 
     async def set_client_online(self, tid, cuid, ip=""):
-        """标记指定客户端上线并记录 IP 地址。"""
-        await online_status.set_online(tid, cuid, ip)
-
-    async def set_client_offline(self, tid, cuid):
-        """标记指定客户端离线。"""
-        await online_status.set_offline(tid, cuid)
+        """标记指定客户端上线并记录 IP 地址，返回本次指令流的令牌。"""
+        token, released = await online_status.set_online(tid, cuid, ip)
+        self.heartbeats.track(tid, cuid, token, online_status.clean_ip(ip))
+        if released:
+            evict_ip(tid, released)
+        return token
+
+    async def set_client_offline(self, tid, cuid, token=""):
+        """标记指定客户端离线。
+
+        传入上线时取得的流令牌时，仅当该流仍是客户端的当前流才生效，
+        避免客户端重连后旧流的清理误删新流的在线状态；不传时强制离线。
+        """
+        if not await self.heartbeats.discard(tid, cuid, token):
+            return
+        released = await online_status.set_offline(tid, cuid, token)
+        if released:
+            evict_ip(tid, released)
 
     async def get_all_clients_status(self, tid):
         """获取租户下所有客户端的在线状态列表。"""
         return await online_status.get_full_client_status(tid)
 
+    async def get_clients_presence(self, tid, cuids):
+        """批量查询客户端在线状态，返回 uid → IP（在线）或 None（离线）。"""
+        return await online_status.get_presence(tid, cuids)
+
     async def get_all_online_ips(self, tid):  # pragma: no cover
         """获取租户下所有在线客户端的 IP 集合。"""
         return await online_status.get_tenant_online_ips(tid)
@@ -76,5 +144,5 @@ class SessionManager:
         return await get_redis(REDIS_DB_SESSION).exists(f"online:{tid}:{cuid}") > 0
 
     async def update_heartbeat(self, tid, cuid):
-        """刷新客户端心跳，延长在线状态有效期。"""
-        await online_status.set_online(tid, cuid, "")
+        """刷新客户端心跳，延长在线状态有效期（由批量写入器异步落库）。"""
+        self.heartbeats.touch(tid, cuid)
@@ -0,0 +1,42 @@
+"""租户在线 IP 成员判定。
+
+资源令牌按 IP 鉴权时只需判断单个 IP 是否在线：直接读取
+`online_ips:{tid}` 有序集合中该 IP 的心跳时间（O(1)），与租户规模无关。
+肯定结果在进程内缓存数秒，同一学校的批量下载无需重复访问 Redis；
+否定结果不缓存，客户端上线后即可下载。
+"""
+
+import time
+
+from app.core.config import REDIS_DB_SESSION
+from app.core.redis.accessor import get_redis
+from .online_status import ONLINE_TTL, online_ips_key
+
+# 肯定结果缓存有效期（秒）
+CACHE_TTL = 5.0
+# 缓存条目上限，超出时整体清空
+CACHE_MAX = 10000
+
+_cache: dict[tuple[str, str], float] = {}
+
+
+async def is_tenant_ip_online(tid: str, ip: str) -> bool:
+    """判断 IP 是否属于该租户的某个在线客户端。"""
+    if not ip:
+        return False
+    key, now = (tid, ip), time.monotonic()
+    if _cache.get(key, 0.0) > now:
+        return True
+    score = await get_redis(REDIS_DB_SESSION).zscore(online_ips_key(tid), ip)
+    if score is None or score < time.time() - ONLINE_TTL:
+        _cache.pop(key, None)
+        return False
+    if len(_cache) >= CACHE_MAX:
+        _cache.clear()
+    _cache[key] = now + CACHE_TTL
+    return True
+
+
+def evict_ip(tid: str, ip: str) -> None:
+    """IP 离线时清除本进程缓存。"""
+    _cache.pop((tid, ip), None)
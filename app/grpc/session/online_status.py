@@ -1,53 +1,172 @@
 """终端在线心跳状态检测。
 
 利用 Redis 实现分布式的在线状态维持、IP 抓取以及租户维度的批量查询。
+每个租户维护在线索引：`presence:{tid}`（有序集合，uid → 最近心跳时间）
+与 `presence_ip:{tid}`（哈希，uid → IP），租户查询只访问本租户的索引，
+单次往返完成，不再 SCAN 整个会话库。
+在线 IP 另行维护于 `online_ips:{tid}`（有序集合，IP → 最近心跳时间）
+与 `online_ip_refs:{tid}`（哈希，IP → 共用该 IP 的在线客户端数）。
+每条指令流上线时生成流令牌，记入 `presence_stream:{tid}`（哈希，uid → 令牌与 IP）；
+下线按令牌比较后移除，客户端重连后旧流的延迟清理不会误删新流的在线状态。
+未正常下线（如节点崩溃）的客户端在读取在线索引时按心跳过期清理，
+其 IP 索引、流令牌与 IP 引用一并释放。
 """
 
+import secrets
+import time
+
 from app.core.config import REDIS_DB_SESSION
 from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import (
+    presence_release,
+    queue_presence_claim,
+    queue_presence_sweep,
+)
 from .peer_parser import parse_grpc_peer_ip
+from .uptime import queue_uptime_marks
 
 ONLINE_TTL = 60
 
 
-async def set_online(tid: str, cuid: str, ip_raw: str = ""):
-    """标记客户端在线并记录 IP。"""
-    rd = get_redis(REDIS_DB_SESSION)
-    key = f"online:{tid}:{cuid}"
-    await rd.hset(key, mapping={"status": "online", "ip": ip_raw})
-    await rd.expire(key, ONLINE_TTL)
+def _presence_key(tid: str) -> str:
+    """租户在线索引（有序集合）键。"""
+    return f"presence:{tid}"
+
+
+def _presence_ip_key(tid: str) -> str:
+    """租户在线 IP 索引（哈希）键。"""
+    return f"presence_ip:{tid}"
+
+
+def online_ips_key(tid: str) -> str:
+    """租户在线 IP 集合（有序集合）键。"""
+    return f"online_ips:{tid}"
+
+
+def _ip_refs_key(tid: str) -> str:
+    """租户在线 IP 引用计数（哈希）键。"""
+    return f"online_ip_refs:{tid}"
+
+
+def _stream_key(tid: str) -> str:
+    """租户流令牌索引（哈希）键。"""
+    return f"presence_stream:{tid}"
+
+
+def clean_ip(raw_ip: str) -> str:
+    """兼容旧格式（ipv4:x.x.x.x:port）和新格式（直接 IP）。"""
+    if raw_ip.startswith(("ipv4:", "ipv6:")):
+        return parse_grpc_peer_ip(raw_ip)
+    return raw_ip
+
+
+def _ip_keys(tid: str) -> list[str]:
+    """在线状态脚本共用的键：流令牌索引、IP 引用计数、在线 IP 集合。"""
+    return [_stream_key(tid), _ip_refs_key(tid), online_ips_key(tid)]
 
 
-async def set_offline(tid: str, cuid: str):
-    """显式移除客户端在线记录。"""
-    await get_redis(REDIS_DB_SESSION).delete(f"online:{tid}:{cuid}")
+def queue_heartbeats(
+    pipe, tid: str, beats: dict[str, float], ips: dict[str, float] | None = None
+) -> None:
+    """向管道追加一批心跳写入：刷新在线记录与租户索引。
+
+    Args:
+        pipe: Redis 管道。
+        tid: 租户 ID。
+        beats: uid → 心跳时间戳。
+        ips: 清洗后 IP → 心跳时间戳，用于刷新在线 IP 集合。
+    """
+    for cuid, seen in beats.items():
+        key = f"online:{tid}:{cuid}"
+        pipe.hset(key, mapping={"status": "online", "last_seen": int(seen)})
+        pipe.expire(key, ONLINE_TTL)
+    pipe.zadd(_presence_key(tid), beats)
+    pipe.expire(_presence_key(tid), ONLINE_TTL)
+    pipe.expire(_presence_ip_key(tid), ONLINE_TTL)
+    pipe.expire(_stream_key(tid), ONLINE_TTL)
+    if ips:
+        pipe.zadd(online_ips_key(tid), ips)
+        pipe.expire(online_ips_key(tid), ONLINE_TTL)
+        pipe.expire(_ip_refs_key(tid), ONLINE_TTL)
+
+
+async def set_online(tid: str, cuid: str, ip_raw: str = "") -> tuple[str, str]:
+    """标记客户端在线并记录 IP（与租户索引原子更新），接管同一客户端的旧流。
+
+    Returns:
+        (流令牌, 因旧流被接管而移出在线 IP 集合的 IP，未移出为空串)。
+    """
+    now, ip = time.time(), clean_ip(ip_raw)
+    token = secrets.token_hex(8)
+    async with get_redis(REDIS_DB_SESSION).pipeline(transaction=True) as pipe:
+        pipe.hset(f"online:{tid}:{cuid}", "ip", ip_raw)
+        pipe.hset(_presence_ip_key(tid), cuid, ip_raw)
+        await queue_presence_claim(pipe, _ip_keys(tid), cuid, token, ip)
+        queue_heartbeats(pipe, tid, {cuid: now}, {ip: now} if ip else None)
+        queue_uptime_marks(pipe, tid, {cuid: now})
+        res = await pipe.execute()
+    return token, res[2]
+
+
+async def set_offline(tid: str, cuid: str, token: str = "") -> str | None:
+    """移除客户端在线记录及其索引项。
+
+    Args:
+        token: 上线时取得的流令牌；已被重连接管的旧流不做修改，为空时强制移除。
+
+    Returns:
+        因最后一个使用者下线而移出在线 IP 集合的 IP，否则为 None。
+    """
+    keys = _ip_keys(tid) + [
+        f"online:{tid}:{cuid}",
+        _presence_key(tid),
+        _presence_ip_key(tid),
+    ]
+    # 同一 IP 已无其他在线客户端（如同一机房 NAT 出口）时返回该 IP
+    return (
+        await presence_release(get_redis(REDIS_DB_SESSION), keys, cuid, token) or None
+    )
+
+
+async def _online_members(tid: str) -> dict[str, str]:
+    """单次往返读取租户在线索引，返回 uid → 原始 IP（清理心跳过期项）。"""
+    cutoff = time.time() - ONLINE_TTL
+    keys = _ip_keys(tid) + [_presence_key(tid), _presence_ip_key(tid)]
+    async with get_redis(REDIS_DB_SESSION).pipeline(transaction=True) as pipe:
+        await queue_presence_sweep(pipe, keys, cutoff)
+        pipe.zrange(_presence_key(tid), 0, -1)
+        pipe.hgetall(_presence_ip_key(tid))
+        _, uids, ips = await pipe.execute()
+    return {uid: ips.get(uid, "") for uid in uids}
+
+
+async def get_presence(tid: str, cuids: list[str]) -> dict[str, str | None]:
+    """批量查询多个客户端的在线状态（单次往返）。
+
+    Returns:
+        uid → 原始 IP（在线）或 None（离线）。
+    """
+    if not cuids:
+        return {}
+    cutoff = time.time() - ONLINE_TTL
+    async with get_redis(REDIS_DB_SESSION).pipeline(transaction=False) as pipe:
+        pipe.zmscore(_presence_key(tid), cuids)
+        pipe.hmget(_presence_ip_key(tid), cuids)
+        scores, ips = await pipe.execute()
+    return {
+        cuid: (ip or "") if score is not None and score >= cutoff else None
+        for cuid, score, ip in zip(cuids, scores, ips)
+    }
 
 
 async def get_tenant_online_ips(tid: str) -> set[str]:
     """获取指定租户下所有在线客户端的清洗后 IP 集合。"""
-    rd, prefix = get_redis(REDIS_DB_SESSION), f"online:{tid}:"
-    ips = set()
-    async for key in rd.scan_iter(match=f"{prefix}*"):  # pragma: no cover
-        data = await rd.hgetall(key)
-        raw_ip = data.get("ip", "")
-        # 兼容旧格式（ipv4:x.x.x.x:port）和新格式（直接 IP）
-        ip = (
-            parse_grpc_peer_ip(raw_ip)
-            if raw_ip.startswith(("ipv4:", "ipv6:"))
-            else raw_ip
-        )
-        if ip:
-            ips.add(ip)
-    return ips
+    cutoff = time.time() - ONLINE_TTL
+    rd = get_redis(REDIS_DB_SESSION)
+    return set(await rd.zrangebyscore(online_ips_key(tid), cutoff, "+inf"))
 
 
 async def get_full_client_status(tid: str) -> list:
     """获取租户下所有设备状态（用于控制台展示）。"""
-    rd, prefix = get_redis(REDIS_DB_SESSION), f"online:{tid}:"
-    res = []
-    async for key in rd.scan_iter(match=f"{prefix}*"):
-        data = await rd.hgetall(key)
-        res.append(
-            {"uid": key[len(prefix) :], "status": "online", "ip": data.get("ip", "")}
-        )
-    return res
+    members = await _online_members(tid)
+    return [{"uid": uid, "status": "online", "ip": ip} for uid, ip in members.items()]
@@ -0,0 +1,224 @@
+"""挑战令牌快速解密引擎。
+
+客户端发回的挑战令牌固定为 PKESK（RSA）+ SEIPD（AES-CFB + MDC）结构，
+内含可选压缩的字面数据包。此处只解析这一种布局，直接调用 cryptography
+的 RSA / AES 原语，省去 pgpy 的通用报文解析开销；
+遇到任何不在此布局内的内容抛出 Unsupported，由调用方回退到 pgpy。
+"""
+
+import base64
+import bz2
+import hashlib
+import zlib
+
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+# OpenPGP 包类型
+_TAG_PKESK, _TAG_COMPRESSED, _TAG_SEIPD, _TAG_LITERAL, _TAG_MARKER = 1, 8, 18, 11, 10
+# 对称算法编号 → 密钥长度（字节）
+_AES_KEY_SIZES = {7: 16, 8: 24, 9: 32}
+# 公钥算法：RSA (Encrypt or Sign) / RSA Encrypt-Only
+_RSA_ALGOS = (1, 2)
+_MDC_HEADER = b"\xd3\x14"
+_BLOCK = 16
+
+
+class Unsupported(Exception):
+    """报文不属于快速路径支持的布局。"""
+
+
+class FastDecryptKey:
+    """快速解密所需的私钥材料。"""
+
+    def __init__(self, pgp_key):
+        """从 pgpy 私钥提取 RSA 原语与密钥 ID。"""
+        self._rsa = {}
+        for key in (pgp_key, *pgp_key.subkeys.values()):
+            material = key._key.keymaterial
+            if not hasattr(material, "__privkey__"):
+                continue
+            self._rsa[bytes.fromhex(key.fingerprint.keyid)] = material.__privkey__()
+        if not self._rsa:
+            raise Unsupported("no RSA key material")
+
+    def rsa_candidates(self, key_id: bytes):
+        """按密钥 ID 返回可尝试的 RSA 私钥（通配 ID 时返回全部）。"""
+        if key_id in self._rsa:
+            return [self._rsa[key_id]]
+        return list(self._rsa.values()) if key_id == bytes(8) else []
+
+
+def _unarmor(text: str) -> bytes:
+    """去除 ASCII 装甲，返回二进制报文。"""
+    lines = text.strip().splitlines()
+    if not lines or lines[0].strip() != "-----BEGIN PGP MESSAGE-----":
+        raise Unsupported("not armored")
+    try:
+        start = lines.index("", 1) + 1
+    except ValueError:
+        raise Unsupported("missing armor header terminator")
+    body = []
+    for line in lines[start:]:
+        line = line.strip()
+        if line.startswith("=") or line.startswith("-----END"):
+            break
+        body.append(line)
+    try:
+        return base64.b64decode("".join(body), validate=True)
+    except ValueError:
+        raise Unsupported("bad base64")
+
+
+def _packets(data: bytes):
+    """逐个产出 (tag, body)，支持新旧两种包头及分段长度。"""
+    pos, end = 0, len(data)
+    while pos < end:
+        head = data[pos]
+        pos += 1
+        if not head & 0x80:
+            raise Unsupported("bad packet header")
+        if head & 0x40:
+            tag, body = head & 0x3F, bytearray()
+            while True:
+                if pos >= end:
+                    raise Unsupported("truncated length")
+                first = data[pos]
+                if first < 192:
+                    size, pos = first, pos + 1
+                elif first < 224:
+                    if pos + 1 >= end:
+                        raise Unsupported("truncated length")
+                    size, pos = ((first - 192) << 8) + data[pos + 1] + 192, pos + 2
+                elif first == 255:
+                    if pos + 5 > end:
+                        raise Unsupported("truncated length")
+                    size, pos = int.from_bytes(data[pos + 1 : pos + 5], "big"), pos + 5
+                else:
+                    # 分段长度：本段后仍有后续段
+                    size = 1 << (first & 0x1F)
+                    if pos + 1 + size > end:
+                        raise Unsupported("truncated packet")
+                    body += data[pos + 1 : pos + 1 + size]
+                    pos += 1 + size
+                    continue
+                if pos + size > end:
+                    raise Unsupported("truncated packet")
+                body += data[pos : pos + size]
+                pos += size
+                break
+            yield tag, bytes(body)
+        else:
+            tag, kind = (head >> 2) & 0x0F, head & 0x03
+            if kind == 3:
+                yield tag, data[pos:]
+                return
+            width = 1 << kind
+            if pos + width > end:
+                raise Unsupported("truncated length")
+            size = int.from_bytes(data[pos : pos + width], "big")
+            pos += width
+            if pos + size > end:
+                raise Unsupported("truncated packet")
+            yield tag, data[pos : pos + size]
+            pos += size
+
+
+def _session_key(key: FastDecryptKey, body: bytes):
+    """解密 PKESK 包，返回 (对称算法, 会话密钥)；非本密钥的包返回 None。"""
+    if len(body) < 12 or body[0] != 3 or body[9] not in _RSA_ALGOS:
+        raise Unsupported("unsupported PKESK")
+    key_id = body[1:9]
+    bits = int.from_bytes(body[10:12], "big")
+    mpi = body[12 : 12 + (bits + 7) // 8]
+    for rsa in key.rsa_candidates(key_id):
+        size = (rsa.key_size + 7) // 8
+        try:
+            plain = rsa.decrypt(mpi.rjust(size, b"\x00"), padding.PKCS1v15())
+        except ValueError:
+            continue
+        if len(plain) < 3:
+            raise Unsupported("bad session key")
+        algo, session, checksum = plain[0], plain[1:-2], plain[-2:]
+        if _AES_KEY_SIZES.get(algo) != len(session):
+            raise Unsupported("unsupported symmetric algorithm")
+        if sum(session) & 0xFFFF != int.from_bytes(checksum, "big"):
+            continue
+        return algo, session
+    return None
+
+
+def _decrypt_seipd(session: bytes, body: bytes) -> bytes:
+    """解密 SEIPD 包并校验前缀与 MDC，返回内部报文。"""
+    if not body or body[0] != 1:
+        raise Unsupported("unsupported SEIPD version")
+    decryptor = Cipher(algorithms.AES(session), modes.CFB(bytes(_BLOCK))).decryptor()
+    plain = decryptor.update(body[1:]) + decryptor.finalize()
+    if len(plain) < _BLOCK + 2 + 22:
+        raise Unsupported("SEIPD too short")
+    if plain[_BLOCK - 2 : _BLOCK] != plain[_BLOCK : _BLOCK + 2]:
+        raise Unsupported("prefix check failed")
+    if plain[-22:-20] != _MDC_HEADER:
+        raise Unsupported("missing MDC")
+    if hashlib.sha1(plain[:-20]).digest() != plain[-20:]:
+        raise Unsupported("MDC mismatch")
+    return plain[_BLOCK + 2 : -22]
+
+
+def _literal(data: bytes, depth: int = 0):
+    """从内部报文中取出字面数据，按格式返回 str 或 bytes。"""
+    packets = list(_packets(data))
+    if len(packets) != 1:
+        raise Unsupported("unexpected inner packets")
+    tag, body = packets[0]
+    if tag == _TAG_COMPRESSED and depth == 0:
+        if not body:
+            raise Unsupported("empty compressed packet")
+        algo, payload = body[0], body[1:]
+        try:
+            if algo == 0:
+                inner = payload
+            elif algo == 1:
+                inner = zlib.decompress(payload, -15)
+            elif algo == 2:
+                inner = zlib.decompress(payload)
+            elif algo == 3:
+                inner = bz2.decompress(payload)
+            else:
+                raise Unsupported("unsupported compression")
+        except (zlib.error, OSError, ValueError):
+            raise Unsupported("bad compressed data")
+        return _literal(inner, depth + 1)
+    if tag != _TAG_LITERAL or len(body) < 6:
+        raise Unsupported("expected literal data")
+    fmt, name_len = body[0:1], body[1]
+    if 2 + name_len + 4 > len(body):
+        raise Unsupported("truncated literal header")
+    contents = body[2 + name_len + 4 :]
+    if fmt == b"t":
+        return contents.decode("latin-1")
+    if fmt == b"u":
+        try:
+            return contents.decode("utf-8")
+        except UnicodeDecodeError:
+            raise Unsupported("bad utf-8 literal")
+    return contents
+
+
+def fast_decrypt(key: FastDecryptKey, armored: str):
+    """按 PKESK + SEIPD 布局解密报文。
+
+    Raises:
+        Unsupported: 报文布局超出快速路径范围或校验失败。
+    """
+    session = None
+    for tag, body in _packets(_unarmor(armored)):
+        if tag == _TAG_PKESK:
+            session = session or _session_key(key, body)
+        elif tag == _TAG_MARKER:
+            continue
+        elif tag == _TAG_SEIPD and session:
+            return _literal(_decrypt_seipd(session[1], body))
+        else:
+            raise Unsupported(f"unexpected packet {tag}")
+    raise Unsupported("no decryptable session key")
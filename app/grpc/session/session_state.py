@@ -6,6 +6,7 @@
 import uuid
 from app.core.config import REDIS_DB_SESSION
 from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import hset_expire
 
 SESSION_TTL = 86400  # 24小时有效
 
@@ -15,11 +16,15 @@ async def create_new_session(tenant_id: str, cuid: str) -> str:
     rd = get_redis(REDIS_DB_SESSION)
     sid = str(uuid.uuid4())
     key = f"session:{sid}"
-    await rd.hset(key, mapping={"cuid": cuid, "tenant_id": tenant_id})
-    await rd.expire(key, SESSION_TTL)
+    await hset_expire(rd, key, {"cuid": cuid, "tenant_id": tenant_id}, SESSION_TTL)
     return sid
 
 
+async def destroy_session(session_id: str) -> None:
+    """删除会话记录，使其立即失效。"""
+    await get_redis(REDIS_DB_SESSION).delete(f"session:{session_id}")
+
+
 async def get_session_info(session_id: str) -> dict:
     """根据 ID 检索会话元数据（租户 ID 和客户端 UID）。"""
     if not session_id:
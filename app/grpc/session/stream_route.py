@@ -0,0 +1,36 @@
+"""指令流路由表。
+
+记录每个 `{tid}:{cuid}` 的 ListenCommand 流当前由哪个节点持有，
+供跨进程 / 跨主机的指令总线定位目标节点。
+"""
+
+from typing import Optional
+
+from app.core.config import REDIS_DB_SESSION
+from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import compare_delete
+
+# 路由记录兜底过期时间（秒）：节点崩溃未释放时防止键永久残留
+ROUTE_TTL = 7 * 86400
+
+
+def _key(tid: str, cuid: str) -> str:
+    """构建路由记录的 Redis 键。"""
+    return f"route:{tid}:{cuid}"
+
+
+async def claim_route(tid: str, cuid: str, node_id: str) -> None:
+    """声明本节点持有该客户端的指令流（覆盖旧节点）。"""
+    await get_redis(REDIS_DB_SESSION).set(_key(tid, cuid), node_id, ex=ROUTE_TTL)
+
+
+async def lookup_routes(tid: str, cuids: list[str]) -> list[Optional[str]]:
+    """批量查询多个客户端的持有节点（单次 MGET）。"""
+    if not cuids:
+        return []
+    return await get_redis(REDIS_DB_SESSION).mget([_key(tid, c) for c in cuids])
+
+
+async def release_route(tid: str, cuid: str, node_id: str) -> None:
+    """释放路由记录，仅当其仍指向本节点时原子删除（避免误删重连后的新路由）。"""
+    await compare_delete(get_redis(REDIS_DB_SESSION), _key(tid, cuid), node_id)
@@ -0,0 +1,114 @@
+"""客户端在线历史位图。
+
+每个客户端每天（UTC）一个 Redis 位图 `uptime:{tid}:{cuid}:{YYYYMMDD}`，
+每分钟 1 位、每天 180 字节；心跳写入所在分钟的位，
+报表通过 BITCOUNT / BITFIELD 管道批量读取，无需逐条记录心跳。
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.core.config import REDIS_DB_SESSION
+from app.core.redis.accessor import get_redis
+
+# 位图保留时长（秒）
+UPTIME_RETENTION = 90 * 86400
+MINUTES_PER_DAY = 1440
+# BITFIELD 单次读取的位宽（有符号 64 位整数可容纳的最大无符号宽度）
+_CHUNK = 63
+
+
+def _key(tid: str, cuid: str, day: date) -> str:
+    """构建单日位图的 Redis 键。"""
+    return f"uptime:{tid}:{cuid}:{day:%Y%m%d}"
+
+
+def queue_uptime_marks(pipe, tid: str, marks: dict[str, float]) -> None:
+    """向管道追加在线分钟标记。
+
+    Args:
+        pipe: Redis 管道。
+        tid: 租户 ID。
+        marks: uid → 心跳时间戳，标记该时间所在分钟。
+    """
+    for cuid, ts in marks.items():
+        moment = datetime.fromtimestamp(ts, timezone.utc)
+        key = _key(tid, cuid, moment.date())
+        pipe.setbit(key, moment.hour * 60 + moment.minute, 1)
+        pipe.expire(key, UPTIME_RETENTION)
+
+
+def _minutes_elapsed(day: date, now: datetime) -> int:
+    """该日已经过的分钟数（统计分母），未来日期为 0。"""
+    if day < now.date():
+        return MINUTES_PER_DAY
+    if day > now.date():
+        return 0
+    return now.hour * 60 + now.minute + 1
+
+
+def _timeline(chunks: list[int]) -> list[list[int]]:
+    """将 BITFIELD 读出的整数块转换为在线区间 [起始分钟, 结束分钟)。"""
+    spans, start = [], None
+    for minute in range(MINUTES_PER_DAY):
+        index, offset = divmod(minute, _CHUNK)
+        online = (chunks[index] >> (_CHUNK - 1 - offset)) & 1
+        if online and start is None:
+            start = minute
+        elif not online and start is not None:
+            spans.append([start, minute])
+            start = None
+    if start is not None:
+        spans.append([start, MINUTES_PER_DAY])
+    return spans
+
+
+async def get_uptime(
+    tid: str, cuids: list[str], start: date, days: int, timeline: bool = False
+) -> dict[str, dict]:
+    """批量统计多个客户端在日期区间内的在线率（单次管道往返）。
+
+    Args:
+        tid: 租户 ID。
+        cuids: 客户端 UID 列表。
+        start: 起始日期（UTC）。
+        days: 统计天数。
+        timeline: 是否返回逐日在线区间。
+    """
+    now = datetime.now(timezone.utc)
+    dates = [start + timedelta(days=i) for i in range(days)]
+    offsets = [("u63", i * _CHUNK) for i in range(1, -(-MINUTES_PER_DAY // _CHUNK))]
+    async with get_redis(REDIS_DB_SESSION).pipeline(transaction=False) as pipe:
+        for cuid in cuids:
+            for day in dates:
+                key = _key(tid, cuid, day)
+                if timeline:
+                    pipe.bitfield_ro(key, "u63", 0, items=offsets)
+                else:
+                    pipe.bitcount(key)
+        replies = iter(await pipe.execute())
+
+    result = {}
+    for cuid in cuids:
+        daily, online_total, elapsed_total = [], 0, 0
+        for day in dates:
+            reply = next(replies)
+            online = sum(c.bit_count() for c in reply) if timeline else reply
+            elapsed = _minutes_elapsed(day, now)
+            entry = {
+                "date": day.isoformat(),
+                "online_minutes": online,
+                "uptime": round(online * 100 / elapsed, 2) if elapsed else 0.0,
+            }
+            if timeline:
+                entry["timeline"] = _timeline(reply)
+            daily.append(entry)
+            online_total += online
+            elapsed_total += elapsed
+        result[cuid] = {
+            "online_minutes": online_total,
+            "uptime": (
+                round(online_total * 100 / elapsed_total, 2) if elapsed_total else 0.0
+            ),
+            "daily": daily,
+        }
+    return result
@@ -31,7 +31,15 @@ async def _dispatch(act, args) -> None:
             await create_role(args.code, args.label, args.priority, db)
             print(f"✅ 角色 {args.code} 已创建")
         elif act == "delete":
-            err = await delete_role(args.code, db)
+            from app.core.config import REDIS_DB_CACHE
+            from app.core.redis.pool import close_redis, init_redis
+
+            # 删除角色需递增权限缓存版本
+            await init_redis(dbs=(REDIS_DB_CACHE,))
+            try:
+                err = await delete_role(args.code, db)
+            finally:
+                await close_redis()
             if err:
                 print(f"❌ {err}")
             else:
@@ -7,6 +7,7 @@ import logging
 import secrets
 from app.core.config import REDIS_DB_AUTH
 from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import hset_expire
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +29,7 @@ async def generate_token(
     token = secrets.token_urlsafe(_TOKEN_BYTES)
     key = _key(tenant_id, token)
 
-    await rd.hset(key, mapping={"scope": scope, "tenant_id": tenant_id})
-    await rd.expire(key, ttl)
+    await hset_expire(rd, key, {"scope": scope, "tenant_id": tenant_id}, ttl)
 
     logger.info("Token [%s] created for tenant [%s]", scope, tenant_id or "global")
     return token
@@ -5,9 +5,17 @@
 
 from .checker import check_permission
 from .grants import grant_permission, revoke_permission
+from .cache import (
+    bump_permission_version,
+    get_effective_permissions,
+    get_many_effective_permissions,
+)
 
 __all__ = [
     "check_permission",
     "grant_permission",
     "revoke_permission",
+    "bump_permission_version",
+    "get_effective_permissions",
+    "get_many_effective_permissions",
 ]
@@ -0,0 +1,64 @@
+"""有效权限的版本化缓存。
+
+有效权限按 (user_id, account_id) 缓存在进程内，条目记录生成时的权限版本。
+版本号保存在 Redis：`perm_ver:{account_id}` 随成员、角色或权限覆盖变更递增，
+`perm_ver:*` 随全局角色权限变更递增。每次读取以一次 MGET 比对版本，
+版本不一致即重建，任何节点都不会返回过期的权限集合。
+"""
+
+from app.core.config import REDIS_DB_CACHE
+from app.core.lru_cache import LRUCache
+from app.core.redis.accessor import get_redis
+from app.models.engine import AsyncSessionLocal
+from .effective import EffectivePermissions, load_many_member_permissions
+
+# 有效期（秒）仅用于回收长期不用的条目，正确性由版本号保证
+PERM_CACHE_TTL = 600
+PERM_CACHE_SIZE = 50000
+_GLOBAL = "*"
+
+_cache = LRUCache(PERM_CACHE_SIZE, PERM_CACHE_TTL)
+
+
+def _version_key(scope: str) -> str:
+    """权限版本号键。"""
+    return f"perm_ver:{scope}"
+
+
+async def _versions(account_id: str) -> tuple:
+    """读取全局与账户权限版本号（单次往返）。"""
+    rd = get_redis(REDIS_DB_CACHE)
+    return tuple(await rd.mget(_version_key(_GLOBAL), _version_key(account_id)))
+
+
+async def get_effective_permissions(
+    user_id: str, account_id: str
+) -> EffectivePermissions:
+    """获取有效权限：版本一致时直接命中缓存，否则查库重建。"""
+    return (await get_many_effective_permissions([user_id], account_id))[user_id]
+
+
+async def get_many_effective_permissions(
+    user_ids: list[str], account_id: str
+) -> dict[str, EffectivePermissions]:
+    """批量获取同一账户内多个用户的有效权限（共用一次版本读取，未命中者批量查库）。"""
+    version = await _versions(account_id)
+    result, missing = {}, []
+    for uid in dict.fromkeys(user_ids):
+        entry = _cache.get((uid, account_id))
+        if entry is not None and entry[0] == version:
+            result[uid] = entry[1]
+        else:
+            missing.append(uid)
+    if missing:
+        async with AsyncSessionLocal() as db:
+            loaded = await load_many_member_permissions(missing, account_id, db)
+        for uid, perms in loaded.items():
+            _cache.put((uid, account_id), (version, perms))
+            result[uid] = perms
+    return result
+
+
+async def bump_permission_version(account_id: str | None = None) -> None:
+    """权限相关数据变更后递增版本号；不传账户时递增全局版本（角色权限变更）。"""
+    await get_redis(REDIS_DB_CACHE).incr(_version_key(account_id or _GLOBAL))
@@ -1,7 +1,7 @@
 """权限授予与撤销服务。
 
 对 AccountMember 的指定权限进行显式授予或撤销，
-实现超细粒度的原子级权限控制。
+实现超细粒度的原子级权限控制；变更后递增所属账户的权限版本号。
 """
 
 import uuid
@@ -9,7 +9,20 @@ import uuid
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.account_member import AccountMember
 from app.models.member_permission import MemberPermission
+from .cache import bump_permission_version
+
+
+async def _bump_member_account(member_id: str, db: AsyncSession) -> None:
+    """递增成员所属账户的权限版本号。"""
+    account_id = (
+        await db.execute(
+            select(AccountMember.account_id).where(AccountMember.id == member_id)
+        )
+    ).scalar_one_or_none()
+    if account_id:
+        await bump_permission_version(account_id)
 
 
 async def grant_permission(
@@ -33,6 +46,7 @@ async def grant_permission(
     if existing:
         existing.granted = granted
         await db.commit()
+        await _bump_member_account(member_id, db)
         return existing
     perm = MemberPermission(
         id=str(uuid.uuid4()),
@@ -42,6 +56,7 @@ async def grant_permission(
     )
     db.add(perm)
     await db.commit()
+    await _bump_member_account(member_id, db)
     return perm
 
 
@@ -62,4 +77,5 @@ async def revoke_permission(
         )
     )
     await db.commit()
+    await _bump_member_account(member_id, db)
     return result.rowcount > 0
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.custom_role import CustomRole
 from app.models.permission_def import PermissionDef
 from app.models.role_permission import RolePermission
+from app.services.permission.cache import bump_permission_version
 
 logger = logging.getLogger(__name__)
 
@@ -112,4 +113,5 @@ async def seed_rbac(db: AsyncSession) -> None:
                 )
 
     await db.commit()
+    await bump_permission_version()
     logger.info("RBAC 种子数据初始化完成")
@@ -0,0 +1,146 @@
+"""资源下载内容的进程内字节缓存。
+
+/get 下载的资源内容按 (Schema, 资源表, 名称) 缓存为预序列化的 JSON 字节，
+较大的内容同时保存 gzip 压缩结果；命中时无需打开数据库会话或重新序列化。
+同一资源的并发未命中合并为一次加载（single-flight），避免上课前
+大批客户端同时拉取同一课表时穿透到数据库。
+资源写入、合并、批量操作与删除后经 Pub/Sub 广播失效，各节点同步丢弃。
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.core.lru_cache import LRUCache
+from app.core.redis.invalidation import invalidation_bus
+from app.core.tenant.context import get_schema, set_search_path
+from app.models.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 缓存条目数与有效期（秒），变更依赖广播失效，有效期仅作兜底
+RESOURCE_BODY_SIZE = 1024
+RESOURCE_BODY_TTL = 600
+# 达到该字节数的内容预先压缩
+GZIP_MIN_SIZE = 1024
+# 资源失效广播主题
+RESOURCE_TOPIC = "resource_body"
+
+
+@dataclass(frozen=True)
+class ResourceBody:
+    """预序列化的资源内容。"""
+
+    version: int
+    raw: bytes
+    gzipped: Optional[bytes]
+
+
+class CorruptedResource(Exception):
+    """资源内容不是合法的 JSON。"""
+
+
+_bodies = LRUCache(RESOURCE_BODY_SIZE, RESOURCE_BODY_TTL)
+_inflight: dict[tuple, asyncio.Task] = {}
+# 失效计数：加载期间发生失效时，加载结果不写入缓存
+_generation = 0
+
+
+def _encode(version: int, content: str) -> ResourceBody:
+    """校验并序列化资源内容，较大的内容附带 gzip 压缩结果。"""
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        raise CorruptedResource()
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    gzipped = gzip.compress(raw, 6) if len(raw) >= GZIP_MIN_SIZE else None
+    if gzipped is not None and len(gzipped) >= len(raw):
+        gzipped = None
+    return ResourceBody(version or 0, raw, gzipped)
+
+
+async def _load(key: tuple, model) -> Optional[ResourceBody]:
+    """从数据库加载资源，未被并发失效时写入缓存。"""
+    schema, _, name = key
+    generation = _generation
+    async with AsyncSessionLocal() as db:
+        await set_search_path(db, schema)
+        row = (
+            await db.execute(
+                select(model.version, model.content).where(model.name == name)
+            )
+        ).one_or_none()
+    if row is None:
+        return None
+    body = _encode(row.version, row.content)
+    if generation == _generation:
+        _bodies.put(key, body)
+    return body
+
+
+async def get_resource_body(
+    model, name: str, schema: Optional[str] = None
+) -> Optional[ResourceBody]:
+    """获取资源的预序列化内容，资源不存在时返回 None。
+
+    Args:
+        model: 资源表模型（见 MODEL_MAP）。
+        name: 资源名称。
+        schema: 租户 Schema，缺省取当前请求上下文。
+
+    Raises:
+        CorruptedResource: 资源内容不是合法的 JSON。
+    """
+    key = (schema or get_schema(), model.__tablename__, name)
+    body = _bodies.get(key)
+    if body is not None:
+        return body
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_load(key, model))
+        _inflight[key] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            if _inflight.get(key) is finished:
+                del _inflight[key]
+
+        task.add_done_callback(_done)
+    # shield：单个请求取消时不中断其他等待者共享的加载
+    return await asyncio.shield(task)
+
+
+def _discard(key: str) -> None:
+    """丢弃本地条目（失效广播处理函数）。"""
+    global _generation
+    _generation += 1
+    entry = tuple(key.split(":", 2))
+    _bodies.discard(entry)
+    _inflight.pop(entry, None)
+
+
+def _reset() -> None:
+    """清空全部条目（失效订阅重连后调用）。"""
+    global _generation
+    _generation += 1
+    _bodies.clear()
+    _inflight.clear()
+
+
+invalidation_bus.subscribe(RESOURCE_TOPIC, _discard, _reset)
+
+
+async def invalidate_resource(model, name: str, schema: Optional[str] = None) -> None:
+    """资源写入、合并或删除提交后调用：通知所有节点丢弃缓存内容。
+
+    写入此时已提交，广播失败只记录日志，不影响请求结果。
+    """
+    key = f"{schema or get_schema()}:{model.__tablename__}:{name}"
+    try:
+        await invalidation_bus.publish(RESOURCE_TOPIC, key)
+    except Exception as e:
+        logger.error("资源缓存失效广播失败: %s, %s", key, e)
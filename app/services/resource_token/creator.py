@@ -5,6 +5,7 @@
 
 import secrets
 from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import hset_expire
 
 _TOKEN_LENGTH = 64
 _DEFAULT_TTL = 300
@@ -25,15 +26,16 @@ async def create_token(
     token = secrets.token_urlsafe(_TOKEN_LENGTH)
     key = f"token:{token}"
 
-    await rd.hset(
+    await hset_expire(
+        rd,
         key,
-        mapping={
+        {
             "tenant_id": tenant_id,
             "resource_type": resource_type,
             "name": name,
             "remaining_uses": str(max_uses),
             "client_ip": client_ip,
         },
+        ttl,
     )
-    await rd.expire(key, ttl)
     return token
@@ -1,27 +1,20 @@
 """资源令牌解析及使用情况追踪。
 
-解码令牌并处理剩余使用次数配额的递减。
+解码令牌并处理剩余使用次数配额的递减；读取与扣减在同一脚本内原子完成，
+并发请求无法重复使用一次性令牌。
 """
 
 from typing import Optional, Tuple
 from app.core.redis.accessor import get_redis
+from app.core.redis.scripts import consume_token
 
 
 async def resolve_token(token: str) -> Optional[Tuple[str, str, str, str]]:
     """将令牌字符串转换为元数据，并递减剩余可用次数。"""
-    rd = get_redis()
-    key = f"token:{token}"
-    data = await rd.hgetall(key)
-
+    data = await consume_token(get_redis(), f"token:{token}")
     if not data:
         return None
 
-    remaining = int(data["remaining_uses"]) - 1
-    if remaining <= 0:
-        await rd.delete(key)
-    else:
-        await rd.hset(key, "remaining_uses", str(remaining))
-
     return (
         data["tenant_id"],
         data["resource_type"],
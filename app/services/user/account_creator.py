@@ -10,6 +10,8 @@ from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth.account_access_cache import invalidate_membership
+from app.core.tenant.local_cache import invalidate_account
 from app.models.account import Account
 from app.models.account_member import AccountMember
 from app.models.account_quota import AccountQuota
@@ -61,4 +63,6 @@ async def create_account(
             )
         )
     await db.commit()
+    await invalidate_account(slug)
+    await invalidate_membership(user_id, account.id)
     return account
@@ -9,6 +9,8 @@ from typing import Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth.account_access_cache import invalidate_account_status
+from app.core.tenant.local_cache import invalidate_account
 from app.models.account import Account
 from app.models.account_member import AccountMember
 
@@ -43,6 +45,11 @@ async def update_account_slug(
     account = acct.scalar_one_or_none()
     if not account:
         return None
-    account.slug = new_slug
+    old_slug, account.slug = account.slug, new_slug
     await db.commit()
+    # 旧 slug 不再指向该账户，新 slug 可能留有否定缓存
+    await invalidate_account(old_slug)
+    await invalidate_account(new_slug)
+    # 账户上下文缓存的 (slug, is_active) 同步更新
+    await invalidate_account_status(account_id)
     return account
@@ -23,8 +23,8 @@ _DEFAULT_QUOTAS = [
 ]
 
 
-async def _create_default_account(user: User, db: AsyncSession) -> None:
-    """为新用户创建默认个人账户并绑定 owner 角色。"""
+async def _create_default_account(user: User, db: AsyncSession) -> Account:
+    """为新用户创建默认个人账户并绑定 owner 角色（未提交）。"""
     now = datetime.now(timezone.utc)
     slug = user.username.replace("_", "-")
     account = Account(
@@ -55,3 +55,4 @@ async def _create_default_account(user: User, db: AsyncSession) -> None:
                 max_value=val,
             )
         )
+    return account
@@ -7,6 +7,8 @@ from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth.account_access_cache import invalidate_membership
+from app.core.tenant.local_cache import invalidate_account
 from app.models.user import User
 from .approval import _get_pending_user
 from .approval_account import _create_default_account
@@ -27,6 +29,8 @@ async def approve_user(
     user.is_active = True
     user.can_create_account = can_create_account
     # 创建默认账户
-    await _create_default_account(user, db)
+    account = await _create_default_account(user, db)
     await db.commit()
+    await invalidate_account(account.slug)
+    await invalidate_membership(user.id, account.id)
     return user
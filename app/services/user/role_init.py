@@ -9,6 +9,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.custom_role import CustomRole
+from app.services.permission.cache import bump_permission_version
 
 # 系统内置角色初始数据
 SYSTEM_ROLES = [
@@ -38,7 +39,7 @@ async def ensure_system_roles(db: AsyncSession) -> None:
 
 
 async def delete_role(code: str, db: AsyncSession) -> Optional[str]:
-    """删除自定义角色。系统角色不可删除。"""
+    """删除自定义角色。系统角色不可删除；删除后递增全局权限版本。"""
     result = await db.execute(select(CustomRole).where(CustomRole.code == code))
     role = result.scalar_one_or_none()
     if not role:
@@ -47,4 +48,5 @@ async def delete_role(code: str, db: AsyncSession) -> Optional[str]:
         return "系统内置角色不可删除"
     await db.delete(role)
     await db.commit()
+    await bump_permission_version()
     return None
@@ -10,15 +10,11 @@ from tests.conftest import TEST_TENANT_ID, TEST_ACCOUNT_ID
 @pytest_asyncio.fixture(autouse=True)
 async def register_test_client_online():
     """注册一个模拟 gRPC 客户端为在线状态（IP 127.0.0.1）。"""
-    from app.core.redis import get_redis
-    from app.core.config import REDIS_DB_SESSION
+    from app.grpc.session import online_status
 
-    rd = get_redis(REDIS_DB_SESSION)
-    key = f"online:{TEST_TENANT_ID}:test-grpc-client"
-    await rd.hset(key, mapping={"status": "online", "ip": "127.0.0.1"})
-    await rd.expire(key, 300)
+    await online_status.set_online(TEST_TENANT_ID, "test-grpc-client", "127.0.0.1")
     yield
-    await rd.delete(key)
+    await online_status.set_offline(TEST_TENANT_ID, "test-grpc-client")
 
 
 @pytest_asyncio.fixture(autouse=True)
@@ -163,6 +159,153 @@ async def test_command_endpoints(command_headers):
         assert "test_cp2" not in list_cp.json()
 
 
+@pytest.mark.asyncio
+async def test_client_status_reports_queue_and_heartbeats(command_headers):
+    """客户端状态附带本节点指令队列与心跳批量写入统计。"""
+    from app.grpc.server.command_queue import CommandQueue
+
+    servicer = management_app.state.command_servicer
+    sm = management_app.state.session_manager
+    servicer.client_queues[f"{TEST_TENANT_ID}:st-uid"] = CommandQueue()
+    await sm.update_heartbeat(TEST_TENANT_ID, "test-grpc-client")
+    await sm.heartbeats.flush()
+    try:
+        transport = ASGITransport(app=management_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            res = await ac.get(
+                f"{_RES_PREFIX}/client/st-uid/status", headers=command_headers
+            )
+        assert res.status_code == 200
+        body = res.json()
+        assert body["queue"]["depth"] == 0
+        assert body["heartbeats"]["batch_size"] == 1
+        assert body["heartbeats"]["flushes"] >= 1
+    finally:
+        del servicer.client_queues[f"{TEST_TENANT_ID}:st-uid"]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_command(command_headers):
+    from app.grpc.api.Protobuf.Enum import CommandTypes_pb2
+    from app.grpc.server.command_outbox import drain_outbox
+    from app.grpc.server.command_queue import CommandQueue
+    from tests.test_grpc import _register_clients
+
+    servicer = management_app.state.command_servicer
+    queue = CommandQueue()
+    servicer.client_queues[f"{TEST_TENANT_ID}:bc-online"] = queue
+    await _register_clients("bc-off")
+    try:
+        transport = ASGITransport(app=management_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            res = await ac.post(
+                f"{_RES_PREFIX}/client/broadcast",
+                json={
+                    "command": "update-data",
+                    "uids": ["bc-online", "bc-off", "bc-unknown"],
+                },
+                headers=command_headers,
+            )
+            assert res.status_code == 200
+            body = res.json()
+            assert body["results"] == {
+                "bc-online": "delivered",
+                "bc-off": "stored",
+                "bc-unknown": "not_found",
+            }
+            assert body["summary"] == {"delivered": 1, "stored": 1, "not_found": 1}
+            assert queue.get_nowait().Type == CommandTypes_pb2.DataUpdated
+
+            # 通知广播必须携带通知内容
+            res = await ac.post(
+                f"{_RES_PREFIX}/client/broadcast",
+                json={"command": "send-notification"},
+                headers=command_headers,
+            )
+            assert res.status_code == 400
+    finally:
+        servicer.client_queues.pop(f"{TEST_TENANT_ID}:bc-online", None)
+        await drain_outbox(TEST_TENANT_ID, "bc-off")
+
+
+@pytest.mark.asyncio
+async def test_client_list_paged(command_headers):
+    import datetime
+    import uuid
+    from app.models.database import AsyncSessionLocal, ClientRecord
+    from app.core.tenant.context import set_search_path
+
+    prefix = f"page-{uuid.uuid4()}"
+    async with AsyncSessionLocal() as session:
+        await set_search_path(session)
+        for i in range(3):
+            session.add(
+                ClientRecord(
+                    uid=f"{prefix}-{i}",
+                    client_id=f"class-{i}",
+                    mac="",
+                    registered_at=datetime.datetime.now(datetime.timezone.utc),
+                )
+            )
+        await session.commit()
+
+    sm = management_app.state.session_manager
+    await sm.set_client_online(TEST_TENANT_ID, f"{prefix}-1", ip="10.3.3.3")
+    try:
+        transport = ASGITransport(app=management_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            res = await ac.get(
+                f"{_RES_PREFIX}/client/list/paged?after={prefix}&limit=2",
+                headers=command_headers,
+            )
+            assert res.status_code == 200
+            page = res.json()
+            assert [c["uid"] for c in page["items"]] == [f"{prefix}-0", f"{prefix}-1"]
+            assert [c["status"] for c in page["items"]] == ["offline", "online"]
+            assert page["items"][1]["ip"] == "10.3.3.3"
+            assert page["next_cursor"] == f"{prefix}-1"
+
+            res = await ac.get(
+                f"{_RES_PREFIX}/client/list/paged?after={page['next_cursor']}",
+                headers=command_headers,
+            )
+            assert res.json()["items"][0]["uid"] == f"{prefix}-2"
+    finally:
+        await sm.set_client_offline(TEST_TENANT_ID, f"{prefix}-1")
+
+
+@pytest.mark.asyncio
+async def test_client_uptime(command_headers):
+    import datetime
+    import uuid
+
+    uid = f"uptime-{uuid.uuid4()}"
+    sm = management_app.state.session_manager
+    now = datetime.datetime.now(datetime.timezone.utc)
+    await sm.set_client_online(TEST_TENANT_ID, uid, ip="10.4.4.4")
+    try:
+        transport = ASGITransport(app=management_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            res = await ac.post(
+                f"{_RES_PREFIX}/client/uptime",
+                json={"uids": [uid, "uptime-never"], "days": 2, "timeline": True},
+                headers=command_headers,
+            )
+        assert res.status_code == 200
+        clients = res.json()["clients"]
+        today = clients[uid]["daily"][-1]
+        assert today["date"] == now.date().isoformat()
+        assert today["online_minutes"] >= 1
+        # 跨分钟边界时心跳可能落在下一分钟
+        minute = now.hour * 60 + now.minute
+        assert any(
+            s <= m < e for s, e in today["timeline"] for m in (minute, minute + 1)
+        )
+        assert clients["uptime-never"]["online_minutes"] == 0
+    finally:
+        await sm.set_client_offline(TEST_TENANT_ID, uid)
+
+
 @pytest.mark.asyncio
 async def test_get_client_manifest_with_profile():
     from app.models.database import AsyncSessionLocal, ClientProfile
@@ -200,6 +343,92 @@ async def test_get_client_manifest_with_profile():
     assert "my_comp" in data["ComponentsSource"]["Value"]
 
 
+@pytest.mark.asyncio
+async def test_client_manifest_versions_and_etag():
+    """Manifest 的 Version 随内容更新与档案切换只增不减；内容未变时返回 304。"""
+    from app.api.command.version_check import bump_version
+    from app.models.database import AsyncSessionLocal, ClientProfile, CPFile
+    from app.core.tenant.context import set_search_path
+    import datetime
+    import time
+    import uuid
+
+    # 旧版清单以请求时刻的 time.time() 作为 Version
+    legacy = int(time.time()) - 1
+    test_uuid = str(uuid.uuid4())
+    cp_name = f"cp_{uuid.uuid4().hex[:8]}"
+    other_cp = f"cp_{uuid.uuid4().hex[:8]}"
+    hour = datetime.timedelta(hours=1)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    async with AsyncSessionLocal() as session:
+        await set_search_path(session)
+        session.add(
+            CPFile(name=cp_name, content="{}", version=30, updated_at=now - hour)
+        )
+        session.add(
+            CPFile(name=other_cp, content="{}", version=2, updated_at=now - 2 * hour)
+        )
+        session.add(
+            ClientProfile(
+                client_id=test_uuid, class_plan=cp_name, updated_at=now - 3 * hour
+            )
+        )
+        await session.commit()
+
+    async def bump(name):
+        async with AsyncSessionLocal() as session:
+            await set_search_path(session)
+            bump_version(await session.get(CPFile, name))
+            await session.commit()
+
+    transport = ASGITransport(app=client_app)
+    url = f"/api/v1/client/{test_uuid}/manifest"
+    async with AsyncClient(
+        transport=transport, base_url="http://test-school.localhost"
+    ) as ac:
+
+        async def version():
+            return (await ac.get(url)).json()["ClassPlanSource"]["Version"]
+
+        first = await ac.get(url)
+        assert first.status_code == 200
+        assert first.json()["ClassPlanSource"]["Version"] == int(
+            (now - hour).timestamp()
+        )
+        assert first.json()["PolicySource"]["Version"] == 0
+        etag = first.headers["etag"]
+
+        again = await ac.get(url, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.headers["etag"] == etag
+        assert again.content == b""
+
+        # 同一秒内的连续写入同样严格递增，且大于旧版的 time.time() 值
+        await bump(cp_name)
+        changed = await ac.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        v1 = changed.json()["ClassPlanSource"]["Version"]
+        await bump(cp_name)
+        v2 = await version()
+        assert legacy < v1 < v2
+
+        # 切换到版本号更小、更新更早的另一课表：Version 仍然增大
+        async with AsyncSessionLocal() as session:
+            await set_search_path(session)
+            profile = await session.get(ClientProfile, test_uuid)
+            profile.class_plan = other_cp
+            profile.updated_at = datetime.datetime.fromtimestamp(
+                v2 + 1, datetime.timezone.utc
+            )
+            await session.commit()
+        v3 = await version()
+        assert v3 > v2
+        # 档案更新时间晚于此次写入，Version 不回退
+        await bump(other_cp)
+        assert await version() >= v3
+
+
 @pytest.mark.asyncio
 async def test_get_client_resource():
     import uuid
@@ -433,11 +662,9 @@ async def test_get_ip_auth_fail():
         )
 
     # Remove the online entry so no IPs match
-    from app.core.redis import get_redis
-    from app.core.config import REDIS_DB_SESSION
-
-    rd = get_redis(REDIS_DB_SESSION)
-    await rd.delete(f"online:{TEST_TENANT_ID}:test-grpc-client")
+    await management_app.state.session_manager.set_client_offline(
+        TEST_TENANT_ID, "test-grpc-client"
+    )
 
     # Create a fresh token directly
     from app.services.resource_token import create_token
@@ -472,6 +699,155 @@ async def test_parse_grpc_peer_ip():
 # ---------------------------------------------------------------------------
 
 
+@pytest.mark.asyncio
+async def test_middleware_stack_spawns_no_tasks():
+    """Client API /get 路径上纯 ASGI 中间件栈不再为每个请求派生任务。
+
+    原实现按改写前的 dispatch 逻辑重建（仅保留 /get 经过的分支），
+    与现实现调用相同的限流与日志函数，差异只来自中间件机制本身：
+    BaseHTTPMiddleware 每层每请求派生任务转发响应，纯 ASGI 实现直接透传。
+    """
+    import asyncio
+    import time
+    from fastapi import FastAPI
+    from starlette.middleware.base import BaseHTTPMiddleware
+    from app.core.auth.http_middleware import TenantMiddleware
+    from app.core.config import REDIS_DB_CACHE
+    from app.core.logging import (
+        RequestLoggingMiddleware,
+        PORT_TAG_CLIENT,
+        get_port_logger,
+    )
+    from app.core.redis.accessor import get_redis
+    from app.core.security import limiter
+    from app.core.security.middleware import CCProtectMiddleware
+    from app.core.client_ip import get_client_ip_from_request
+    from app.core.security.state import (
+        get_cc_state,
+        get_global_requests,
+        set_cc_state,
+    )
+
+    class LegacyTenant(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            if request.method == "OPTIONS" or request.url.path in {"/", "/get"}:
+                return await call_next(request)
+            raise AssertionError("基准仅覆盖 /get")
+
+    class LegacyLogging(BaseHTTPMiddleware):
+        def __init__(self, app, port_tag):
+            super().__init__(app)
+            self.logger = get_port_logger(port_tag)
+
+        async def dispatch(self, request, call_next):
+            start = time.perf_counter()
+            client_ip = get_client_ip_from_request(request)
+            method, path = request.method, request.url.path
+            query = str(request.url.query) if request.url.query else ""
+            self.logger.debug(
+                "[%s] → %s %s%s", client_ip, method, path, f"?{query}" if query else ""
+            )
+            response = await call_next(request)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.logger.info(
+                "[%s] %s %s %s  耗时 %.1fms",
+                client_ip,
+                response.status_code,
+                method,
+                path,
+                elapsed,
+            )
+            return response
+
+    class LegacyCCProtect(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            ip = request.client.host if request.client else "unknown"
+            if await limiter.check_request(ip):
+                raise AssertionError("基准 IP 不应被封禁")
+            path = request.url.path.lower()
+            if get_cc_state() and any(k in path for k in ["login", "register"]):
+                raise AssertionError("基准不应触发 CC 降级")
+            resp = await call_next(request)
+            if resp.status_code >= 400:
+                await limiter.record_failure(ip)
+            return resp
+
+    def build(layers):
+        app = FastAPI()
+        app.add_api_route("/get", lambda: {}, methods=["GET"])
+        for cls, kwargs in layers:
+            app.add_middleware(cls, **kwargs)
+        return app
+
+    before = build(
+        [
+            (LegacyTenant, {}),
+            (LegacyLogging, {"port_tag": PORT_TAG_CLIENT}),
+            (LegacyCCProtect, {}),
+        ]
+    )
+    after = build(
+        [
+            (TenantMiddleware, {}),
+            (RequestLoggingMiddleware, {"port_tag": PORT_TAG_CLIENT}),
+            (CCProtectMiddleware, {}),
+        ]
+    )
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/get",
+        "raw_path": b"/get",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def spawned_tasks(app, rounds=20):
+        statuses, spawned = [], []
+        loop = asyncio.get_running_loop()
+        factory = loop.get_task_factory()
+
+        def counting_factory(loop, coro, **kwargs):
+            spawned.append(coro)
+            if factory is not None:
+                return factory(loop, coro, **kwargs)
+            return asyncio.Task(coro, loop=loop, **kwargs)
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await app(dict(scope), receive, send)  # 预热：构建中间件栈
+        loop.set_task_factory(counting_factory)
+        try:
+            for _ in range(rounds):
+                await app(dict(scope), receive, send)
+        finally:
+            loop.set_task_factory(factory)
+        assert set(statuses) == {200}
+        return len(spawned) / rounds
+
+    try:
+        legacy = await spawned_tasks(before)
+        current = await spawned_tasks(after)
+    finally:
+        await get_redis(REDIS_DB_CACHE).delete(limiter._GLOBAL_KEY)
+        get_global_requests().clear()
+        set_cc_state(False)
+    # 原实现每层至少派生一个任务；纯 ASGI 栈不派生任何任务
+    assert legacy >= 3
+    assert current == 0
+
+
 @pytest.mark.asyncio
 async def test_command_without_token():
     """命令端点拒绝未携带 Bearer Token 的请求。"""
@@ -522,3 +898,97 @@ async def test_admin_login_bad_password(test_superadmin_user):
             json={"email": "admin@test.com", "password": "WrongPass!"},
         )
         assert res.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_resource_body_cache_gzip_and_invalidation(command_headers):
+    """/get 按 Accept-Encoding 返回预压缩内容，写入后返回新内容。"""
+    import uuid
+    from app.services.resource_token import create_token
+
+    name = f"body_{uuid.uuid4().hex[:8]}"
+    big = {"Lessons": [{"Subject": f"科目{i}", "Index": i} for i in range(100)]}
+    transport = ASGITransport(app=management_app)
+    client_transport = ASGITransport(app=client_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.put(
+            f"{_RES_PREFIX}/ClassPlan/write?name={name}",
+            json=big,
+            headers=command_headers,
+        )
+        async with AsyncClient(
+            transport=client_transport, base_url="http://test-school.localhost"
+        ) as cc:
+            token = await create_token(TEST_TENANT_ID, "ClassPlan", name)
+            res = await cc.get(f"/get?token={token}")
+            assert res.headers["content-encoding"] == "gzip"
+            assert res.json() == big
+
+            token = await create_token(TEST_TENANT_ID, "ClassPlan", name)
+            res = await cc.get(
+                f"/get?token={token}", headers={"Accept-Encoding": "identity"}
+            )
+            assert "content-encoding" not in res.headers
+            assert res.json() == big
+
+            await ac.put(
+                f"{_RES_PREFIX}/ClassPlan/write?name={name}",
+                json={"changed": True},
+                headers=command_headers,
+            )
+            token = await create_token(TEST_TENANT_ID, "ClassPlan", name)
+            res = await cc.get(f"/get?token={token}")
+            assert res.json() == {"changed": True}
+
+
+@pytest.mark.asyncio
+async def test_resource_body_single_flight(monkeypatch):
+    """同一资源的并发未命中只加载一次。"""
+    import asyncio
+    from app.models.database import CPFile
+    from app.services import resource_body
+
+    calls = []
+
+    async def slow_load(key, model):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        body = resource_body._encode(1, '{"a": 1}')
+        resource_body._bodies.put(key, body)
+        return body
+
+    monkeypatch.setattr(resource_body, "_load", slow_load)
+    try:
+        bodies = await asyncio.gather(
+            *(
+                resource_body.get_resource_body(CPFile, "stampede", "tenant_x")
+                for _ in range(50)
+            )
+        )
+        assert len(calls) == 1
+        assert {b.raw for b in bodies} == {b'{"a":1}'}
+        await resource_body.get_resource_body(CPFile, "stampede", "tenant_x")
+        assert len(calls) == 1
+    finally:
+        resource_body._bodies.clear()
+
+
+@pytest.mark.asyncio
+async def test_resource_invalidation_failure_does_not_raise(monkeypatch):
+    """写入提交后失效广播失败只记录日志：本地条目照常丢弃，调用方不报错。"""
+    from app.core.redis import invalidation
+    from app.models.database import CPFile
+    from app.services import resource_body
+
+    class DownRedis:
+        async def publish(self, channel, message):
+            raise ConnectionError("redis down")
+
+    monkeypatch.setattr(invalidation, "get_redis", lambda db: DownRedis())
+    key = ("tenant_x", CPFile.__tablename__, "bcast")
+    resource_body._bodies.put(key, resource_body._encode(1, "{}"))
+    try:
+        await resource_body.invalidate_resource(CPFile, "bcast", "tenant_x")
+        assert resource_body._bodies.get(key) is None
+    finally:
+        resource_body._bodies.clear()
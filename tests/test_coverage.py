@@ -10,15 +10,11 @@ from tests.conftest import TEST_TENANT_ID, TEST_ACCOUNT_ID
 @pytest_asyncio.fixture(autouse=True)
 async def register_test_client_online():
     """注册模拟 gRPC 客户端为在线状态（IP 127.0.0.1）以通过 IP 认证。"""
-    from app.core.redis import get_redis
-    from app.core.config import REDIS_DB_SESSION
+    from app.grpc.session import online_status
 
-    rd = get_redis(REDIS_DB_SESSION)
-    key = f"online:{TEST_TENANT_ID}:test-grpc-client"
-    await rd.hset(key, mapping={"status": "online", "ip": "127.0.0.1"})
-    await rd.expire(key, 300)
+    await online_status.set_online(TEST_TENANT_ID, "test-grpc-client", "127.0.0.1")
     yield
-    await rd.delete(key)
+    await online_status.set_offline(TEST_TENANT_ID, "test-grpc-client")
 
 
 @pytest_asyncio.fixture(autouse=True)
@@ -313,6 +309,52 @@ async def test_resource_token_ttl_expiry():
     assert result is None
 
 
+@pytest.mark.asyncio
+async def test_redis_state_changes_single_round_trip(monkeypatch):
+    """多步状态变更通过脚本单次往返完成，一次性令牌并发下只能使用一次。"""
+    import asyncio
+    from app.core.redis.accessor import get_redis
+    from app.core.config import REDIS_DB_AUTH, REDIS_DB_SESSION
+    from app.grpc.session.handshake_state import (
+        pop_handshake_challenge,
+        store_handshake_challenge,
+    )
+    from app.grpc.session.session_state import create_new_session
+    from app.services.auth_token import generate_token
+    from app.services.resource_token import create_token, resolve_token
+
+    calls = []
+    for db in (0, REDIS_DB_AUTH, REDIS_DB_SESSION):
+        rd = get_redis(db)
+        original = rd.execute_command
+
+        async def counted(*args, _original=original, **kwargs):
+            calls.append(args[0])
+            return await _original(*args, **kwargs)
+
+        monkeypatch.setattr(rd, "execute_command", counted)
+
+    async def count(coro):
+        calls.clear()
+        result = await coro
+        return result, len(calls)
+
+    token, n = await count(create_token(TEST_TENANT_ID, "ClassPlan", "once"))
+    assert n == 1
+    _, n = await count(generate_token("command", tenant_id=TEST_TENANT_ID))
+    assert n == 1
+    _, n = await count(create_new_session(TEST_TENANT_ID, "script-uid"))
+    assert n == 1
+    await store_handshake_challenge(TEST_TENANT_ID, "script-uid", "challenge")
+    val, n = await count(pop_handshake_challenge(TEST_TENANT_ID, "script-uid"))
+    assert (val, n) == ("challenge", 1)
+    assert await pop_handshake_challenge(TEST_TENANT_ID, "script-uid") is None
+
+    results, n = await count(asyncio.gather(*(resolve_token(token) for _ in range(5))))
+    assert n == 5
+    assert sum(r is not None for r in results) == 1
+
+
 @pytest.mark.asyncio
 async def test_client_details_endpoint(command_headers):
     from app.models.database import AsyncSessionLocal, ClientRecord
@@ -10,6 +10,9 @@ from app.grpc.server import (
     ConfigUploadServicer,
     AuditServicer,
 )
+from app.grpc.server.command_outbox import drain_outbox
+from app.grpc.session.stream_route import lookup_routes
+from app.grpc.server.command_queue import CommandQueue
 from app.grpc.session_manager import SessionManager
 from app.grpc.api.Protobuf.Client import (
     ClientRegisterCsReq_pb2,
@@ -97,6 +100,172 @@ async def test_session_manager_client_online_status(session_manager):
     assert await session_manager.is_client_online(tid, "c1") is False
 
 
+@pytest.mark.asyncio
+async def test_presence_index_skips_stale_heartbeats(session_manager):
+    from app.core.config import REDIS_DB_SESSION
+    from app.core.redis.accessor import get_redis
+
+    tid = TEST_TENANT_ID
+    await session_manager.set_client_online(tid, "pi-1", ip="ipv4:10.0.0.8:5000")
+    # 模拟节点崩溃残留：心跳早已过期的索引项
+    await get_redis(REDIS_DB_SESSION).zadd(f"presence:{tid}", {"pi-stale": 1.0})
+    try:
+        uids = {s["uid"] for s in await session_manager.get_all_clients_status(tid)}
+        assert "pi-1" in uids
+        assert "pi-stale" not in uids
+        assert "10.0.0.8" in await session_manager.get_all_online_ips(tid)
+    finally:
+        await session_manager.set_client_offline(tid, "pi-1")
+    assert "10.0.0.8" not in await session_manager.get_all_online_ips(tid)
+
+
+@pytest.mark.asyncio
+async def test_presence_sweep_releases_crashed_client(session_manager):
+    """未下线客户端心跳过期后，其 IP 索引、流令牌与 IP 引用随索引清理释放。"""
+    from app.core.config import REDIS_DB_SESSION
+    from app.core.redis.accessor import get_redis
+    from app.grpc.session.online_ips import is_tenant_ip_online
+
+    tid, rd = TEST_TENANT_ID, get_redis(REDIS_DB_SESSION)
+    await session_manager.set_client_online(tid, "sw-live", ip="10.6.6.6")
+    await session_manager.set_client_online(tid, "sw-dead", ip="10.6.6.6")
+    await session_manager.set_client_online(tid, "sw-solo", ip="10.6.6.7")
+    try:
+        # 模拟节点崩溃：两个客户端不再心跳，其他客户端的心跳仍续期租户索引
+        await rd.zadd(f"presence:{tid}", {"sw-dead": 1.0, "sw-solo": 1.0})
+        await rd.zadd(f"online_ips:{tid}", {"10.6.6.7": 1.0})
+        uids = {s["uid"] for s in await session_manager.get_all_clients_status(tid)}
+        assert "sw-live" in uids and not {"sw-dead", "sw-solo"} & uids
+
+        for key in (f"presence_ip:{tid}", f"presence_stream:{tid}"):
+            assert await rd.hmget(key, ["sw-dead", "sw-solo"]) == [None, None]
+        assert await rd.hget(f"online_ip_refs:{tid}", "10.6.6.6") == "1"
+        assert await rd.hget(f"online_ip_refs:{tid}", "10.6.6.7") is None
+        assert await rd.zscore(f"online_ips:{tid}", "10.6.6.7") is None
+
+        # 共用 IP 的存活客户端下线后引用归零，IP 移出在线集合
+        await session_manager.set_client_offline(tid, "sw-live")
+        assert await is_tenant_ip_online(tid, "10.6.6.6") is False
+    finally:
+        for cuid in ("sw-live", "sw-dead", "sw-solo"):
+            await session_manager.set_client_offline(tid, cuid)
+
+
+@pytest.mark.asyncio
+async def test_online_ip_kept_while_shared(session_manager):
+    from app.grpc.session.online_ips import is_tenant_ip_online
+
+    tid = TEST_TENANT_ID
+    await session_manager.set_client_online(tid, "nat-1", ip="10.9.9.9")
+    await session_manager.set_client_online(tid, "nat-2", ip="ipv4:10.9.9.9:6000")
+    assert await is_tenant_ip_online(tid, "10.9.9.9") is True
+
+    # 同一出口 IP 仍有其他在线客户端时不移除
+    await session_manager.set_client_offline(tid, "nat-1")
+    assert await is_tenant_ip_online(tid, "10.9.9.9") is True
+    await session_manager.set_client_offline(tid, "nat-2")
+    assert await is_tenant_ip_online(tid, "10.9.9.9") is False
+
+
+@pytest.mark.asyncio
+async def test_stale_stream_teardown_after_reconnect(session_manager):
+    from app.grpc.session.online_ips import is_tenant_ip_online
+
+    tid = TEST_TENANT_ID
+    old = await session_manager.set_client_online(tid, "rc-1", ip="10.7.7.7")
+    new = await session_manager.set_client_online(tid, "rc-1", ip="10.7.7.7")
+    try:
+        # 旧流的清理晚于重连到达：不得移除新流的在线状态、IP 与心跳登记
+        await session_manager.set_client_offline(tid, "rc-1", old)
+        assert await session_manager.is_client_online(tid, "rc-1") is True
+        assert await is_tenant_ip_online(tid, "10.7.7.7") is True
+        uids = {s["uid"] for s in await session_manager.get_all_clients_status(tid)}
+        assert "rc-1" in uids
+        assert session_manager.heartbeats._ips[(tid, "rc-1")] == "10.7.7.7"
+
+        # 换 IP 重连：旧 IP 的引用随旧流一并释放
+        newer = await session_manager.set_client_online(tid, "rc-1", ip="10.7.7.8")
+        await session_manager.set_client_offline(tid, "rc-1", new)
+        assert await is_tenant_ip_online(tid, "10.7.7.7") is False
+        assert await is_tenant_ip_online(tid, "10.7.7.8") is True
+
+        await session_manager.set_client_offline(tid, "rc-1", newer)
+        assert await session_manager.is_client_online(tid, "rc-1") is False
+        assert await is_tenant_ip_online(tid, "10.7.7.8") is False
+    finally:
+        await session_manager.set_client_offline(tid, "rc-1")
+
+
+@pytest.mark.asyncio
+async def test_online_ip_lookup_independent_of_tenant_size(monkeypatch):
+    """单个 IP 的在线判定只发一次 ZSCORE，命令数不随租户在线规模增长。"""
+    import time
+    from app.core.config import REDIS_DB_SESSION
+    from app.core.redis.accessor import get_redis
+    from app.grpc.session import online_ips
+    from app.grpc.session.online_status import online_ips_key
+
+    rd, now = get_redis(REDIS_DB_SESSION), time.time()
+    small, large = f"{TEST_TENANT_ID}-bench-s", f"{TEST_TENANT_ID}-bench-l"
+    await rd.zadd(online_ips_key(small), {f"10.1.0.{i}": now for i in range(10)})
+    await rd.zadd(
+        online_ips_key(large),
+        {f"10.2.{i // 256}.{i % 256}": now for i in range(20000)},
+    )
+
+    calls = []
+
+    class Recorder:
+        def __getattr__(self, name):
+            calls.append(name)
+            return getattr(rd, name)
+
+    monkeypatch.setattr(online_ips, "get_redis", lambda db: Recorder())
+
+    async def commands(tid, ip):
+        calls.clear()
+        online_ips.evict_ip(tid, ip)
+        assert await online_ips.is_tenant_ip_online(tid, ip)
+        first = list(calls)
+        # 肯定结果命中进程内缓存，不再访问 Redis
+        assert await online_ips.is_tenant_ip_online(tid, ip)
+        assert calls == first
+        return first
+
+    try:
+        assert await commands(small, "10.1.0.5") == ["zscore"]
+        assert await commands(large, "10.2.40.7") == ["zscore"]
+    finally:
+        online_ips.evict_ip(small, "10.1.0.5")
+        online_ips.evict_ip(large, "10.2.40.7")
+        await rd.delete(online_ips_key(small), online_ips_key(large))
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_batcher_flushes_in_batches(session_manager):
+    tid = TEST_TENANT_ID
+    await session_manager.set_client_online(tid, "hb-1", ip="1.2.3.4")
+    for cuid in ("hb-1", "hb-2", "hb-1"):
+        await session_manager.update_heartbeat(tid, cuid)
+    await session_manager.heartbeats.flush()
+
+    stats = session_manager.heartbeats.stats()
+    assert stats["batch_size"] == 2
+    assert stats["pending"] == 0
+    assert await session_manager.is_client_online(tid, "hb-2") is True
+
+    # 心跳刷新不覆盖上线时记录的 IP
+    found = {s["uid"]: s for s in await session_manager.get_all_clients_status(tid)}
+    assert found["hb-1"]["ip"] == "1.2.3.4"
+
+    # 离线后未刷新的心跳被丢弃，不会复活在线记录
+    await session_manager.update_heartbeat(tid, "hb-2")
+    await session_manager.set_client_offline(tid, "hb-2")
+    await session_manager.set_client_offline(tid, "hb-1")
+    await session_manager.heartbeats.stop()
+    assert await session_manager.is_client_online(tid, "hb-2") is False
+
+
 def test_session_manager_decrypt_challenge(session_manager):
     import pgpy
 
@@ -109,6 +278,130 @@ def test_session_manager_decrypt_challenge(session_manager):
     assert decrypted == token
 
 
+@pytest.mark.asyncio
+async def test_decrypt_pool_off_loop_with_admission_limit(session_manager):
+    """挑战令牌在进程池中解密；排队已满时直接拒绝。"""
+    import pgpy
+    from app.grpc.session.decrypt_pool import DecryptOverloaded, DecryptPool
+
+    pub_key, _ = pgpy.PGPKey.from_blob(session_manager.public_key_armor)
+    tokens = [f"challenge-{i}" for i in range(4)]
+    blobs = [str(pub_key.encrypt(pgpy.PGPMessage.new(t))) for t in tokens]
+    try:
+        results = await asyncio.gather(
+            *(session_manager.decrypt_challenge_async(b) for b in blobs)
+        )
+        assert results == tokens
+        assert await session_manager.decrypt_challenge_async("invalid") is None
+        stats = session_manager.decryptor.stats()
+        assert stats["completed"] == 5 and stats["rejected"] == 0
+    finally:
+        session_manager.decryptor.shutdown()
+
+    pool = DecryptPool(session_manager._km._key_file, workers=1, max_pending=0)
+    try:
+        first = asyncio.ensure_future(pool.decrypt(blobs[0]))
+        await asyncio.sleep(0)
+        with pytest.raises(DecryptOverloaded):
+            await pool.decrypt(blobs[1])
+        assert await first == tokens[0]
+        assert pool.stats()["rejected"] == 1
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.filterwarnings("ignore:Selected symmetric algorithm:UserWarning")
+def test_fast_decrypt_matches_pgpy(session_manager):
+    """差分语料：快速引擎与 pgpy 的解密结果一致，非常规报文回退 pgpy。"""
+    import pgpy
+    from pgpy.constants import CompressionAlgorithm, SymmetricKeyAlgorithm
+    from app.grpc.session.pgp_fast import Unsupported, fast_decrypt
+
+    km = session_manager._km
+    pub_key, _ = pgpy.PGPKey.from_blob(session_manager.public_key_armor)
+    corpus = []
+    for comp in CompressionAlgorithm:
+        for cipher in (
+            SymmetricKeyAlgorithm.AES128,
+            SymmetricKeyAlgorithm.AES192,
+            SymmetricKeyAlgorithm.AES256,
+        ):
+            for body in ("challenge-令牌", b"\x00\x01binary", "x" * 9000):
+                msg = pgpy.PGPMessage.new(body, compression=comp)
+                corpus.append(str(pub_key.encrypt(msg, cipher=cipher)))
+
+    for blob in corpus:
+        expected = km.private_key.decrypt(pgpy.PGPMessage.from_blob(blob)).message
+        expected = bytes(expected) if isinstance(expected, bytearray) else expected
+        assert fast_decrypt(km._fast_key, blob) == expected
+        assert km.decrypt(blob) == expected
+
+    # 快速引擎不支持的算法回退 pgpy
+    msg = pgpy.PGPMessage.new("camellia")
+    blob = str(pub_key.encrypt(msg, cipher=SymmetricKeyAlgorithm.Camellia256))
+    with pytest.raises(Unsupported):
+        fast_decrypt(km._fast_key, blob)
+    assert km.decrypt(blob) == "camellia"
+
+    # 篡改密文：两条路径均拒绝
+    tampered = corpus[0].replace(corpus[0][-60], "A" if corpus[0][-60] != "A" else "B")
+    assert km.decrypt(tampered) is None
+    assert km.decrypt("not-a-valid-pgp-message") is None
+
+
+def test_fast_decrypt_malformed_packets_fall_back(session_manager):
+    """畸形/截断报文：快速引擎只抛 Unsupported，decrypt 回退 pgpy 并返回 None。"""
+    import base64
+    from app.grpc.session.pgp_fast import Unsupported, _literal, _packets
+
+    def armor(data: bytes) -> str:
+        body = base64.b64encode(data).decode()
+        return f"-----BEGIN PGP MESSAGE-----\n\n{body}\n-----END PGP MESSAGE-----\n"
+
+    malformed = [
+        b"",
+        b"\xc1",  # 新格式包头缺少长度
+        b"\xc1\xc5",  # 两字节长度只有首字节
+        b"\xc1\xff\x00\x00",  # 五字节长度被截断
+        b"\xc1\xff\x00\x00\x00\x10ab",  # 长度超出剩余数据
+        b"\xd2\xe5abc",  # 分段长度越过报文末尾
+        b"\x85",  # 旧格式包头缺少长度字节
+        b"\x86\x00",  # 旧格式两字节长度被截断
+        b"\x84\x05ab",  # 旧格式长度超出剩余数据
+        b"\x00\x01",  # 非法包头
+    ]
+    for data in malformed:
+        if data:
+            with pytest.raises(Unsupported):
+                list(_packets(data))
+        assert session_manager._km.decrypt(armor(data)) is None
+
+    # 解密后的内层报文同样做边界检查
+    for inner in (
+        bytes([0xC8, 0x00]),  # 空压缩包
+        bytes([0xCB, 0x06]) + b"b\xff1234",  # 文件名长度越界
+        bytes([0xCB, 0x07]) + b"u\x001234\xff",  # 非法 UTF-8
+        bytes([0xCB, 0x01]),  # 截断的字面量包
+    ):
+        with pytest.raises(Unsupported):
+            _literal(inner)
+
+
+def test_fast_decrypt_skips_pgpy(session_manager, monkeypatch):
+    """常规握手报文由快速引擎解出，不再解析 pgpy 报文对象。"""
+    import pgpy
+
+    km = session_manager._km
+    pub_key, _ = pgpy.PGPKey.from_blob(session_manager.public_key_armor)
+    blob = str(pub_key.encrypt(pgpy.PGPMessage.new("fast-challenge")))
+
+    def no_pgpy(*args, **kwargs):
+        raise AssertionError("常规报文不应回退 pgpy")
+
+    monkeypatch.setattr(pgpy.PGPMessage, "from_blob", no_pgpy)
+    assert km.decrypt(blob) == "fast-challenge"
+
+
 def test_session_manager_decrypt_invalid(session_manager):
     result = session_manager.decrypt_challenge("not-a-valid-pgp-message")
     assert result is None
@@ -400,13 +693,405 @@ async def test_client_command_deliver_send_command(session_manager):
         assert len(collected) >= 1
         assert collected[0].Type == CommandTypes_pb2.RestartApp
 
-        # Send to non-existent client
-        await servicer.send_command(tid, "missing-uid", cmd)
+        # Send to non-existent client: 存入离线信箱
+        assert await servicer.send_command(tid, "missing-uid", cmd) == "stored"
+        assert await drain_outbox(tid, "missing-uid") == [cmd]
     finally:
         schema_ctx.reset(s_token)
         tenant_ctx.reset(token)
 
 
+def test_command_codec_roundtrip():
+    from app.grpc.server.command_codec import (
+        encode_payload,
+        encode_command,
+        decode_command,
+    )
+
+    cmd = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        RetCode=Retcode_pb2.Success,
+        Type=CommandTypes_pb2.SendNotification,
+        Payload=b"\x00\xffpayload",
+    )
+    raw = encode_command("t1", ["c:1", "c:2"], encode_payload(cmd))
+    tid, cuids, decoded = decode_command(raw)
+    assert (tid, cuids) == ("t1", ["c:1", "c:2"])
+    assert decoded == cmd
+
+
+async def _register_clients(*uids):
+    """在当前租户写入设备记录（离线信箱仅对已注册客户端生效）。"""
+    from datetime import datetime, timezone
+    from app.core.tenant.context import set_search_path
+    from app.models.database import AsyncSessionLocal, ClientRecord
+
+    async with AsyncSessionLocal() as db:
+        await set_search_path(db)
+        for uid in uids:
+            await db.merge(
+                ClientRecord(uid=uid, registered_at=datetime.now(timezone.utc))
+            )
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_command_bus_forwards_to_owner_node(session_manager):
+    """指令流不在本节点时应经总线转发至持有节点。"""
+    tid = TEST_TENANT_ID
+    owner = ClientCommandDeliverServicer(session_manager, distributed=True)
+    sender = ClientCommandDeliverServicer(session_manager, distributed=True)
+    await owner.bus.start()
+    await _register_clients("bus-uid")
+    try:
+        queue = CommandQueue()
+        owner.client_queues[f"{tid}:bus-uid"] = queue
+        await owner.bus.claim(tid, "bus-uid")
+
+        cmd = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            RetCode=Retcode_pb2.Success, Type=CommandTypes_pb2.RestartApp
+        )
+        assert await sender.send_command(tid, "bus-uid", cmd) == "forwarded"
+        got = await asyncio.wait_for(queue.get(), timeout=2.0)
+        assert got.Type == CommandTypes_pb2.RestartApp
+
+        # 其他节点已接管路由时，本节点释放不得删除新路由
+        await sender.bus.claim(tid, "bus-uid")
+        await owner.bus.release(tid, "bus-uid")
+        assert await lookup_routes(tid, ["bus-uid"]) == [sender.bus.node_id]
+
+        await sender.bus.release(tid, "bus-uid")
+        assert await sender.send_command(tid, "bus-uid", cmd) == "stored"
+        await drain_outbox(tid, "bus-uid")
+    finally:
+        await owner.bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_command_bus_stores_when_stream_gone(session_manager):
+    """转发到达时指令流已断开：可暂存指令由接收节点写入离线信箱。"""
+    from app.grpc.server.command_codec import encode_command, encode_payload
+
+    tid = TEST_TENANT_ID
+    owner = ClientCommandDeliverServicer(session_manager, distributed=True)
+    restart = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        RetCode=Retcode_pb2.Success, Type=CommandTypes_pb2.RestartApp
+    )
+    ping = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        RetCode=Retcode_pb2.Success, Type=CommandTypes_pb2.Ping
+    )
+    try:
+        for cmd in (ping, restart):
+            owner.bus._handle(
+                {"data": encode_command(tid, ["gone-uid"], encode_payload(cmd))}
+            )
+        await asyncio.gather(*owner.bus._stores)
+        # 仅可暂存指令写入信箱
+        stored = await drain_outbox(tid, "gone-uid")
+        assert [c.Type for c in stored] == [CommandTypes_pb2.RestartApp]
+    finally:
+        await drain_outbox(tid, "gone-uid")
+
+
+@pytest.mark.asyncio
+async def test_pubsub_listener_resubscribes_after_disconnect(monkeypatch):
+    """订阅连接中断后按退避重新订阅并继续消费，重连后触发补偿回调。"""
+    from app.core.redis import pubsub as pubsub_mod
+
+    monkeypatch.setattr(pubsub_mod, "RECONNECT_MIN", 0)
+
+    class FakePubSub:
+        def __init__(self, messages, fail):
+            self._messages, self._fail = messages, fail
+            self.closed = False
+
+        async def listen(self):
+            for m in self._messages:
+                yield m
+            if self._fail:
+                raise ConnectionError("connection lost")
+            await asyncio.Event().wait()
+
+        async def aclose(self):
+            self.closed = True
+
+    first = FakePubSub([{"data": "a"}], fail=True)
+    second = FakePubSub([{"data": "b"}], fail=False)
+    received, reconnects = [], []
+
+    async def subscribe():
+        return second
+
+    task = asyncio.create_task(
+        pubsub_mod.listen_forever(
+            subscribe,
+            lambda m: received.append(m["data"]),
+            "test",
+            pubsub=first,
+            on_reconnect=lambda: reconnects.append(1),
+        )
+    )
+    try:
+        for _ in range(50):
+            if received == ["a", "b"]:
+                break
+            await asyncio.sleep(0.01)
+        assert received == ["a", "b"]
+        assert reconnects == [1]
+        assert first.closed
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert second.closed
+
+
+@pytest.mark.asyncio
+async def test_session_manager_close_unsubscribes_invalidation():
+    """失效订阅重连后清空会话缓存；关闭会话管理器时注销其订阅。"""
+    from app.core.redis.invalidation import invalidation_bus
+    from app.grpc.session.manager import SESSION_TOPIC
+
+    sm = SessionManager()
+    sm._sessions.put("sid-reset", {"cuid": "c1"})
+    invalidation_bus._reset()
+    assert sm._sessions.get("sid-reset") is None
+
+    before = len(invalidation_bus._handlers[SESSION_TOPIC])
+    await sm.close()
+    assert len(invalidation_bus._handlers[SESSION_TOPIC]) == before - 1
+    assert sm._sessions.clear not in invalidation_bus._resets
+
+
+@pytest.mark.asyncio
+async def test_send_command_many_reports_per_client_status(session_manager):
+    tid = TEST_TENANT_ID
+    servicer = ClientCommandDeliverServicer(session_manager)
+    ok_queue, full_queue = CommandQueue(), CommandQueue(maxsize=1)
+    full_queue.put_nowait(
+        ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            Type=CommandTypes_pb2.SendNotification
+        )
+    )
+    servicer.client_queues[f"{tid}:ok-uid"] = ok_queue
+    servicer.client_queues[f"{tid}:full-uid"] = full_queue
+
+    await _register_clients("gone-uid")
+    cmd = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        RetCode=Retcode_pb2.Success, Type=CommandTypes_pb2.DataUpdated
+    )
+    results = await servicer.send_command_many(
+        tid, cmd, ["ok-uid", "full-uid", "gone-uid", "ok-uid", "unknown-uid"]
+    )
+    assert results == {
+        "ok-uid": "delivered",
+        "full-uid": "queue_full",
+        "gone-uid": "stored",
+        "unknown-uid": "not_found",
+    }
+    assert ok_queue.qsize() == 1
+    assert await drain_outbox(tid, "gone-uid") == [cmd]
+
+    # 未指定 uids 时扇出至本租户全部在线流，待下发的相同指令被合并
+    results = await servicer.send_command_many(tid, cmd)
+    assert results["ok-uid"] == "coalesced"
+    assert ok_queue.qsize() == 1
+
+
+def test_command_queue_overflow_policies():
+    """队列满载时按指令类型的溢出策略立即返回，不阻塞调用方。"""
+
+    def make(cmd_type, payload=b""):
+        return ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            Type=cmd_type, Payload=payload
+        )
+
+    queue = CommandQueue(
+        maxsize=2,
+        policies={
+            CommandTypes_pb2.DataUpdated: "coalesce",
+            CommandTypes_pb2.SendNotification: "drop_oldest",
+        },
+    )
+    assert queue.offer(make(CommandTypes_pb2.DataUpdated)) == "delivered"
+    assert queue.offer(make(CommandTypes_pb2.SendNotification, b"a")) == "delivered"
+
+    assert queue.offer(make(CommandTypes_pb2.DataUpdated)) == "coalesced"
+    assert queue.offer(make(CommandTypes_pb2.RestartApp)) == "queue_full"
+    assert queue.offer(make(CommandTypes_pb2.SendNotification, b"b")) == "delivered"
+
+    assert [m.Payload for m in (queue.get_nowait(), queue.get_nowait())] == [
+        b"a",
+        b"b",
+    ]
+    assert queue.stats() == {
+        "depth": 0,
+        "control": 0,
+        "maxsize": 2,
+        "dropped": 1,
+        "rejected": 1,
+        "coalesced": 1,
+    }
+
+
+def test_command_queue_coalesces_idempotent_commands():
+    """待下发的相同幂等指令合并为一条，通知保持 FIFO。"""
+    queue = CommandQueue()
+    data = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        Type=CommandTypes_pb2.DataUpdated
+    )
+    notes = [
+        ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            Type=CommandTypes_pb2.SendNotification, Payload=p
+        )
+        for p in (b"1", b"1", b"2")
+    ]
+    statuses = [queue.offer(data)]
+    for note in notes:
+        statuses.append(queue.offer(note))
+        statuses.append(queue.offer(data))
+    assert statuses.count("coalesced") == 3
+    assert [queue.get_nowait() for _ in range(queue.qsize())] == [data, *notes]
+
+    # 已取出的指令不再参与合并
+    assert queue.offer(data) == "delivered"
+
+
+def test_command_queue_control_lane_preempts_bulk():
+    """Pong 走控制通道：队列满载时仍可入队，并先于积压指令下发。"""
+    queue = CommandQueue(maxsize=1)
+    note = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        Type=CommandTypes_pb2.SendNotification
+    )
+    pong = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        Type=CommandTypes_pb2.Pong
+    )
+    assert queue.offer(note) == "delivered"
+    assert queue.offer(pong) == "delivered"
+    assert queue.offer(pong) == "coalesced"
+    assert queue.stats()["control"] == 1
+    assert [queue.get_nowait(), queue.get_nowait()] == [pong, note]
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_idle_timer_wheel_expires_idle_streams(monkeypatch):
+    """共享时间轮批量判定空闲流，活动流的截止时间顺延。"""
+    from types import SimpleNamespace
+    from app.grpc.server import stream_timeout
+
+    clock = [1000.0]
+    monkeypatch.setattr(
+        stream_timeout, "time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+    wheel = stream_timeout.IdleTimerWheel(timeout=10, tick=1)
+    idle_q, busy_q = CommandQueue(), CommandQueue()
+    wheel.register(idle_q, idle_q.expire)
+    wheel.register(busy_q, busy_q.expire)
+    try:
+        clock[0] = 1008.0
+        wheel.touch(busy_q)
+        assert wheel.sweep(1009.0) == 0
+        assert wheel.sweep(1010.5) == 1
+        with pytest.raises(asyncio.TimeoutError):
+            await idle_q.get()
+
+        # 超时时仍有待下发指令：照常取出，活动后重新计时
+        cmd = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            Type=CommandTypes_pb2.DataUpdated
+        )
+        busy_q.put_nowait(cmd)
+        assert wheel.sweep(1018.5) == 1
+        assert await busy_q.get() == cmd
+        clock[0] = 1019.0
+        wheel.touch(busy_q)
+        assert wheel.sweep(1028.5) == 0
+        assert wheel.sweep(1029.5) == 1
+    finally:
+        wheel.unregister(idle_q)
+        wheel.unregister(busy_q)
+
+
+@pytest.mark.asyncio
+async def test_offline_commands_replayed_in_order(session_manager):
+    """离线期间的指令存入信箱，指令流建立后按序回放。"""
+    tid = TEST_TENANT_ID
+    servicer = ClientCommandDeliverServicer(session_manager)
+    cmds = [
+        ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            Type=CommandTypes_pb2.SendNotification, Payload=p
+        )
+        for p in (b"1", b"2")
+    ]
+    cmds.insert(
+        1,
+        ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+            Type=CommandTypes_pb2.DataUpdated
+        ),
+    )
+    await _register_clients("outbox-uid")
+    for cmd in cmds:
+        assert await servicer.send_command(tid, "outbox-uid", cmd) == "stored"
+    # 信箱中已有相同的幂等指令时合并，不挤占其他待回放指令
+    assert await servicer.send_command(tid, "outbox-uid", cmds[1]) == "coalesced"
+
+    # 交互类指令不暂存
+    query = ClientCommandDeliverScRsp_pb2.ClientCommandDeliverScRsp(
+        Type=CommandTypes_pb2.GetClientConfig
+    )
+    assert await servicer.send_command(tid, "outbox-uid", query) == "offline"
+
+    assert await drain_outbox(tid, "outbox-uid") == cmds
+    assert await drain_outbox(tid, "outbox-uid") == []
+
+
+@pytest.mark.asyncio
+async def test_session_cache_invalidated_on_destroy(session_manager, monkeypatch):
+    """会话解析结果进程内缓存，销毁会话后立即失效。"""
+    from app.grpc.session import manager
+    from app.grpc.session.context import session_ctx
+    from app.grpc.session.session_state import create_new_session
+
+    sid = await create_new_session(TEST_TENANT_ID, "cached-uid")
+    assert await session_manager.validate_session(sid) == "cached-uid"
+
+    lookups = AsyncMock(return_value={})
+    monkeypatch.setattr(manager, "get_session_info", lookups)
+    assert await session_manager.get_session_tenant(sid) == TEST_TENANT_ID
+    lookups.assert_not_awaited()
+
+    # 拦截器已解析的会话在同一 RPC 内直接复用
+    token = session_ctx.set(("ctx-sid", {"cuid": "ctx-uid"}))
+    try:
+        assert await session_manager.validate_session("ctx-sid") == "ctx-uid"
+    finally:
+        session_ctx.reset(token)
+    lookups.assert_not_awaited()
+
+    await session_manager.destroy_session(sid)
+    assert await session_manager.validate_session(sid) is None
+    lookups.assert_awaited_once_with(sid)
+
+
+def test_lru_cache_evicts_and_expires(monkeypatch):
+    """LRU 缓存超出容量淘汰最久未使用项，过期条目视为未命中。"""
+    from types import SimpleNamespace
+    from app.core import lru_cache
+
+    clock = [0.0]
+    monkeypatch.setattr(lru_cache, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    cache = lru_cache.LRUCache(maxsize=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    clock[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert len(cache) == 0
+
+
 # ===========================================================================
 # 配置上报服务测试
 # ===========================================================================
@@ -593,3 +1278,119 @@ def test_session_manager_corrupt_key_file(tmp_path):
 
     sm = SessionManager(key_file=key_path)
     assert sm.public_key_armor.startswith("-----BEGIN PGP PUBLIC KEY BLOCK-----")
+
+
+@pytest.mark.asyncio
+async def test_interceptor_admission_rejects_with_retry_hint():
+    """超出 IP 令牌桶限额的调用以 RESOURCE_EXHAUSTED 中止，并附带重试等待时长。"""
+    from app.core.auth.grpc_interceptor import TenantInterceptor
+    from app.core.security.grpc_admission import GrpcAdmission
+
+    admission = GrpcAdmission({"LogEvent": {"ip": [0.5, 2], "tenant": None}})
+    interceptor = TenantInterceptor(admission=admission)
+    details = MagicMock(method="/Audit.AuditService/LogEvent", invocation_metadata=())
+
+    async def behavior(request, context):
+        return "ok"
+
+    async def continuation(_):
+        return grpc.unary_unary_rpc_method_handler(behavior)
+
+    handler = await interceptor.intercept_service(continuation, details)
+
+    def make_context(ip):
+        ctx = MagicMock(spec=grpc.aio.ServicerContext)
+        ctx.invocation_metadata.return_value = []
+        ctx.peer.return_value = f"ipv4:{ip}:50000"
+        ctx.abort = AsyncMock(
+            side_effect=grpc.aio.AbortError(grpc.StatusCode.RESOURCE_EXHAUSTED, "")
+        )
+        return ctx
+
+    ctx = make_context("198.51.100.7")
+    for _ in range(2):
+        assert await handler.unary_unary(None, ctx) == "ok"
+    with pytest.raises(grpc.aio.AbortError):
+        await handler.unary_unary(None, ctx)
+    code, _ = ctx.abort.call_args.args
+    trailers = dict(ctx.abort.call_args.kwargs["trailing_metadata"])
+    assert code == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert 0 < int(trailers["grpc-retry-pushback-ms"]) <= 2000
+    # 其他 IP 不受影响
+    assert await handler.unary_unary(None, make_context("198.51.100.8")) == "ok"
+    assert admission.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_interceptor_checks_ban_without_global_budget(monkeypatch):
+    """gRPC 调用只查询封禁，不计入 HTTP 的全局 CC 速率；封禁 IP 被拒绝。"""
+    from app.core.auth.grpc_interceptor import TenantInterceptor
+    from app.core.security import limiter
+
+    async def unreachable(*args, **kwargs):
+        raise AssertionError("gRPC 调用不应登记全局速率")
+
+    monkeypatch.setattr(limiter, "cc_check", unreachable)
+    interceptor = TenantInterceptor()
+    details = MagicMock(method="/Audit.AuditService/LogEvent", invocation_metadata=())
+
+    async def behavior(request, context):
+        return "ok"
+
+    async def continuation(_):
+        return grpc.unary_unary_rpc_method_handler(behavior)
+
+    handler = await interceptor.intercept_service(continuation, details)
+    ctx = MagicMock(spec=grpc.aio.ServicerContext)
+    ctx.invocation_metadata.return_value = []
+    ctx.peer.return_value = "ipv4:198.51.100.20:50000"
+    ctx.abort = AsyncMock(
+        side_effect=grpc.aio.AbortError(grpc.StatusCode.RESOURCE_EXHAUSTED, "")
+    )
+    assert await handler.unary_unary(None, ctx) == "ok"
+
+    limiter._ban_locally("198.51.100.20", 60000)
+    try:
+        with pytest.raises(grpc.aio.AbortError):
+            await handler.unary_unary(None, ctx)
+        assert ctx.abort.call_args.args[0] == grpc.StatusCode.RESOURCE_EXHAUSTED
+    finally:
+        limiter._banned.discard("198.51.100.20")
+
+
+def test_grpc_admission_scopes_checked_in_order():
+    """IP 维度先行拒绝时不消耗租户额度；租户额度耗尽时同租户其他 IP 一并受限。"""
+    from app.core.security.grpc_admission import GrpcAdmission
+
+    admission = GrpcAdmission(
+        {"BeginHandshake": {"ip": [1, 2], "tenant": [1, 3], "method": None}}
+    )
+    assert admission.check("BeginHandshake", "a", "t1") == 0
+    assert admission.check("BeginHandshake", "a", "t1") == 0
+    assert admission.check("BeginHandshake", "a", "t1") > 0
+    assert admission.check("BeginHandshake", "b", "t1") == 0
+    assert admission.check("BeginHandshake", "c", "t1") > 0
+    assert admission.check("BeginHandshake", "c", "t2") == 0
+    # 未配置限额的方法直接放行
+    assert admission.check("GetConfig", "a", "t1") == 0
+
+
+def test_grpc_admission_rejection_consumes_no_tokens():
+    """任一维度拒绝时，其他维度的令牌不被扣减。"""
+    from app.core.security.grpc_admission import GrpcAdmission
+
+    admission = GrpcAdmission({"LogEvent": {"ip": [1, 1], "tenant": [1, 1]}})
+    assert admission.check("LogEvent", "a", "t1") == 0
+    # 租户额度耗尽：IP b 的令牌保留
+    assert admission.check("LogEvent", "b", "t1") > 0
+    assert admission.check("LogEvent", "b", "t2") == 0
+    assert admission.rejected == 1
+
+
+@pytest.mark.parametrize("value", [[0, 10], [-1, 10], [1, 0.5], [1], "fast", [1, "x"]])
+def test_grpc_admission_rejects_invalid_limits(value):
+    """速率非正、突发容量不足一枚或格式错误的限额在加载时拒绝。"""
+    from app.core.security.grpc_admission import GrpcAdmission
+
+    with pytest.raises(ValueError):
+        GrpcAdmission({"LogEvent": {"ip": value}})
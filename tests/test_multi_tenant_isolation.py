@@ -115,3 +115,81 @@ async def test_permission_cross_account_members():
         # 清理
         await db.execute(delete(AccountMember).where(AccountMember.id == mid))
         await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_account_resolution_local_cache(monkeypatch):
+    """账户解析命中本地缓存；未知 slug 否定缓存；失效广播后重新加载。"""
+    from unittest.mock import AsyncMock
+    from app.core.tenant import invalidate_account, resolve_account, resolver
+    from tests.conftest import TEST_ACCOUNT_ID, TEST_ACCOUNT_SLUG
+
+    await invalidate_account(TEST_ACCOUNT_SLUG)
+    first = await resolve_account(TEST_ACCOUNT_SLUG)
+    assert first.id == TEST_ACCOUNT_ID
+
+    redis_lookup = AsyncMock(return_value=None)
+    monkeypatch.setattr(resolver, "get_cached_account", redis_lookup)
+    assert await resolve_account(TEST_ACCOUNT_SLUG) is first
+    redis_lookup.assert_not_awaited()
+
+    unknown = f"no-such-{uuid.uuid4().hex[:8]}"
+    assert await resolve_account(unknown) is None
+    assert await resolve_account(unknown) is None
+    redis_lookup.assert_awaited_once_with(unknown)
+
+    await invalidate_account(TEST_ACCOUNT_SLUG)
+    again = await resolve_account(TEST_ACCOUNT_SLUG)
+    assert again.id == TEST_ACCOUNT_ID and again is not first
+    redis_lookup.assert_awaited_with(TEST_ACCOUNT_SLUG)
+
+
+@pytest.mark.asyncio
+async def test_slug_change_invalidates_account_cache():
+    """修改 slug 后旧 slug 不再解析，新 slug 的否定缓存被清除。"""
+    from datetime import datetime, timezone
+    from app.core.auth.account_access_cache import resolve_account_access
+    from app.core.tenant import resolve_account
+    from app.models.account import Account
+    from app.models.account_member import AccountMember
+    from app.services.user.account_service import update_account_slug
+
+    suffix = uuid.uuid4().hex[:8]
+    aid, uid = f"slug-acct-{suffix}", f"slug-owner-{suffix}"
+    old, new = f"slug-old-{suffix}", f"slug-new-{suffix}"
+    async with AsyncSessionLocal() as db:
+        db.add(
+            Account(
+                id=aid,
+                name="slug",
+                slug=old,
+                api_key="k",
+                is_active=True,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+        db.add(
+            AccountMember(
+                id=str(uuid.uuid4()),
+                user_id=uid,
+                account_id=aid,
+                role_in_account="owner",
+                joined_at=datetime.now(timezone.utc),
+            )
+        )
+        await db.commit()
+    try:
+        assert (await resolve_account(old)).id == aid
+        assert await resolve_account(new) is None
+        assert await resolve_account_access(aid) == ((old, True), None)
+
+        async with AsyncSessionLocal() as db:
+            await update_account_slug(aid, new, uid, db)
+        assert await resolve_account(old) is None
+        assert (await resolve_account(new)).id == aid
+        assert await resolve_account_access(aid) == ((new, True), None)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(AccountMember).where(AccountMember.user_id == uid))
+            await db.execute(delete(Account).where(Account.id == aid))
+            await db.commit()
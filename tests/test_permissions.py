@@ -114,3 +114,132 @@ async def test_cross_account_isolation():
         # 清理
         await db.execute(delete(AccountMember).where(AccountMember.id == mid1))
         await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_account_access_cache(member_in_account, monkeypatch):
+    """账户状态与成员资格缓存命中时不查库，成员变更广播后重新加载。"""
+    from app.core.auth import account_access_cache as cache
+    from tests.conftest import TEST_ACCOUNT_SLUG
+
+    uid, aid, mid = member_in_account
+    await cache.invalidate_account_status(aid)
+    await cache.invalidate_membership(uid, aid)
+    assert await cache.resolve_account_access(aid, uid) == (
+        (TEST_ACCOUNT_SLUG, True),
+        "member",
+    )
+
+    opened = []
+    real_factory = cache.AsyncSessionLocal
+
+    def counting_factory():
+        opened.append(1)
+        return real_factory()
+
+    monkeypatch.setattr(cache, "AsyncSessionLocal", counting_factory)
+    for _ in range(10):
+        assert (await cache.resolve_account_access(aid, uid))[1] == "member"
+    assert opened == []
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(AccountMember).where(AccountMember.id == mid))
+        await db.commit()
+    await cache.invalidate_membership(uid, aid)
+    assert (await cache.resolve_account_access(aid, uid))[1] is None
+    assert (await cache.resolve_account_access(aid, uid))[1] is None
+    assert opened == [1]
+
+
+@pytest.mark.asyncio
+async def test_effective_permission_cache_versioned(member_in_account, monkeypatch):
+    """有效权限命中缓存；授予/撤销递增版本号后立即重建，不返回过期结果。"""
+    from app.services.permission import cache
+
+    uid, aid, mid = member_in_account
+    first = await cache.get_effective_permissions(uid, aid)
+    assert first.has("client.read") and not first.has("account.manage")
+
+    opened = []
+    real_factory = cache.AsyncSessionLocal
+
+    def counting_factory():
+        opened.append(1)
+        return real_factory()
+
+    monkeypatch.setattr(cache, "AsyncSessionLocal", counting_factory)
+    assert await cache.get_effective_permissions(uid, aid) is first
+    assert opened == []
+
+    async with AsyncSessionLocal() as db:
+        await grant_permission(mid, "account.manage", db, granted=True)
+        updated = await cache.get_effective_permissions(uid, aid)
+        assert updated.has("account.manage")
+        assert updated.explain("account.manage")["source"] == "override_grant"
+        await revoke_permission(mid, "account.manage", db)
+    assert not (await cache.get_effective_permissions(uid, aid)).has("account.manage")
+    assert len(opened) == 2
+
+    outsider = f"outsider-{uuid.uuid4().hex[:8]}"
+    many = await cache.get_many_effective_permissions([uid, outsider], aid)
+    assert many[outsider].explain("client.read") == {
+        "code": "client.read",
+        "granted": False,
+        "source": "not_member",
+    }
+    assert len(opened) == 3
+
+
+@pytest.mark.asyncio
+async def test_access_explain_member_manage_gate(member_in_account):
+    """权限说明：查询本人无需额外权限，查询其他用户需 member.manage。"""
+    from httpx import ASGITransport, AsyncClient
+    from app.apps.management_app import management_app
+    from app.services.crypto.token_factory import create_session_token
+
+    uid, aid, mid = member_in_account
+    other = f"explain-other-{uuid.uuid4().hex[:8]}"
+    url = f"/account/{aid}/access/explain"
+    headers = {"Authorization": f"Bearer {await create_session_token(uid)}"}
+    transport = ASGITransport(app=management_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post(
+            url, json={"codes": ["client.read", "account.manage"]}, headers=headers
+        )
+        assert res.status_code == 200
+        assert res.json() == [
+            {
+                "user_id": uid,
+                "role_in_account": "member",
+                "permissions": [
+                    {"code": "client.read", "granted": True, "source": "role"},
+                    {"code": "account.manage", "granted": False, "source": "none"},
+                ],
+            }
+        ]
+
+        others = {"codes": ["client.read"], "user_ids": [other]}
+        res = await ac.post(url, json=others, headers=headers)
+        assert res.status_code == 403
+
+        async with AsyncSessionLocal() as db:
+            await grant_permission(mid, "member.manage", db, granted=True)
+        try:
+            res = await ac.post(url, json=others, headers=headers)
+            assert res.status_code == 200
+            assert res.json() == [
+                {
+                    "user_id": other,
+                    "role_in_account": None,
+                    "permissions": [
+                        {
+                            "code": "client.read",
+                            "granted": False,
+                            "source": "not_member",
+                        }
+                    ],
+                }
+            ]
+        finally:
+            async with AsyncSessionLocal() as db:
+                await revoke_permission(mid, "member.manage", db)
@@ -5,6 +5,8 @@
 
 import pytest
 
+from app.core.config import REDIS_DB_CACHE
+from app.core.redis.accessor import get_redis
 from app.models.engine import AsyncSessionLocal
 from app.services.user.role_manager import (
     list_roles,
@@ -51,11 +53,14 @@ async def test_create_custom_role():
 
 @pytest.mark.asyncio
 async def test_delete_custom_role():
-    """删除自定义角色应成功。"""
+    """删除自定义角色应成功，并递增全局权限版本使缓存失效。"""
+    rd = get_redis(REDIS_DB_CACHE)
     async with AsyncSessionLocal() as db:
         await create_role("temp_role", "临时角色", 5, db)
+        before = int(await rd.get("perm_ver:*") or 0)
         err = await delete_role("temp_role", db)
         assert err is None
+    assert int(await rd.get("perm_ver:*")) == before + 1
 
 
 @pytest.mark.asyncio
@@ -225,3 +225,98 @@ async def test_reserved_name_bypass():
                 400,
                 200,
             ), f"保留名 {name} 返回异常状态 {r.status_code}"
+
+
+def test_cc_counters_memory_flat_under_ip_scan():
+    """百万不同源 IP 扫描下，CC 计数结构的内存占用保持恒定。"""
+    import sys
+    from app.core.security.counters import FailureTable, RingCounter
+
+    table = FailureTable(maxsize=10000, limit=5, window=60)
+    ring = RingCounter(window=60, buckets=60)
+    sizes = []
+    for i in range(1_000_000):
+        now = 1_000_000 + i * 0.001
+        table.record(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", now)
+        ring.add(now)
+        if i in (199_999, 999_999):
+            sizes.append(sys.getsizeof(table._data))
+    assert len(table) == 10000
+    assert len(ring._counts) == 60
+    # 最近 60 秒内的请求数（1ms 一次，受 1 秒分桶粒度影响）
+    assert 59_000 <= ring.total(now) <= 61_000
+    # 表已满后再写入 80 万个新 IP，内存不应增长
+    assert sizes[1] == sizes[0]
+
+
+def test_ip_failure_table_window_and_eviction():
+    """单 IP 失败达到阈值封禁、滑出窗口后解封，超限时淘汰最久未活跃 IP。"""
+    from app.core.security.counters import FailureTable
+
+    table = FailureTable(maxsize=2, limit=3, window=60)
+    for t in (0, 10, 20):
+        assert not table.blocked("a", t)
+        table.record("a", t)
+    assert table.blocked("a", 30)
+    # 最早一次失败滑出窗口
+    assert not table.blocked("a", 61)
+    table.record("a", 62)
+    assert table.blocked("a", 62)
+    # 查询不会为未知 IP 建立记录
+    assert not table.blocked("b", 62)
+    assert len(table) == 1
+    table.record("b", 63)
+    table.record("c", 64)
+    assert len(table) == 2
+    assert not table.blocked("a", 64)
+    # 长期无失败的 IP 在查询时被清理
+    assert not table.blocked("b", 200)
+    assert len(table) == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_ip_ban_with_local_fast_path(monkeypatch):
+    """失败过多的 IP 在 Redis 中封禁，跨进程可见；本地已封禁时不再访问 Redis。"""
+    from app.core.config import REDIS_DB_CACHE
+    from app.core.redis.accessor import get_redis
+    from app.core.security import limiter
+    from app.core.security.state import IP_FAIL_MAX
+
+    ip = f"test-{uuid.uuid4().hex[:8]}"
+    try:
+        for _ in range(IP_FAIL_MAX - 1):
+            await limiter.record_failure(ip)
+        assert not await limiter.check_request(ip)
+        await limiter.record_failure(ip)
+        # 模拟另一工作进程：本地无封禁记录，从 Redis 读到封禁
+        limiter._banned.clear()
+        assert await limiter.is_banned(ip)
+        limiter._banned.clear()
+        assert await limiter.check_request(ip)
+
+        async def unreachable(*args, **kwargs):
+            raise AssertionError("封禁 IP 不应访问 Redis")
+
+        monkeypatch.setattr(limiter, "cc_check", unreachable)
+        assert await limiter.check_request(ip)
+    finally:
+        limiter._banned.discard(ip)
+        await get_redis(REDIS_DB_CACHE).delete(f"cc:ban:{ip}", f"cc:fail:{ip}")
+
+
+@pytest.mark.asyncio
+async def test_limiter_falls_back_to_local_counters(monkeypatch):
+    """Redis 不可用时退回进程内计数，封禁判定保持一致。"""
+    from app.core.security import limiter
+    from app.core.security.state import IP_FAIL_MAX, get_ip_failures
+
+    def no_redis(db):
+        raise RuntimeError("Redis 未初始化")
+
+    monkeypatch.setattr(limiter, "get_redis", no_redis)
+    ip = f"test-{uuid.uuid4().hex[:8]}"
+    for _ in range(IP_FAIL_MAX):
+        assert not await limiter.check_request(ip)
+        await limiter.record_failure(ip)
+    assert await limiter.check_request(ip)
+    get_ip_failures().clear()